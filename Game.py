@@ -1,14 +1,29 @@
 import pygame
-from Player import Player
+from Player import Player, PLAYER_ANIMATIONS
 from mobs.Mob import Mob
 from maps.Map import Map
+from maps.MapLoader import MapLoader
 from screens.MainMenu import MainMenu
 from screens.MultiplayerMenu import MultiplayerMenu
 from screens.SettingsMenu import SettingsMenu
+from screens.LoadingScreen import LoadingScreen
 from enum import Enum
 from Network import Network
 from Network import Network
 from UI.GameUI import GameUI
+from entities.Entity import Entity
+from entities.HealthBar import HealthBarRenderer
+from utils.ViewCuller import ViewCuller
+from utils.SimClock import sim_clock
+from utils.FrameProfiler import frame_profiler
+from utils.QualityController import QualityController
+from utils.SimulationThread import SimulationThread, RenderSnapshot, HudStats
+from utils.RenderQueue import RenderQueue, LAYER_PROJECTILES, LAYER_SKILLS, LAYER_NAMEPLATES
+from UI.FontRegistry import font_registry, text_cache
+from skills.Projectile import RotationTable
+from utils.AssetRegistry import asset_registry
+from utils.SoundBank import sound_bank
+import os
 import uuid
 
 class GameState(Enum):
@@ -16,17 +31,24 @@ class GameState(Enum):
     MULTIPLAYER_MENU = 1
     SETTINGS = 3
     GAME = 2
+    LOADING = 4
 
 
 from utils.SettingsManager import SettingsManager
 
 class Game:
-    def __init__(self, width=0, height=0, fps=60, map_id=1):
+    def __init__(self, width=0, height=0, fps=60, map_id=1, headless=False, start_loop=True):
+        # Headless: no window or audio device (benchmarks, CI); the game still renders off-screen
+        self.headless = headless
+        if headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+            os.environ["SDL_AUDIODRIVER"] = "dummy"
         pygame.init()
         self.run = True
         self.state = GameState.MENU
         self.map_id = map_id
         self.map = None
+        self.map_loader = None  # MapLoader while a map loads in the background
         self.players = pygame.sprite.Group()
         self.all_players = pygame.sprite.Group() # Group containing local AND remote players for Mob AI
         self.remote_players = {} # id -> Player
@@ -37,9 +59,39 @@ class Game:
         self.mobs = pygame.sprite.Group()
         self.gravity = 0.75
         self.fps = fps
+        # The simulation advances in fixed steps, independent of the render rate
+        self.sim_rate = 60
+        self.step_ms = 1000 / self.sim_rate
+        self.max_frame_ms = 250
+        self.sim_accumulator = 0
+        self.pending_events = []
+        self.prev_camera = (0, 0)
+        self.frame_hits = []
+        self.sim_thread = None
+        self.previous_pins = []  # preloads of the map being switched away from
+        self.hud_stats = None
+        # Menus only repaint what changed; while nothing changes the loop drops to this rate
+        self.menu_idle_fps = 20
+        self.menu_idle = False
+        self.presented_menu = None
+        self.menu_frame = None
+        self.menu_cursor_rect = None
+        self.menu_cursor_image = None
+        self.menu_cursor_image_size = None
         
         # Initialize Settings
         self.settings_manager = SettingsManager()
+        memory_limit_mb = self.settings_manager.get_setting("asset_memory_limit_mb")
+        if memory_limit_mb:
+            asset_registry.set_memory_limit(memory_limit_mb * 1024 * 1024)
+        # Optional: simulate on a second thread while the main thread presents
+        self.pipelined = self.settings_manager.get_setting("pipelined_rendering", False)
+        self.quality = QualityController.from_settings(self.settings_manager)
+        self.map_options = {
+            "streaming": self.settings_manager.get_setting("map_streaming", False),
+            "chunk_radius": self.settings_manager.get_setting("map_chunk_radius", 1),
+            "chunk_prefetch": self.settings_manager.get_setting("map_chunk_prefetch", 1),
+        }
         
         # Virtual resolution settings
         self.VIRTUAL_WIDTH = 1366
@@ -60,6 +112,10 @@ class Game:
         self.camera_y = 0
         self.initialize_game()
         self.game_ui = GameUI(self.screen)
+        self.health_bar_renderer = HealthBarRenderer(self.screen)
+        self.culler = ViewCuller(self.VIRTUAL_WIDTH, self.VIRTUAL_HEIGHT)
+        # World sprites are queued during the frame and drawn together before the cursor and HUD
+        self.render_queue = RenderQueue(self.screen)
         
         # Initialize Menus
         # Pass saved username/ip to MultiplayerMenu
@@ -73,12 +129,23 @@ class Game:
                                                 default_username=saved_username, default_ip=saved_ip)
         self.settings_menu = SettingsMenu(self.VIRTUAL_WIDTH, self.VIRTUAL_HEIGHT,
                                           self.back_to_main, self.toggle_fullscreen, self.toggle_audio)
+        self.loading_screen = LoadingScreen(self.VIRTUAL_WIDTH, self.VIRTUAL_HEIGHT)
         
-        self.load_map(map_id)
-        self.game_loop()
+        if headless:
+            # No window to keep responsive
+            self.load_map(map_id)
+        else:
+            # The menu shows right away while the map loads behind it
+            self.begin_map_load(map_id)
+        if start_loop:
+            self.game_loop()
 
     def start_singleplayer(self):
-        self.state = GameState.GAME
+        self.enter_game()
+
+    def enter_game(self):
+        """Switch to the game, through the loading screen if the map isn't ready yet."""
+        self.state = GameState.LOADING if self.map_loader is not None else GameState.GAME
         
     def open_multiplayer(self):
         self.state = GameState.MULTIPLAYER_MENU
@@ -104,35 +171,11 @@ class Game:
             self.display_height = display_info.current_h
             self.display_surface = pygame.display.set_mode((self.display_width, self.display_height), pygame.FULLSCREEN)
             self.settings_manager.set_setting("fullscreen", True)
+        # The new window has to be presented in full
+        self.presented_menu = None
             
     def toggle_audio(self):
-        if pygame.mixer.get_init():
-            if pygame.mixer.get_num_channels() > 0:
-                # Simple mute check - if volume is > 0, set to 0, else set to 1
-                # But pygame mixer doesn't have a global mute easily without iterating channels or using music
-                # Let's just toggle volume for now.
-                # A better way is to set a flag and check it before playing sounds, but for now let's try to set volume.
-                # Actually, we can just use a flag in Game and pass it to Player?
-                # Or just hack it by setting num_channels to 0? No.
-                # Let's just set volume of all channels to 0 or 1.
-                pass
-                # For now, let's just print "Toggled Audio" as placeholder or implement a simple global volume
-                # But Player.py plays sounds directly.
-                # We should probably add a sound_manager or just hack it here.
-                # Let's try to just stop all playback for mute, but that doesn't prevent new sounds.
-                # We'll leave it as a TODO or implement a simple global flag if user insists.
-                # User asked for "mute option", so let's implement a global volume set.
-                current_vol = pygame.mixer.Channel(0).get_volume() # Check one channel? No.
-                # Let's assume unmuted.
-                # We'll use a flag self.muted
-                if not hasattr(self, 'muted'):
-                    self.muted = False
-                
-                self.muted = not self.muted
-                if self.muted:
-                    pygame.mixer.set_num_channels(0) # This might stop all sounds
-                else:
-                    pygame.mixer.set_num_channels(8) # Default
+        sound_bank.toggle_mute()
                     
     def quit_game(self):
         self.run = False
@@ -147,7 +190,7 @@ class Game:
         self.settings_manager.set_setting("last_ip", ip)
         
         self.network = Network(ip)
-        self.state = GameState.GAME
+        self.enter_game()
         
     def back_to_main(self):
         self.state = GameState.MENU
@@ -155,7 +198,7 @@ class Game:
     def initialize_game(self):
         """ Initializes general settings """
         # Check fullscreen setting
-        start_fullscreen = self.settings_manager.get_setting("fullscreen", False)
+        start_fullscreen = self.settings_manager.get_setting("fullscreen", False) and not self.headless
         
         if start_fullscreen:
             display_info = pygame.display.Info()
@@ -232,336 +275,510 @@ class Game:
     def game_loop(self):
         """ Game loop main method """
         while self.run:
-            dt = self.clock.tick(self.fps)
-            # Scale mouse position for UI
-            mouse_x, mouse_y = pygame.mouse.get_pos()
-            virtual_mouse_x = int(mouse_x * (self.VIRTUAL_WIDTH / self.display_width))
-            virtual_mouse_y = int(mouse_y * (self.VIRTUAL_HEIGHT / self.display_height))
-            virtual_mouse_pos = (virtual_mouse_x, virtual_mouse_y)
-
-            events = pygame.event.get()
-            for event in events:
-                if event.type == pygame.QUIT:
-                    self.run = False
-
-            if self.state == GameState.MENU:
-                self.screen.fill((0, 0, 0))
-                self.main_menu.update(virtual_mouse_pos, events)
-                self.main_menu.draw(self.screen)
-            
-            elif self.state == GameState.MULTIPLAYER_MENU:
-                self.screen.fill((0, 0, 0))
-                self.multiplayer_menu.update(virtual_mouse_pos, events)
-                self.multiplayer_menu.draw(self.screen)
-
-            elif self.state == GameState.SETTINGS:
-                self.screen.fill((0, 0, 0))
-                self.settings_menu.update(virtual_mouse_pos, events)
-                self.settings_menu.draw(self.screen)
-
-            elif self.state == GameState.GAME:
-                # Update animation time for backgrounds
-                if self.map:
-                    self.map.animation_time += dt / 1000.0  # Convert to seconds
-                self.draw_bg()
+            if self.state != GameState.GAME and self.menu_idle and self.map_loader is None:
+                dt = self.clock.tick(self.menu_idle_fps)
+            else:
+                dt = self.clock.tick(self.fps)
+                if self.state == GameState.GAME:
+                    self.quality.sample(self.clock.get_rawtime())
+            self.run_frame(dt, pygame.event.get())
+
+        if self.sim_thread is not None:
+            self.sim_thread.stop()
+        pygame.quit()
 
-                # Mob Logic
-                # Only Host updates mob physics/AI
-                if self.is_host:
-                    for mob in self.mobs:
-                        mob.update(self.camera_x, self.camera_y)
-                        mob.draw(self.camera_x, self.camera_y)
-                else:
-                    # Clients just draw mobs based on server data (updated in network block)
-                    # But we still need to draw them
-                    for mob in self.mobs:
-                        # mob.update() # Don't run update logic on client
-                        mob.client_update(self.camera_x, self.camera_y)
-                        mob.draw(self.camera_x, self.camera_y)
+    def run_frame(self, dt, events):
+        """Handle one frame: dt milliseconds of simulation for the given input events, then draw and present."""
+        frame_profiler.begin_frame()
+        # Scale mouse position for UI
+        mouse_x, mouse_y = pygame.mouse.get_pos()
+        virtual_mouse_x = int(mouse_x * (self.VIRTUAL_WIDTH / self.display_width))
+        virtual_mouse_y = int(mouse_y * (self.VIRTUAL_HEIGHT / self.display_height))
+        virtual_mouse_pos = (virtual_mouse_x, virtual_mouse_y)
 
-                for player in self.players:
-                    # Update camera to follow player (before updating player so health bar uses correct camera)
-                    self.update_camera(player)
-                    player.update(self.camera_x, self.camera_y)
-                    player.draw(self.camera_x, self.camera_y)
-                    
-                    # Collect hits this frame
-                    self.frame_hits = []
-                    player.projectiles_group.update(self.mobs, player, self.frame_hits)
-                    
-                    # Draw projectiles with camera offset
-                    for projectile in player.projectiles_group:
-                        screen_x = projectile.rect.x - self.camera_x
-                        screen_y = projectile.rect.y - self.camera_y
-                        self.screen.blit(projectile.image, (screen_x, screen_y))
-                    player.skills_group.update(player)
-                    # Draw skills with camera offset
-                    for skill in player.skills_group:
-                        screen_x = skill.rect.x - self.camera_x
-                        screen_y = skill.rect.y - self.camera_y
-                        self.screen.blit(skill.image, (screen_x, screen_y))
-
-                    # update player actions
-                    if player.alive:
-                        if player.attack:
-                            player.update_action(player.next_attack)
-                        elif player.skill_big_star:
-                            player.update_action(6)
-                        elif player.in_air:
-                            player.update_action(2)  # 2: jump
-                        elif player.moving_left or player.moving_right:
-                            player.update_action(1)  # 1: run
-                        else:
-                            player.update_action(0)  # 0: idle
-                        player.move(self.gravity)
-
-                    self.handle_controls(player, events)
-                    
-                    # --- Networking ---
-                    if self.network:
-                        # Prepare player data to send
-                        # Include projectiles
-                        projectiles_data = []
-                        for p in player.projectiles_group:
-                            projectiles_data.append({
-                                'x': p.rect.x,
-                                'y': p.rect.y,
-                                'image_name': p.projectile_name, # We need to know what image to draw
-                                'direction': p.direction,
-                                'angle': p.angle
-                            })
-                            
-                        # Include skills (big star)
-                        skills_data = []
-                        for s in player.skills_group:
-                             skills_data.append({
-                                'x': s.rect.x,
-                                'y': s.rect.y,
-                                'skill_name': s.skill_name,
-                                'direction': s.direction,
-                                'frame_index': s.frame_index # Send frame index for animation
-                            })
-
-                        player_data = {
-                            'id': self.player_id,
-                            'username': self.username,
-                            'x': player.rect.x,
-                            'y': player.rect.y,
-                            'action': player.action,
-                            'frame_index': player.frame_index,
-                            'flip': player.flip,
-                            'char_type': player.char_type,
-                            'hp': player.health,
-                            'max_hp': player.max_health,
-                            'is_hit': player.is_hit,
-                            'hit_cooldown': player.hit_cooldown,
-                            'projectiles': projectiles_data,
-                            'skills': skills_data
-                        }
-                        
-                        # Prepare Mob Data (If Host)
-                        mob_updates = {}
-                        if self.is_host:
-                            for mob in self.mobs:
-                                if mob.alive: # Only send alive mobs? Or send dead state?
-                                    mob_updates[mob.id] = {
-                                        'x': mob.rect.x,
-                                        'y': mob.rect.y,
-                                        'action': mob.action,
-                                        'frame_index': mob.frame_index,
-                                        'flip': mob.flip,
-                                        'hp': mob.health,
-                                        'max_hp': mob.max_health
-                                    }
-                        
-                        # Send and receive
-                        
-                        # Collect player hits (Host only)
-                        player_hits = []
-                        if self.is_host:
-                            for p in self.all_players:
-                                if hasattr(p, 'pending_damage') and p.pending_damage:
-                                    # Find ID for this player
-                                    # If it's local player
-                                    if p == player:
-                                        pid = self.player_id
-                                    else:
-                                        # Find remote player ID
-                                        pid = None
-                                        for r_id, r_p in self.remote_players.items():
-                                            if r_p == p:
-                                                pid = r_id
-                                                break
-                                    
-                                    if pid:
-                                        for dmg in p.pending_damage:
-                                            player_hits.append((pid, dmg))
-                                    
-                                    p.pending_damage = [] # Clear
-                        
-                        packet = {
-                            'player_data': player_data,
-                            'mob_hits': self.frame_hits, # Send hits to server
-                            'player_hits': player_hits # Host sends who got hit
-                        }
-                        if self.is_host:
-                            packet['mob_updates'] = mob_updates
-                            
-                        server_reply = self.network.send(packet)
-                        
-                        # Process received data
-                        if server_reply:
-                            self.is_host = server_reply.get('is_host', False)
-                            
-                            # If Host, process remote hits
-                            if self.is_host and 'remote_hits' in server_reply:
-                                for mob_id, damage in server_reply['remote_hits']:
-                                    # Find mob by ID
-                                    for mob in self.mobs:
-                                        if mob.id == mob_id and mob.alive:
-                                            mob.hit(damage, None) # Apply damage
-                                            break
-                            
-                            # Process Player Hits (Client side)
-                            if 'player_hits' in server_reply:
-                                for pid, damage in server_reply['player_hits']:
-                                    if pid == self.player_id:
-                                        # We got hit!
-                                        # Apply damage locally
-                                        # We use a special flag or just call hit() but ensure we don't loop
-                                        # Player.hit() adds to pending_damage, but we are client, so we don't send player_hits.
-                                        # So it's safe to call hit()
-                                        player.hit(damage)
-                            
-                            # 1. Update Remote Players
-                            all_players_data = server_reply.get('players', {})
-                            current_remote_ids = set()
-                            
-                            for addr, p_data in all_players_data.items():
-                                if not p_data: continue
-                                pid = p_data.get('id')
-                                
-                                # Skip ourselves
-                                if pid == self.player_id:
-                                    continue
-                                    
-                                current_remote_ids.add(pid)
-                                
-                                # Update or Create remote player
-                                if pid in self.remote_players:
-                                    remote_p = self.remote_players[pid]
-                                    remote_p.rect.x = p_data['x']
-                                    remote_p.rect.y = p_data['y']
-                                    remote_p.action = p_data['action']
-                                    remote_p.frame_index = p_data['frame_index']
-                                    remote_p.flip = p_data['flip']
-                                    remote_p.health = p_data['hp']
-                                    remote_p.is_hit = p_data.get('is_hit', False)
-                                    remote_p.hit_cooldown = p_data.get('hit_cooldown', 0)
-                                    # Update animation manually
-                                    remote_p.image = remote_p.animation_list[remote_p.action][remote_p.frame_index]
-                                    
-                                    # Store projectile/skill data for drawing
-                                    remote_p.remote_projectiles = p_data.get('projectiles', [])
-                                    remote_p.remote_skills = p_data.get('skills', [])
-                                    
-                                else:
-                                    # Create new remote player
-                                    new_p = Player(
-                                        self.screen,
-                                        p_data['char_type'],
-                                        p_data['x'],
-                                        p_data['y'],
-                                        1, # scale
-                                        3, # speed
-                                        p_data['max_hp'],
-                                        p_data.get('username', 'Unknown'), # name
-                                        None, # mobs
-                                        None, # tiles
-                                    )
-                                    new_p.remote_projectiles = []
-                                    new_p.remote_skills = []
-                                    self.remote_players[pid] = new_p
-                                    self.all_players.add(new_p) # Add to all_players for Mob AI
-                                    
-                            # Remove disconnected players
-                            disconnected_ids = set(self.remote_players.keys()) - current_remote_ids
-                            for pid in disconnected_ids:
-                                if pid in self.remote_players:
-                                    self.all_players.remove(self.remote_players[pid]) # Remove from all_players
-                                del self.remote_players[pid]
-                                
-                            # Draw remote players and their skills
-                            for pid, remote_p in self.remote_players.items():
-                                remote_p.draw(self.camera_x, self.camera_y)
-                                remote_p.draw_remote_projectiles(self.screen, self.camera_x, self.camera_y)
-                                # Draw username
-                                p_name = "Unknown"
-                                for p_data in all_players_data.values():
-                                    if p_data and p_data.get('id') == pid:
-                                        p_name = p_data.get('username', 'Unknown')
-                                        break
-                                
-                                font = pygame.font.SysFont("Arial", 14)
-                                name_surf = font.render(p_name, True, (255, 255, 255))
-                                name_rect = name_surf.get_rect(center=(remote_p.rect.centerx - self.camera_x, remote_p.rect.top - 10 - self.camera_y))
-                                self.screen.blit(name_surf, name_rect)
-                                
-                                # Draw remote projectiles
-                                # We need to load projectile images. 
-                                # Optimization: Load them once or use Player's existing logic if possible.
-                                # Since we don't have the objects, we just draw the images at the positions.
-                                # We can use the local player's projectile loading logic or just load them here.
-                                # Better: Add a method in Player to draw_remote_projectiles
-                                remote_p.draw_remote_projectiles(self.screen, self.camera_x, self.camera_y)
-
-                            # 2. Update Mobs (If Client)
-                            if not self.is_host:
-                                mob_states = server_reply.get('mobs', {})
-                                for mob in self.mobs:
-                                    if mob.id in mob_states:
-                                        m_data = mob_states[mob.id]
-                                        mob.rect.x = m_data['x']
-                                        mob.rect.y = m_data['y']
-                                        mob.action = m_data['action']
-                                        mob.frame_index = m_data['frame_index']
-                                        mob.flip = m_data['flip']
-                                        mob.health = m_data['hp']
-                                        # Update image
-                                        if mob.action < len(mob.animation_list) and mob.frame_index < len(mob.animation_list[mob.action]):
-                                            mob.image = mob.animation_list[mob.action][mob.frame_index]
-
-            # draws cursor
-            # Scale mouse position from display coordinates to virtual coordinates
-            # mouse_x, mouse_y = pygame.mouse.get_pos() # Already got this above
-            # virtual_mouse_x = int(mouse_x * (self.VIRTUAL_WIDTH / self.display_width))
-            # virtual_mouse_y = int(mouse_y * (self.VIRTUAL_HEIGHT / self.display_height))
+        for event in events:
+            if event.type == pygame.QUIT:
+                self.run = False
+            # F3: frame profiler overlay, F4: export its frames to CSV
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                frame_profiler.toggle()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F4 and frame_profiler.enabled:
+                frame_profiler.export_csv()
+
+        if self.map_loader is not None:
+            if self.map_loader.update():
+                self.finish_map_load()
+            else:
+                self.loading_screen.set_progress(self.map_loader.progress)
+
+        if self.state in (GameState.MENU, GameState.MULTIPLAYER_MENU, GameState.SETTINGS, GameState.LOADING):
+            menu = self.get_active_menu()
+            menu.update(virtual_mouse_pos, events)
+            # A button may have switched screens; present whatever is active now
+            if self.state != GameState.GAME:
+                self.present_menu(self.get_active_menu(), virtual_mouse_pos)
+                return
+
+        if self.state == GameState.GAME:
+            self.presented_menu = None
+            if self.pipelined:
+                # Present the previous tick while the simulation thread runs the next one
+                if self.sim_thread is None:
+                    self.sim_thread = SimulationThread(self)
+                    self.sim_thread.start()
+                snapshot = self.sim_thread.exchange(dt, events)
+                self.draw_snapshot(snapshot)
+                self.hud_stats = snapshot.hud
+            else:
+                if self.map:
+                    self.quality.apply(self.map)
+                self.advance(dt, events)
+                # Draw between the last two simulation steps
+                self.render(self.sim_accumulator / self.step_ms)
+                self.hud_stats = self.get_hud_stats()
+
+        # draws cursor
+        # Scale mouse position from display coordinates to virtual coordinates
+        # mouse_x, mouse_y = pygame.mouse.get_pos() # Already got this above
+        # virtual_mouse_x = int(mouse_x * (self.VIRTUAL_WIDTH / self.display_width))
+        # virtual_mouse_y = int(mouse_y * (self.VIRTUAL_HEIGHT / self.display_height))
+        with frame_profiler.section("cursor"):
             self.screen.blit(self.cursor, (virtual_mouse_x, virtual_mouse_y))
             self.screen.blit(self.cursor, (virtual_mouse_x, virtual_mouse_y))
-            
-            # Draw UI
-            if self.state == GameState.GAME:
-                # Find local player
-                for player in self.players:
-                    if player.id == self.player_id: # Wait, Player doesn't have id field initialized in init?
-                        # Game.py assigns self.player_id to Game, but Player object?
-                        # In Game.py: self.players.add(player)
-                        # There is only one local player in self.players usually?
-                        # Yes, self.players.add(player) in load_map.
-                        self.game_ui.draw(player)
-                        break
-                # Fallback if loop doesn't find (shouldn't happen if single player)
-                if len(self.players) > 0:
-                     # Assuming the first one is local
-                     pass
-
-            # Scale virtual screen to display size and blit
+
+        # Draw UI
+        with frame_profiler.section("hud"):
+            if self.state == GameState.GAME and self.hud_stats is not None:
+                self.game_ui.draw(self.hud_stats)
+            frame_profiler.draw(self.screen)
+
+        # Scale virtual screen to display size and blit
+        with frame_profiler.section("scale"):
             scaled_screen = pygame.transform.scale(self.screen, (self.display_width, self.display_height))
             self.display_surface.blit(scaled_screen, (0, 0))
 
+        with frame_profiler.section("present"):
             pygame.display.update()
 
-        pygame.quit()
+    def advance(self, dt, events):
+        """Run the simulation steps due after dt milliseconds, then sync with the server."""
+        # Simulation runs in fixed steps; a long frame (e.g. a hitch) is clamped
+        # instead of running an unbounded number of catch-up steps
+        self.sim_accumulator += min(dt, self.max_frame_ms)
+        self.pending_events.extend(events)
+        self.frame_hits = []
+        while self.sim_accumulator >= self.step_ms:
+            self.simulate(self.pending_events)
+            self.pending_events = []
+            self.sim_accumulator -= self.step_ms
+
+        # Networking runs once per rendered frame
+        if self.network:
+            for player in self.players:
+                self.sync_network(player)
+
+    def simulate(self, events):
+        """Advance the world by one fixed step of self.step_ms."""
+        # Remember where everything was so rendering can interpolate
+        self.prev_camera = (self.camera_x, self.camera_y)
+        for mob in self.mobs:
+            mob.store_position()
+        for player in self.players:
+            player.store_position()
+            for projectile in player.projectiles_group:
+                projectile.store_position()
+
+        sim_clock.advance(self.step_ms)
+        # Update animation time for backgrounds
+        if self.map:
+            self.map.animation_time += self.step_ms / 1000.0  # Convert to seconds
+
+        # Mob Logic
+        # Only Host updates mob physics/AI
+        with frame_profiler.section("mob_update"):
+            world = self.update_streaming()
+            if self.is_host:
+                for mob in self.mobs:
+                    # Mobs outside the loaded chunks wait until a player comes near
+                    if world is None or world.is_active(*mob.rect.center):
+                        mob.update(self.camera_x, self.camera_y)
+            else:
+                # Clients only animate mobs; positions come from the server (see sync_network)
+                for mob in self.mobs:
+                    if world is None or world.is_active(*mob.rect.center):
+                        mob.client_update(self.camera_x, self.camera_y)
+
+        for player in self.players:
+            with frame_profiler.section("player_update"):
+                # Update camera to follow player
+                self.update_camera(player)
+                player.update(self.camera_x, self.camera_y)
+
+            # Hits are collected over every step of the frame and sent by sync_network
+            with frame_profiler.section("projectiles"):
+                player.projectiles_group.update(self.mobs, player, self.frame_hits)
+                player.skills_group.update(player)
+
+            # update player actions
+            with frame_profiler.section("player_update"):
+                if player.alive:
+                    if player.attack:
+                        player.update_action(player.next_attack)
+                    elif player.skill_big_star:
+                        player.update_action(6)
+                    elif player.in_air:
+                        player.update_action(2)  # 2: jump
+                    elif player.moving_left or player.moving_right:
+                        player.update_action(1)  # 1: run
+                    else:
+                        player.update_action(0)  # 0: idle
+                    player.move(self.gravity)
+
+                self.handle_controls(player, events)
+
+    def sync_network(self, player):
+        """Send this frame's state to the server and apply its reply."""
+        # Prepare player data to send
+        # Include projectiles
+        projectiles_data = []
+        for p in player.projectiles_group:
+            projectiles_data.append({
+                'x': p.rect.x,
+                'y': p.rect.y,
+                'image_name': p.projectile_name, # We need to know what image to draw
+                'direction': p.direction,
+                'angle': p.angle
+            })
+
+        # Include skills (big star)
+        skills_data = []
+        for s in player.skills_group:
+             skills_data.append({
+                'x': s.rect.x,
+                'y': s.rect.y,
+                'skill_name': s.skill_name,
+                'direction': s.direction,
+                'frame_index': s.frame_index # Send frame index for animation
+            })
+
+        player_data = {
+            'id': self.player_id,
+            'username': self.username,
+            'x': player.rect.x,
+            'y': player.rect.y,
+            'action': player.action,
+            'frame_index': player.frame_index,
+            'flip': player.flip,
+            'char_type': player.char_type,
+            'hp': player.health,
+            'max_hp': player.max_health,
+            'is_hit': player.is_hit,
+            'hit_cooldown': player.hit_cooldown,
+            'projectiles': projectiles_data,
+            'skills': skills_data
+        }
+
+        # Prepare Mob Data (If Host)
+        mob_updates = {}
+        if self.is_host:
+            for mob in self.mobs:
+                if mob.alive: # Only send alive mobs? Or send dead state?
+                    mob_updates[mob.id] = {
+                        'x': mob.rect.x,
+                        'y': mob.rect.y,
+                        'action': mob.action,
+                        'frame_index': mob.frame_index,
+                        'flip': mob.flip,
+                        'hp': mob.health,
+                        'max_hp': mob.max_health
+                    }
+
+        # Send and receive
+
+        # Collect player hits (Host only)
+        player_hits = []
+        if self.is_host:
+            for p in self.all_players:
+                if hasattr(p, 'pending_damage') and p.pending_damage:
+                    # Find ID for this player
+                    # If it's local player
+                    if p == player:
+                        pid = self.player_id
+                    else:
+                        # Find remote player ID
+                        pid = None
+                        for r_id, r_p in self.remote_players.items():
+                            if r_p == p:
+                                pid = r_id
+                                break
+
+                    if pid:
+                        for dmg in p.pending_damage:
+                            player_hits.append((pid, dmg))
+
+                    p.pending_damage = [] # Clear
+
+        packet = {
+            'player_data': player_data,
+            'mob_hits': self.frame_hits, # Send hits to server
+            'player_hits': player_hits # Host sends who got hit
+        }
+        if self.is_host:
+            packet['mob_updates'] = mob_updates
+
+        with frame_profiler.section("network"):
+            server_reply = self.network.send(packet)
+
+        # Process received data
+        if server_reply:
+            self.is_host = server_reply.get('is_host', False)
+
+            # If Host, process remote hits
+            if self.is_host and 'remote_hits' in server_reply:
+                for mob_id, damage in server_reply['remote_hits']:
+                    # Find mob by ID
+                    for mob in self.mobs:
+                        if mob.id == mob_id and mob.alive:
+                            mob.hit(damage, None) # Apply damage
+                            break
+
+            # Process Player Hits (Client side)
+            if 'player_hits' in server_reply:
+                for pid, damage in server_reply['player_hits']:
+                    if pid == self.player_id:
+                        # We got hit!
+                        # Apply damage locally
+                        # We use a special flag or just call hit() but ensure we don't loop
+                        # Player.hit() adds to pending_damage, but we are client, so we don't send player_hits.
+                        # So it's safe to call hit()
+                        player.hit(damage)
+
+            # 1. Update Remote Players
+            all_players_data = server_reply.get('players', {})
+            current_remote_ids = set()
+
+            for addr, p_data in all_players_data.items():
+                if not p_data: continue
+                pid = p_data.get('id')
+
+                # Skip ourselves
+                if pid == self.player_id:
+                    continue
+
+                current_remote_ids.add(pid)
+
+                # Update or Create remote player
+                if pid in self.remote_players:
+                    remote_p = self.remote_players[pid]
+                    remote_p.rect.x = p_data['x']
+                    remote_p.rect.y = p_data['y']
+                    remote_p.action = p_data['action']
+                    remote_p.frame_index = p_data['frame_index']
+                    remote_p.flip = p_data['flip']
+                    remote_p.health = p_data['hp']
+                    remote_p.name = p_data.get('username', 'Unknown')
+                    remote_p.is_hit = p_data.get('is_hit', False)
+                    remote_p.hit_cooldown = p_data.get('hit_cooldown', 0)
+                    # Update animation manually
+                    remote_p.image = remote_p.animation_list[remote_p.action][remote_p.frame_index]
+
+                    # Store projectile/skill data for drawing
+                    remote_p.remote_projectiles = p_data.get('projectiles', [])
+                    remote_p.remote_skills = p_data.get('skills', [])
+
+                else:
+                    # Create new remote player
+                    new_p = Player(
+                        self.screen,
+                        p_data['char_type'],
+                        p_data['x'],
+                        p_data['y'],
+                        1, # scale
+                        3, # speed
+                        p_data['max_hp'],
+                        p_data.get('username', 'Unknown'), # name
+                        None, # mobs
+                        None, # tiles
+                    )
+                    new_p.remote_projectiles = []
+                    new_p.remote_skills = []
+                    self.remote_players[pid] = new_p
+                    self.all_players.add(new_p) # Add to all_players for Mob AI
+
+            # Remove disconnected players
+            disconnected_ids = set(self.remote_players.keys()) - current_remote_ids
+            for pid in disconnected_ids:
+                if pid in self.remote_players:
+                    self.remote_players[pid].kill() # Remove from all_players and release its sprites
+                del self.remote_players[pid]
+
+            # 2. Update Mobs (If Client)
+            if not self.is_host:
+                mob_states = server_reply.get('mobs', {})
+                for mob in self.mobs:
+                    if mob.id in mob_states:
+                        m_data = mob_states[mob.id]
+                        mob.rect.x = m_data['x']
+                        mob.rect.y = m_data['y']
+                        mob.action = m_data['action']
+                        mob.frame_index = m_data['frame_index']
+                        mob.flip = m_data['flip']
+                        mob.health = m_data['hp']
+                        # Update image
+                        if mob.action < len(mob.animation_list) and mob.frame_index < len(mob.animation_list[mob.action]):
+                            mob.image = mob.animation_list[mob.action][mob.frame_index]
+
+    def render(self, alpha):
+        """Draw the world, alpha (0..1) being how far we are between the last two simulation steps."""
+        camera_x, camera_y = self.queue_world(alpha)
+        with frame_profiler.section("draw_bg"):
+            self.draw_bg(camera_x, camera_y)
+        # Draw the queued world sprites in layer order
+        with frame_profiler.section("sprites"):
+            self.render_queue.flush()
+
+    def capture_snapshot(self):
+        """Freeze what render() would draw right now into a RenderSnapshot (pipelined mode)."""
+        camera = self.queue_world(self.sim_accumulator / self.step_ms)
+        animation_time = self.map.animation_time if self.map else 0.0
+        return RenderSnapshot(camera, self.render_queue.take(), self.get_hud_stats(), self.map, animation_time, None)
+
+    def draw_snapshot(self, snapshot):
+        # Only the snapshot is read here: the simulation thread is already changing the live world
+        if snapshot.game_map:
+            self.quality.apply(snapshot.game_map)
+        with frame_profiler.section("draw_bg"):
+            self.draw_bg(*snapshot.camera, snapshot.game_map, snapshot.animation_time)
+        # The simulation thread may be deriving new frames from the same sheets
+        with frame_profiler.section("sprites"), asset_registry.lock:
+            self.screen.blits(snapshot.sprites, doreturn=False)
+
+    def get_hud_stats(self):
+        for player in self.players:
+            if player.id == self.player_id:
+                return HudStats(player.level, player.health, player.max_health,
+                                player.mana, player.max_mana, player.exp, player.max_exp)
+        return None
+
+    def queue_world(self, alpha):
+        """Cull and queue every world sprite at its interpolated position. Returns the camera used."""
+        prev_x, prev_y = self.prev_camera
+        if abs(self.camera_x - prev_x) > Entity.SNAP_DISTANCE or abs(self.camera_y - prev_y) > Entity.SNAP_DISTANCE:
+            prev_x, prev_y = self.camera_x, self.camera_y
+        camera_x = round(prev_x + (self.camera_x - prev_x) * alpha)
+        camera_y = round(prev_y + (self.camera_y - prev_y) * alpha)
+        # Entities are only blitted if they overlap the camera view
+        self.culler.begin_frame(camera_x, camera_y)
+
+        with frame_profiler.section("mob_draw"):
+            for mob in self.mobs:
+                if self.culler.visible_image(mob.image, *mob.get_render_pos(alpha)):
+                    mob.draw(camera_x, camera_y, self.render_queue, alpha)
+
+            # All mob health bars in one batched pass, on top of the mobs
+            self.health_bar_renderer.draw([mob.health_bar for mob in self.mobs], camera_x, camera_y, self.render_queue, alpha)
+
+        for player in self.players:
+            if self.culler.visible_image(player.image, *player.get_render_pos(alpha)):
+                player.draw(camera_x, camera_y, self.render_queue, alpha)
+
+            # Draw projectiles with camera offset
+            for projectile in player.projectiles_group:
+                x, y = projectile.get_render_pos(alpha)
+                if not self.culler.visible_image(projectile.image, x, y):
+                    continue
+                self.render_queue.push(projectile.image, (x - camera_x, y - camera_y), LAYER_PROJECTILES)
+            # Draw skills with camera offset
+            for skill in player.skills_group:
+                if not self.culler.visible_image(skill.image, skill.rect.x, skill.rect.y):
+                    continue
+                screen_x = skill.rect.x - camera_x
+                screen_y = skill.rect.y - camera_y
+                self.render_queue.push(skill.image, (screen_x, screen_y), LAYER_SKILLS)
+
+        # Draw remote players and their skills
+        for remote_p in self.remote_players.values():
+            if self.culler.visible_image(remote_p.image, remote_p.rect.x, remote_p.rect.y):
+                remote_p.draw(camera_x, camera_y, self.render_queue)
+            remote_p.draw_remote_projectiles(self.screen, camera_x, camera_y, self.culler, self.render_queue)
+            # Draw username
+            # Rendered once per name; only re-rendered if the name changes
+            name_surf = text_cache.render(font_registry.get("Arial", 14), remote_p.name, (255, 255, 255))
+            name_rect = name_surf.get_rect(center=(remote_p.rect.centerx - camera_x, remote_p.rect.top - 10 - camera_y))
+            self.render_queue.push(name_surf, name_rect, LAYER_NAMEPLATES)
+
+        return camera_x, camera_y
+
+    def get_active_menu(self):
+        if self.state == GameState.MULTIPLAYER_MENU:
+            return self.multiplayer_menu
+        if self.state == GameState.SETTINGS:
+            return self.settings_menu
+        if self.state == GameState.LOADING:
+            return self.loading_screen
+        return self.main_menu
+
+    def present_menu(self, menu, virtual_mouse_pos):
+        """
+        Present a menu using dirty rectangles.
+
+        The scaled menu (without the cursor) is kept in self.menu_frame. Widgets that
+        changed are repainted on the virtual screen and rescaled into it; only their
+        areas and the old/new cursor areas are pushed to the window. When nothing
+        changed no drawing happens at all and the loop is throttled to menu_idle_fps.
+        """
+        display_size = (self.display_width, self.display_height)
+        scale_x = self.display_width / self.VIRTUAL_WIDTH
+        scale_y = self.display_height / self.VIRTUAL_HEIGHT
+        if self.menu_cursor_image_size != display_size:
+            cursor_size = (max(1, round(self.cursor.get_width() * scale_x)), max(1, round(self.cursor.get_height() * scale_y)))
+            self.menu_cursor_image = pygame.transform.scale(self.cursor, cursor_size)
+            self.menu_cursor_image_size = display_size
+        cursor_rect = self.menu_cursor_image.get_rect(topleft=(int(virtual_mouse_pos[0] * scale_x), int(virtual_mouse_pos[1] * scale_y)))
+
+        if menu is not self.presented_menu or self.menu_frame is None or self.menu_frame.get_size() != display_size:
+            menu.draw(self.screen)
+            self.menu_frame = pygame.transform.scale(self.screen, display_size)
+            self.display_surface.blit(self.menu_frame, (0, 0))
+            self.display_surface.blit(self.menu_cursor_image, cursor_rect)
+            pygame.display.update()
+            self.presented_menu = menu
+            self.menu_cursor_rect = cursor_rect
+            self.menu_idle = False
+            return
+
+        updated_rects = []
+        dirty_rects = menu.get_dirty_rects()
+        if dirty_rects:
+            menu.redraw(self.screen, dirty_rects)
+            pygame.transform.scale(self.screen, display_size, self.menu_frame)
+            for rect in dirty_rects:
+                updated_rects.append(self.virtual_to_display_rect(rect))
+        if cursor_rect != self.menu_cursor_rect:
+            updated_rects.append(self.menu_cursor_rect)
+            updated_rects.append(cursor_rect)
+
+        if not updated_rects:
+            self.menu_idle = True
+            return
+
+        for rect in updated_rects:
+            self.display_surface.blit(self.menu_frame, rect, rect)
+        self.display_surface.blit(self.menu_cursor_image, cursor_rect)
+        pygame.display.update(updated_rects)
+        self.menu_cursor_rect = cursor_rect
+        self.menu_idle = False
+
+    def virtual_to_display_rect(self, rect):
+        """Map a rect on the virtual screen to the (slightly padded) window area it covers."""
+        scale_x = self.display_width / self.VIRTUAL_WIDTH
+        scale_y = self.display_height / self.VIRTUAL_HEIGHT
+        left = int(rect.left * scale_x) - 1
+        top = int(rect.top * scale_y) - 1
+        right = int(rect.right * scale_x) + 2
+        bottom = int(rect.bottom * scale_y) + 2
+        display_rect = pygame.Rect(left, top, right - left, bottom - top)
+        return display_rect.clip(self.display_surface.get_rect())
 
     def handle_controls(self, player, events):
         """ Handles game controlls """
@@ -602,25 +819,92 @@ class Game:
 
     def load_map(self, map_id: int):
         """ Sets bg variable to the current map """
-        self.map = Map(self.screen, self.all_players, self.map_id)
+        previous_pins = asset_registry.take_pinned()
+        self.preload_assets()
+        self.map = Map(self.screen, self.all_players, self.map_id, **self.map_options)
+        self.setup_map()
+        # Pinned again above if the new map uses them too, so only the old map's extras are let go
+        asset_registry.release_pinned(previous_pins)
+
+    def begin_map_load(self, map_id: int):
+        """Start loading a map on worker threads; finish_map_load() switches to it once ready."""
+        self.map_id = map_id
+        # Kept until the new map has pinned its own (see finish_map_load)
+        self.previous_pins += asset_registry.take_pinned()
+        self.map_loader = MapLoader(self.screen, self.all_players, map_id, self.get_preload_animations(),
+                                    map_options=self.map_options).start()
+        self.loading_screen.set_progress(0.0)
+        if self.state == GameState.GAME:
+            self.state = GameState.LOADING
+
+    def finish_map_load(self):
+        if self.sim_thread is not None:
+            # Let a tick still in flight finish on the old map before switching
+            self.sim_thread.done.wait()
+        self.map = self.map_loader.map
+        self.map_loader = None
+        # Everything was decoded by the loader, this only fills in flipped frames and rotations
+        self.preload_assets()
+        self.setup_map()
+        asset_registry.release_pinned(self.previous_pins)
+        self.previous_pins = []
+        if self.state == GameState.LOADING:
+            self.state = GameState.GAME
+
+    def update_streaming(self):
+        """Load the map chunks around every player and the camera. Returns the ChunkedWorld, None without streaming."""
+        if not self.map or self.map.world is None:
+            return None
+        focus_points = {id(player): player.rect.center for player in self.all_players}
+        focus_points["camera"] = (self.camera_x + self.VIRTUAL_WIDTH // 2, self.camera_y + self.VIRTUAL_HEIGHT // 2)
+        self.map.world.update(focus_points)
+        return self.map.world
+
+    def setup_map(self):
+        """Spawn the local player on the current map and point the camera at it."""
+        # Clear out the previous map's local player and mobs, giving back their shared frames
+        for old_player in self.players.sprites():
+            for sprite in old_player.projectiles_group.sprites() + old_player.skills_group.sprites():
+                sprite.kill()
+            old_player.kill()
+        for mob in self.mobs.sprites():
+            mob.kill()
         self.mobs = self.map.get_mobs()
         # Get map boundaries to pass to player
         map_bounds = self.map.get_map_bounds()
         # Get spawn point from map
         spawn_x, spawn_y = self.map.get_spawn_point()
         # Spawn Player (Would move to Map class on next update)
-        player = Player(self.screen, "Thief", spawn_x, spawn_y, 1, 3, 150, self.username or "Player", self.mobs, self.map.tiles, self.map.slope_tiles, self.map.lines, map_bounds)
+        player = Player(self.screen, "Thief", spawn_x, spawn_y, 1, 3, 150, self.username or "Player", self.mobs, self.map.tiles, self.map.slope_tiles, self.map.lines, map_bounds,
+                        line_index=self.map.line_index, has_lines=self.map.has_lines)
         player.id = self.player_id
         self.players.add(player)
         self.all_players.add(player)
         # Initialize camera to player's starting position
         self.camera_x = player.rect.centerx - self.VIRTUAL_WIDTH // 2
         self.camera_y = player.rect.centery - self.VIRTUAL_HEIGHT // 2
-
-    def draw_bg(self):
+        self.prev_camera = (self.camera_x, self.camera_y)
+
+    def get_preload_animations(self):
+        """Animation folders of the player and skills, needed on every map."""
+        animations = [f'sprites/player/{char_type}/{animation}' for char_type in ("Thief",) for animation in PLAYER_ANIMATIONS]
+        animations += [f'sprites/skills/{skill}' for skill in ("big_star", "flash_jump")]
+        return animations
+
+    def preload_assets(self):
+        """Warm the shared asset registry so spawning players, projectiles and skills never hits the disk."""
+        for directory in self.get_preload_animations():
+            asset_registry.preload_animation(directory)
+        for projectile_name in ("throwing_star", "big_star"):
+            RotationTable.get(projectile_name)
+        sound_bank.preload()
+
+    def draw_bg(self, camera_x, camera_y, game_map=None, animation_time=None):
+        """Clear the screen and draw game_map (the current map if None) at the given background clock."""
         self.screen.fill((255, 255, 255))
-        if self.map:
-            self.map.draw(self.screen, self.camera_x, self.camera_y)
+        game_map = game_map or self.map
+        if game_map:
+            game_map.draw(self.screen, camera_x, camera_y, animation_time)
 
 
 if __name__ == "__main__":
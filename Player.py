@@ -1,13 +1,27 @@
 import pygame
 import random
-import os
 from skills.Skill import Skill
-from skills.Projectile import Projectile
+from skills.Projectile import Projectile, RotationTable
+from entities.Entity import Entity
 from entities.HealthBar import HealthBar
+from maps.LineIndex import LineIndex
+from utils.AssetRegistry import asset_registry
+from utils.SimClock import sim_clock
+from utils.SoundBank import sound_bank
+from utils.RenderQueue import LAYER_PLAYERS, LAYER_PROJECTILES, LAYER_SKILLS
 
+PLAYER_ANIMATIONS = ['stand', 'walk', 'jump', 'attack1', 'attack2', 'attack3', 'attack_big_star', 'hit', 'stab']
 
-class Player(pygame.sprite.Sprite):
-    def __init__(self, screen, char_type, x, y, scale, speed, health, name="Player", mobs=None, tiles=None, slope_tiles=None, lines=None, map_bounds=None):
+
+def build_hit_frame(frame):
+    """Darkened copy of a frame shown while the player flashes after a hit."""
+    tinted = frame.copy()
+    tinted.fill((115, 115, 115, 240), special_flags=pygame.BLEND_RGBA_MULT)
+    return tinted
+
+
+class Player(pygame.sprite.Sprite, Entity):
+    def __init__(self, screen, char_type, x, y, scale, speed, health, name="Player", mobs=None, tiles=None, slope_tiles=None, lines=None, map_bounds=None, line_index=None, has_lines=None):
         pygame.sprite.Sprite.__init__(self)
         self.alive = True
         self.screen = screen
@@ -26,9 +40,14 @@ class Player(pygame.sprite.Sprite):
         self.max_exp = 100
         self.mobs = mobs or pygame.sprite.Group()
         # list of pygame.Rect for solid tiles / platforms
-        self.tiles = tiles or []
-        self.slope_tiles = slope_tiles or []
-        self.lines = lines or []
+        # The map's lists are shared as they are: with streaming they are refilled in place
+        self.tiles = tiles if tiles is not None else []
+        self.slope_tiles = slope_tiles if slope_tiles is not None else []
+        self.lines = lines if lines is not None else []
+        # Whether the map has collision lines at all (else tiles are collided with)
+        self.has_lines = bool(self.lines) if has_lines is None else has_lines
+        # Walls/floors by area; the map's shared one, or built from lines
+        self.line_index = line_index or LineIndex(self.lines)
         self.current_floor = None
         self.max_slope_step_up = 60
         self.max_slope_step_down = 25
@@ -54,29 +73,27 @@ class Player(pygame.sprite.Sprite):
         self.moving_right = False
         # Animation
         self.animation_list = []
+        # frame -> mirrored frame, built once so drawing never has to flip
+        self.flipped_frames = {}
         self.next_attack = 3
         self.frame_index = 0
         self.action = 0
-        self.update_time = pygame.time.get_ticks()
+        self.update_time = sim_clock.get_ticks()
         
         #load all images for the players
-        print(f"DEBUG: os.listdir is {os.listdir}")
-        animation_types = ['stand', 'walk', 'jump', 'attack1', 'attack2', 'attack3', 'attack_big_star', 'hit', 'stab']
+        animation_types = PLAYER_ANIMATIONS
+        # (path, scale) of every animation held in the shared asset registry
+        self.acquired_animations = []
         for animation in animation_types:
-            #reset temporary list of images
-            temp_list = []
-            #count number of files in the folder
-            #count number of files in the folder
             path = f'sprites/player/{self.char_type}/{animation}'
-            if not os.path.exists(path):
+            temp_list = asset_registry.acquire_animation(path, scale)
+            if temp_list is None:
                 print(f"Warning: Animation path not found: {path}")
                 continue
                 
-            num_of_frames = len(os.listdir(path))
-            for i in range(num_of_frames):
-                img = pygame.image.load(f'{path}/{i}.png').convert_alpha()
-                img = pygame.transform.scale(img, (int(img.get_width() * scale), int(img.get_height() * scale)))
-                temp_list.append(img)
+            flipped_list = asset_registry.acquire_animation(path, scale, flip=True)
+            self.flipped_frames.update(zip(temp_list, flipped_list))
+            self.acquired_animations.append((path, scale))
             self.animation_list.append(temp_list)
 
         self.image = self.animation_list[self.action][self.frame_index]
@@ -147,28 +164,27 @@ class Player(pygame.sprite.Sprite):
         self.rect.x += dx
         
         # Check wall collisions
-        for line in self.lines:
-            if line.get('type') == 'wall':
-                # Check if this wall is a "cliff" connected to a floor at our height
-                if self._should_ignore_wall(line, dx):
-                    continue
+        for line in self.line_index.walls_near(self.rect):
+            # Check if this wall is a "cliff" connected to a floor at our height
+            if self._should_ignore_wall(line, dx):
+                continue
 
-                p1 = line['p1']
-                p2 = line['p2']
-                # Simple AABB check first
-                line_min_x = min(p1[0], p2[0])
-                line_max_x = max(p1[0], p2[0])
-                line_min_y = min(p1[1], p2[1])
-                line_max_y = max(p1[1], p2[1])
+            p1 = line['p1']
+            p2 = line['p2']
+            # Simple AABB check first
+            line_min_x = min(p1[0], p2[0])
+            line_max_x = max(p1[0], p2[0])
+            line_min_y = min(p1[1], p2[1])
+            line_max_y = max(p1[1], p2[1])
+            
+            if self.rect.right > line_min_x and self.rect.left < line_max_x and \
+               self.rect.bottom > line_min_y and self.rect.top < line_max_y:
                 
-                if self.rect.right > line_min_x and self.rect.left < line_max_x and \
-                   self.rect.bottom > line_min_y and self.rect.top < line_max_y:
-                    
-                    # Determine side
-                    if dx > 0: # Moving right
-                        self.rect.right = line_min_x
-                    elif dx < 0: # Moving left
-                        self.rect.left = line_max_x
+                # Determine side
+                if dx > 0: # Moving right
+                    self.rect.right = line_min_x
+                elif dx < 0: # Moving left
+                    self.rect.left = line_max_x
 
         # Vertical movement
         self.rect.y += dy
@@ -184,30 +200,29 @@ class Player(pygame.sprite.Sprite):
             foot_y = self.rect.bottom
             
             # Find the highest floor line that we are currently above or crossing
-            for line in self.lines:
-                if line.get('type') == 'floor':
-                    p1 = line['p1']
-                    p2 = line['p2']
-                    
-                    # Check if x is within line segment
-                    if min(p1[0], p2[0]) <= foot_x <= max(p1[0], p2[0]):
-                        # Calculate line y at foot_x
-                        if p2[0] != p1[0]:
-                            slope = (p2[1] - p1[1]) / (p2[0] - p1[0])
-                            line_y = p1[1] + slope * (foot_x - p1[0])
-                        else:
-                            line_y = min(p1[1], p2[1]) # Vertical floor? Should not happen but handle it
-                            
-                        # Check if we crossed it or are near it
-                        # We allow snapping if we are slightly above it or just crossed it
-                        # dy is the amount we moved down this frame
-                        # previous_bottom = foot_y - dy
+            for line in self.line_index.floors_at(foot_x, foot_y - max(10, self.vel_y + 5) - 1, foot_y + 6):
+                p1 = line['p1']
+                p2 = line['p2']
+                
+                # Check if x is within line segment
+                if min(p1[0], p2[0]) <= foot_x <= max(p1[0], p2[0]):
+                    # Calculate line y at foot_x
+                    if p2[0] != p1[0]:
+                        slope = (p2[1] - p1[1]) / (p2[0] - p1[0])
+                        line_y = p1[1] + slope * (foot_x - p1[0])
+                    else:
+                        line_y = min(p1[1], p2[1]) # Vertical floor? Should not happen but handle it
                         
-                        # Tolerance for snapping
-                        if foot_y >= line_y - 5 and foot_y <= line_y + max(10, self.vel_y + 5):
-                            if ground_y is None or line_y < ground_y:
-                                ground_y = line_y
-                                self.current_floor = line
+                    # Check if we crossed it or are near it
+                    # We allow snapping if we are slightly above it or just crossed it
+                    # dy is the amount we moved down this frame
+                    # previous_bottom = foot_y - dy
+                    
+                    # Tolerance for snapping
+                    if foot_y >= line_y - 5 and foot_y <= line_y + max(10, self.vel_y + 5):
+                        if ground_y is None or line_y < ground_y:
+                            ground_y = line_y
+                            self.current_floor = line
 
         if ground_y is not None:
             self.rect.bottom = ground_y
@@ -215,7 +230,7 @@ class Player(pygame.sprite.Sprite):
             self.in_air = False
             
         # Fallback to old tile collision if no lines (optional, but good for backward compat)
-        if not self.lines:
+        if not self.has_lines:
              for tile in self.tiles:
                 if self.rect.colliderect(tile):
                     if self.vel_y > 0:  # falling
@@ -249,48 +264,17 @@ class Player(pygame.sprite.Sprite):
         - If we are moving LEFT (dx < 0), we ignore the wall if there is a floor connected to its top extending to the RIGHT.
           (This means we are walking off a cliff edge to the left)
         """
-        # 1. Find top of wall
-        p1 = wall['p1']
-        p2 = wall['p2']
-        # Y is down, so min Y is the top
-        top_y = min(p1[1], p2[1])
-        top_point = p1 if p1[1] == top_y else p2
-        
-        # 2. Find connected floor
-        connected_floor = None
-        for line in self.lines:
-            if line.get('type') == 'floor':
-                fp1 = line['p1']
-                fp2 = line['p2']
-                if fp1 == top_point or fp2 == top_point:
-                    connected_floor = line
-                    break
-        
-        if not connected_floor:
-            return False
+        # Side of the floor attached to the wall's top, worked out once at map load (LineIndex)
+        floor_side = self.line_index.cliff_side(wall)
 
-        # 3. Check direction of floor relative to wall top
-        fp1 = connected_floor['p1']
-        fp2 = connected_floor['p2']
-        
-        # Find the "other" point of the floor (not the shared top_point)
-        other_point = fp1 if fp2 == top_point else fp2
-        
-        # Check relative X position
-        # If other_point.x < top_point.x, floor is to the LEFT
-        # If other_point.x > top_point.x, floor is to the RIGHT
-        
-        is_floor_left = other_point[0] < top_point[0]
-        is_floor_right = other_point[0] > top_point[0]
-        
         # If moving RIGHT (dx > 0), we want the floor to be on the LEFT (behind us/under us)
-        if dx > 0 and is_floor_left:
+        if dx > 0 and floor_side < 0:
             return True
-            
+
         # If moving LEFT (dx < 0), we want the floor to be on the RIGHT (behind us/under us)
-        if dx < 0 and is_floor_right:
+        if dx < 0 and floor_side > 0:
             return True
-            
+
         return False
 
     def _handle_slope_collision(self):
@@ -391,7 +375,7 @@ class Player(pygame.sprite.Sprite):
                     self.action = 0 # Go back to idle
                     self.skill_big_star = False # Reset flag so we don't get stuck
                     self.frame_index = 0
-                    self.update_time = pygame.time.get_ticks()
+                    self.update_time = sim_clock.get_ticks()
                     return
             # change to last frame to lower animation cooldown
             if self.frame_index == len(self.animation_list[self.action])-1:
@@ -415,8 +399,8 @@ class Player(pygame.sprite.Sprite):
         #update image depending on current frame
         self.image = self.animation_list[self.action][self.frame_index]
         #check if enough time has passed since the last update
-        if pygame.time.get_ticks() - self.update_time > animation_cooldown:
-            self.update_time = pygame.time.get_ticks()
+        if sim_clock.get_ticks() - self.update_time > animation_cooldown:
+            self.update_time = sim_clock.get_ticks()
             self.frame_index += 1
             animation_cooldown = self.handle_attacks(len(self.animation_list[self.action]), self.frame_index)
         #if the animation has run out the reset back to the start
@@ -478,7 +462,7 @@ class Player(pygame.sprite.Sprite):
             self.action = new_action
             #update the animation settings
             self.frame_index = 0
-            self.update_time = pygame.time.get_ticks()
+            self.update_time = sim_clock.get_ticks()
 
     def hit(self, damage):
         if self.hit_cooldown <= 0:
@@ -498,14 +482,19 @@ class Player(pygame.sprite.Sprite):
             self.update_action(4)
 
 
+    def kill(self):
+        self.release_assets()
+        pygame.sprite.Sprite.kill(self)
+
+    def release_assets(self):
+        """Give back the shared animation frames held by this player."""
+        for path, scale in self.acquired_animations:
+            asset_registry.release_animation(path, scale)
+            asset_registry.release_animation(path, scale, flip=True)
+        self.acquired_animations = []
+
     def play_sound(self, dir_name, sound):
-        try:
-            soundObj = pygame.mixer.Sound(f'sprites/sounds/{dir_name}/{sound}.mp3')
-            soundObj.play()
-        except FileNotFoundError:
-            print(f"Warning: Sound file not found: sprites/sounds/{dir_name}/{sound}.mp3")
-        except Exception as e:
-            print(f"Error playing sound {sound}: {e}")
+        sound_bank.play(dir_name, sound)
         
         
     def handle_cooldown(self):
@@ -518,83 +507,86 @@ class Player(pygame.sprite.Sprite):
             else:
                 self.hit_cooldown += 1
 
-    def draw(self, camera_x=0, camera_y=0):
+    def draw(self, camera_x=0, camera_y=0, render_queue=None, alpha=1.0):
         # Calculate screen position relative to camera
-        screen_x = self.rect.x - camera_x
-        screen_y = self.rect.y - camera_y
+        x, y = self.get_render_pos(alpha)
+        screen_x = x - camera_x
+        screen_y = y - camera_y
         if self.is_hit:
-            if self.hit_cooldown%5:
-                copy_of_image = self.image.copy()
-                copy_of_image.fill((115, 115, 115, 240), special_flags=pygame.BLEND_RGBA_MULT)
-                self.screen.blit(pygame.transform.flip(copy_of_image, self.flip, False), (screen_x, screen_y))
+            if not self.hit_cooldown%5:
+                return
+            image = asset_registry.get_variant(self.get_draw_image(), "hit", build_hit_frame)
         else:
-                self.screen.blit(pygame.transform.flip(self.image, self.flip, False), (screen_x, screen_y))
+            image = self.get_draw_image()
+        if render_queue is not None:
+            render_queue.push(image, (screen_x, screen_y), LAYER_PLAYERS)
+        else:
+            self.screen.blit(image, (screen_x, screen_y))
+
+    def get_draw_image(self):
+        """Return the current frame facing the right way (mirrored frames are built at load time)."""
+        if not self.flip:
+            return self.image
+        flipped = self.flipped_frames.get(self.image)
+        if flipped is None:
+            with asset_registry.lock:
+                flipped = pygame.transform.flip(self.image, True, False)
+        return flipped
  
 
 
-    def draw_remote_projectiles(self, screen, camera_x, camera_y):
+    def draw_remote_projectiles(self, screen, camera_x, camera_y, culler=None, render_queue=None):
         # Draw projectiles
         if hasattr(self, 'remote_projectiles'):
-            if not hasattr(self, 'projectile_cache'):
-                self.projectile_cache = {}
-                
             for p_data in self.remote_projectiles:
                 p_name = p_data['image_name']
                 
-                # Load image if not cached
-                if p_name not in self.projectile_cache:
-                    try:
-                        # Projectiles are stored in sprites/projectiles/{name}/0.png
-                        img = pygame.image.load(f'sprites/projectiles/{p_name}/0.png').convert_alpha()
-                        self.projectile_cache[p_name] = img
-                    except Exception as e:
-                        print(f"Error loading projectile {p_name}: {e}")
-                        continue
-                
-                img = self.projectile_cache[p_name]
+                # Rotated and mirrored frames come from the table shared with local projectiles
+                try:
+                    table = RotationTable.get(p_name)
+                except Exception as e:
+                    print(f"Error loading projectile {p_name}: {e}")
+                    continue
                 
                 # Rotate if needed
                 if p_data.get('angle', 0) != 0:
-                    img = pygame.transform.rotate(img, p_data['angle'])
-                elif p_data.get('direction', 1) == -1:
-                    img = pygame.transform.flip(img, True, False)
+                    img, _ = table.lookup(p_data['angle'])
+                else:
+                    img, _ = table.lookup(0, p_data.get('direction', 1) == -1)
                     
+                if culler and not culler.visible_image(img, p_data['x'], p_data['y']):
+                    continue
                 screen_x = p_data['x'] - camera_x
                 screen_y = p_data['y'] - camera_y
-                screen.blit(img, (screen_x, screen_y))
+                if render_queue is not None:
+                    render_queue.push(img, (screen_x, screen_y), LAYER_PROJECTILES)
+                else:
+                    screen.blit(img, (screen_x, screen_y))
 
         # Draw skills
         if hasattr(self, 'remote_skills'):
-            if not hasattr(self, 'skill_cache'):
-                self.skill_cache = {} # format: {skill_name: [img0, img1, ...]}
-                
             for s_data in self.remote_skills:
                 s_name = s_data['skill_name']
                 frame_idx = s_data.get('frame_index', 0)
                 
-                # Load animation frames if not cached
-                if s_name not in self.skill_cache:
-                    try:
-                        self.skill_cache[s_name] = []
-                        path = f'sprites/skills/{s_name}'
-                        if os.path.exists(path):
-                            num_frames = len([f for f in os.listdir(path) if f.endswith('.png')])
-                            for i in range(num_frames):
-                                img = pygame.image.load(f'{path}/{i}.png').convert_alpha()
-                                self.skill_cache[s_name].append(img)
-                    except Exception as e:
-                        print(f"Error loading skill {s_name}: {e}")
-                        continue
+                # Frames (both facings) are loaded once and shared with local casts
+                try:
+                    skill_frames = Skill.load_frames(s_name)
+                except Exception as e:
+                    print(f"Error loading skill {s_name}: {e}")
+                    continue
                 
                 # Draw current frame
-                if s_name in self.skill_cache and self.skill_cache[s_name]:
-                    frames = self.skill_cache[s_name]
+                frames = skill_frames[s_data.get('direction', 1) == 1]
+                if frames:
                     # Wrap index if out of bounds (just in case)
                     img = frames[frame_idx % len(frames)]
-                    
-                    if s_data.get('direction', 1) == 1:
-                        img = pygame.transform.flip(img, True, False)
+                    if culler and not culler.visible_image(img, s_data['x'], s_data['y']):
+                        continue
                         
                     screen_x = s_data['x'] - camera_x
                     screen_y = s_data['y'] - camera_y
-                    screen.blit(img, (screen_x, screen_y))
+                    if render_queue is not None:
+                        render_queue.push(img, (screen_x, screen_y), LAYER_SKILLS)
+                    else:
+                        screen.blit(img, (screen_x, screen_y))
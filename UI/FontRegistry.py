@@ -0,0 +1,75 @@
+import os
+import threading
+from collections import OrderedDict
+
+import pygame
+
+# Fonts shipped with the game; looked up here before asking the system
+FONT_DIR = "sprites/fonts"
+
+
+class FontRegistry:
+    """
+    Loads every (name, size, bold) font once.
+
+    pygame.font.SysFont scans the system font list on every call, so screens and
+    the HUD should get their fonts from here. A TTF placed in sprites/fonts
+    (e.g. Arial.ttf / Arial-Bold.ttf) is preferred over the system font so text
+    looks the same on every machine.
+    """
+
+    def __init__(self, font_dir=FONT_DIR):
+        self.font_dir = font_dir
+        self.fonts = {}
+
+    def get(self, name, size, bold=False):
+        key = (name, size, bold)
+        font = self.fonts.get(key)
+        if font is None:
+            font = self.load(name, size, bold)
+            self.fonts[key] = font
+        return font
+
+    def load(self, name, size, bold):
+        if bold:
+            bold_path = os.path.join(self.font_dir, f"{name}-Bold.ttf")
+            if os.path.exists(bold_path):
+                return pygame.font.Font(bold_path, size)
+        regular_path = os.path.join(self.font_dir, f"{name}.ttf")
+        if os.path.exists(regular_path):
+            font = pygame.font.Font(regular_path, size)
+            font.set_bold(bold)
+            return font
+        return pygame.font.SysFont(name, size, bold=bold)
+
+
+class TextCache:
+    """
+    Rendered text surfaces keyed by (font, text, color, antialias), least recently
+    used evicted first. Labels that do not change are rendered once; the returned
+    surfaces are shared, so never draw onto them. Safe to use from the
+    simulation thread in pipelined mode.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+        self.lock = threading.Lock()
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, tuple(color), antialias)
+        with self.lock:
+            surface = self.surfaces.get(key)
+            if surface is not None:
+                self.surfaces.move_to_end(key)
+                return surface
+            surface = font.render(text, antialias, color)
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.max_entries:
+                self.surfaces.popitem(last=False)
+            return surface
+
+
+# Shared by every screen and UI element
+font_registry = FontRegistry()
+text_cache = TextCache()
@@ -1,15 +1,20 @@
 import pygame
+from UI.FontRegistry import font_registry, text_cache
 
 class GameUI:
     def __init__(self, screen):
         self.screen = screen
-        self.font = pygame.font.SysFont("Arial", 14, bold=True)
-        self.level_font = pygame.font.SysFont("Arial", 20, bold=True)
-        self.level_num_font = pygame.font.SysFont("Arial", 22, bold=True)
+        self.font = font_registry.get("Arial", 14, bold=True)
+        self.level_font = font_registry.get("Arial", 20, bold=True)
+        self.level_num_font = font_registry.get("Arial", 22, bold=True)
+        self.bar_height = 60 # Reduced height as bars are horizontal
+        # Retained HUD: rendered only when the values it shows change, blitted every frame
+        self.hud_surface = None
+        self.hud_state = None
 
-    def draw_bar(self, x, y, width, height, current, max_val, color_start, color_end, bg_color):
+    def draw_bar(self, surface, x, y, width, height, current, max_val, color_start, color_end, bg_color):
         # Draw background
-        pygame.draw.rect(self.screen, bg_color, (x, y, width, height), border_radius=5)
+        pygame.draw.rect(surface, bg_color, (x, y, width, height), border_radius=5)
         
         if max_val > 0:
             ratio = max(0, min(1, current / max_val))
@@ -17,33 +22,43 @@ class GameUI:
             if fill_width > 0:
                 # Draw gradient fill (simulated)
                 rect_fill = pygame.Rect(x, y, fill_width, height)
-                pygame.draw.rect(self.screen, color_end, rect_fill, border_radius=5)
+                pygame.draw.rect(surface, color_end, rect_fill, border_radius=5)
                 
                 # Glossy Highlight (Top half, lighter)
                 highlight_rect = pygame.Rect(x, y, fill_width, height // 2)
                 # Use a transparent surface for highlight to blend better
                 s = pygame.Surface((fill_width, height // 2), pygame.SRCALPHA)
                 s.fill((255, 255, 255, 50)) # White with alpha
-                self.screen.blit(s, (x, y))
+                surface.blit(s, (x, y))
                 
         # Border (Draw last to cover edges)
-        pygame.draw.rect(self.screen, (180, 180, 180), (x, y, width, height), 1, border_radius=5)
+        pygame.draw.rect(surface, (180, 180, 180), (x, y, width, height), 1, border_radius=5)
 
     def draw(self, player):
         screen_width = self.screen.get_width()
         screen_height = self.screen.get_height()
+        state = (screen_width, screen_height, player.level, player.health, player.max_health,
+                 player.mana, player.max_mana, player.exp, player.max_exp)
+        if state != self.hud_state:
+            self.render_hud(player, screen_width)
+            self.hud_state = state
+        # The surface starts one row above the bar so the 2px top border fits
+        self.screen.blit(self.hud_surface, (0, screen_height - self.bar_height - 1))
+
+    def render_hud(self, player, screen_width):
+        bar_height = self.bar_height
+        if self.hud_surface is None or self.hud_surface.get_width() != screen_width:
+            self.hud_surface = pygame.Surface((screen_width, bar_height + 1), pygame.SRCALPHA)
+        hud = self.hud_surface
+        # HUD-local coordinates: the old screen_height maps to the bottom of the surface
+        screen_height = bar_height + 1
         
-        # Draw the bar background at the bottom
-        bar_height = 60 # Reduced height as bars are horizontal
-        
-        # Draw semi-transparent background (Dark Grey / Metallic)
-        s = pygame.Surface((screen_width, bar_height))
-        s.set_alpha(230)
-        s.fill((30, 30, 30))
-        self.screen.blit(s, (0, screen_height - bar_height))
+        # Semi-transparent background (Dark Grey / Metallic)
+        hud.fill((0, 0, 0, 0))
+        hud.fill((30, 30, 30, 230), (0, screen_height - bar_height, screen_width, bar_height))
         
         # Draw top border (Gold/Metallic)
-        pygame.draw.line(self.screen, (150, 150, 150), (0, screen_height - bar_height), (screen_width, screen_height - bar_height), 2)
+        pygame.draw.line(hud, (150, 150, 150), (0, screen_height - bar_height), (screen_width, screen_height - bar_height), 2)
         
         # Layout Constants
         padding = 10
@@ -59,18 +74,18 @@ class GameUI:
         level_y = screen_height - 45
         
         # "LV." text
-        lv_label = self.level_font.render("LV.", True, (255, 255, 255))
-        self.screen.blit(lv_label, (current_x, level_y + 2))
+        lv_label = text_cache.render(self.level_font, "LV.", (255, 255, 255))
+        hud.blit(lv_label, (current_x, level_y + 2))
         current_x += lv_label.get_width() + 5
         
         # Level Number Box (Orange)
         box_width = 40
         box_height = 30
-        pygame.draw.rect(self.screen, (200, 100, 0), (current_x, level_y - 2, box_width, box_height), border_radius=5)
-        pygame.draw.rect(self.screen, (255, 150, 0), (current_x, level_y - 2, box_width, box_height // 2), border_radius=5) # Highlight
+        pygame.draw.rect(hud, (200, 100, 0), (current_x, level_y - 2, box_width, box_height), border_radius=5)
+        pygame.draw.rect(hud, (255, 150, 0), (current_x, level_y - 2, box_width, box_height // 2), border_radius=5) # Highlight
         
-        level_text = self.level_num_font.render(str(player.level), True, (255, 255, 255))
-        self.screen.blit(level_text, (current_x + box_width//2 - level_text.get_width()//2, level_y - 2 + box_height//2 - level_text.get_height()//2))
+        level_text = text_cache.render(self.level_num_font, str(player.level), (255, 255, 255))
+        hud.blit(level_text, (current_x + box_width//2 - level_text.get_width()//2, level_y - 2 + box_height//2 - level_text.get_height()//2))
         current_x += box_width + 15
         
         # --- Bars Section ---
@@ -85,28 +100,28 @@ class GameUI:
         bar_width = (remaining_width - 40) // 3 # 3 bars with gaps
         
         # HP Bar
-        self.draw_bar(current_x, bar_y, bar_width, bar_height_inner, player.health, player.max_health, (255, 100, 100), (200, 0, 0), (50, 0, 0))
+        self.draw_bar(hud, current_x, bar_y, bar_width, bar_height_inner, player.health, player.max_health, (255, 100, 100), (200, 0, 0), (50, 0, 0))
         # Text above
-        hp_label = self.font.render(f"HP [{player.health}/{player.max_health}]", True, (255, 255, 255))
-        self.screen.blit(hp_label, (current_x, bar_y - 15))
+        hp_label = text_cache.render(self.font, f"HP [{player.health}/{player.max_health}]", (255, 255, 255))
+        hud.blit(hp_label, (current_x, bar_y - 15))
         current_x += bar_width + 20
         
         # MP Bar
-        self.draw_bar(current_x, bar_y, bar_width, bar_height_inner, player.mana, player.max_mana, (100, 100, 255), (0, 0, 200), (0, 0, 50))
+        self.draw_bar(hud, current_x, bar_y, bar_width, bar_height_inner, player.mana, player.max_mana, (100, 100, 255), (0, 0, 200), (0, 0, 50))
         # Text above
-        mp_label = self.font.render(f"MP [{player.mana}/{player.max_mana}]", True, (255, 255, 255))
-        self.screen.blit(mp_label, (current_x, bar_y - 15))
+        mp_label = text_cache.render(self.font, f"MP [{player.mana}/{player.max_mana}]", (255, 255, 255))
+        hud.blit(mp_label, (current_x, bar_y - 15))
         current_x += bar_width + 20
         
         # EXP Bar
         exp_ratio = player.exp / player.max_exp if player.max_exp > 0 else 0
         exp_percent = int(exp_ratio * 10000) / 100 # 2 decimal places
-        self.draw_bar(current_x, bar_y, bar_width, bar_height_inner, player.exp, player.max_exp, (255, 255, 100), (200, 200, 0), (50, 50, 0))
+        self.draw_bar(hud, current_x, bar_y, bar_width, bar_height_inner, player.exp, player.max_exp, (255, 255, 100), (200, 200, 0), (50, 50, 0))
         # Text above
-        exp_label = self.font.render(f"EXP {player.exp}[{exp_percent}%]", True, (255, 255, 255))
-        self.screen.blit(exp_label, (current_x, bar_y - 15))
+        exp_label = text_cache.render(self.font, f"EXP {player.exp}[{exp_percent}%]", (255, 255, 255))
+        hud.blit(exp_label, (current_x, bar_y - 15))
         
         # Draw segments for EXP
         for i in range(1, 10):
             seg_x = current_x + (bar_width * (i / 10))
-            pygame.draw.line(self.screen, (50, 50, 50), (seg_x, bar_y), (seg_x, bar_y + bar_height_inner), 1)
+            pygame.draw.line(hud, (50, 50, 50), (seg_x, bar_y), (seg_x, bar_y + bar_height_inner), 1)
@@ -1,13 +1,20 @@
 import pygame
+from UI.FontRegistry import text_cache
 
 class UIElement:
     def __init__(self, x, y, width, height):
         self.rect = pygame.Rect(x, y, width, height)
         self.active = True
+        # Set whenever the element's appearance changes so menus can redraw only it
+        self.dirty = True
 
     def update(self, events):
         pass
 
+    def get_dirty_rect(self):
+        """Area of the screen this element paints on."""
+        return self.rect
+
     def draw(self, screen):
         pass
 
@@ -27,13 +34,22 @@ class Button(UIElement):
         pass
 
     def update_with_mouse(self, virtual_mouse_pos, events):
-        self.is_hovered = self.rect.collidepoint(virtual_mouse_pos)
+        is_hovered = self.rect.collidepoint(virtual_mouse_pos)
+        if is_hovered != self.is_hovered:
+            self.is_hovered = is_hovered
+            self.dirty = True
         
         for event in events:
             if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 if self.is_hovered and self.action:
                     self.action()
 
+    def get_dirty_rect(self):
+        # Include the drop shadow drawn below the button
+        shadow_rect = self.rect.copy()
+        shadow_rect.y += 4
+        return self.rect.union(shadow_rect)
+
     def draw(self, screen):
         color = self.hover_color if self.is_hovered else self.bg_color
         # Draw shadow
@@ -46,8 +62,8 @@ class Button(UIElement):
         pygame.draw.rect(screen, self.border_color, self.rect, width=3, border_radius=10) # Border
         
         # Draw text with shadow
-        text_surf = self.font.render(self.text, True, self.text_color)
-        text_shadow = self.font.render(self.text, True, (0, 0, 0))
+        text_surf = text_cache.render(self.font, self.text, self.text_color)
+        text_shadow = text_cache.render(self.font, self.text, (0, 0, 0))
         
         text_rect = text_surf.get_rect(center=self.rect.center)
         screen.blit(text_shadow, (text_rect.x + 2, text_rect.y + 2))
@@ -68,18 +84,21 @@ class TextInput(UIElement):
     def update_with_mouse(self, virtual_mouse_pos, events):
         for event in events:
             if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                if self.rect.collidepoint(virtual_mouse_pos):
-                    self.is_focused = True
-                else:
-                    self.is_focused = False
+                is_focused = self.rect.collidepoint(virtual_mouse_pos)
+                if is_focused != self.is_focused:
+                    self.is_focused = is_focused
+                    self.dirty = True
             
             if event.type == pygame.KEYDOWN and self.is_focused:
                 if event.key == pygame.K_BACKSPACE:
-                    self.text = self.text[:-1]
+                    if self.text:
+                        self.text = self.text[:-1]
+                        self.dirty = True
                 else:
                     # Filter for printable characters
                     if len(event.unicode) > 0 and event.unicode.isprintable():
                         self.text += event.unicode
+                        self.dirty = True
 
     def draw(self, screen):
         pygame.draw.rect(screen, self.bg_color, self.rect, border_radius=5)
@@ -89,20 +108,41 @@ class TextInput(UIElement):
         display_text = self.text if self.text else self.placeholder
         color = self.text_color if self.text else (150, 150, 150)
         
-        text_surf = self.font.render(display_text, True, color)
-        # Clip text if it's too long
-        screen.set_clip(self.rect.inflate(-10, -10))
+        text_surf = text_cache.render(self.font, display_text, color)
+        # Clip text if it's too long (keeping any clip the caller already set)
+        previous_clip = screen.get_clip()
+        screen.set_clip(self.rect.inflate(-10, -10).clip(previous_clip))
         screen.blit(text_surf, (self.rect.x + 5, self.rect.centery - text_surf.get_height() // 2))
-        screen.set_clip(None)
+        screen.set_clip(previous_clip)
 
 class Label(UIElement):
     def __init__(self, x, y, text, font, color=(0, 0, 0)):
         # Width and height are dynamic based on text
-        super().__init__(x, y, 0, 0)
+        super().__init__(x, y, *font.size(text))
         self.text = text
         self.font = font
         self.color = color
 
     def draw(self, screen):
-        text_surf = self.font.render(self.text, True, self.color)
+        text_surf = text_cache.render(self.font, self.text, self.color)
         screen.blit(text_surf, (self.rect.x, self.rect.y))
+
+class ProgressBar(UIElement):
+    def __init__(self, x, y, width, height, fill_color=(255, 165, 0), bg_color=(255, 255, 255), border_color=(200, 100, 0)):
+        super().__init__(x, y, width, height)
+        self.fill_color = fill_color
+        self.bg_color = bg_color
+        self.border_color = border_color
+        self.fill_width = 0
+
+    def set_progress(self, fraction):
+        fill_width = int((self.rect.width - 4) * max(0.0, min(1.0, fraction)))
+        if fill_width != self.fill_width:
+            self.fill_width = fill_width
+            self.dirty = True
+
+    def draw(self, screen):
+        pygame.draw.rect(screen, self.bg_color, self.rect, border_radius=5)
+        if self.fill_width > 0:
+            pygame.draw.rect(screen, self.fill_color, (self.rect.x + 2, self.rect.y + 2, self.fill_width, self.rect.height - 4), border_radius=4)
+        pygame.draw.rect(screen, self.border_color, self.rect, width=2, border_radius=5)
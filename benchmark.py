@@ -0,0 +1,200 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import pygame
+
+from Game import Game, GameState
+from mobs.Mob import Mob
+from skills.Projectile import Projectile
+from utils.FrameProfiler import FrameProfiler, SECTIONS, frame_profiler
+
+
+"""
+Headless benchmark.
+
+Usage (from project root):
+    python benchmark.py --map 1 --frames 1200 --output bench.json
+    python benchmark.py --extra-mobs 50 --extra-projectiles 30
+
+Starts the game without a window (SDL dummy drivers), loads a map and runs
+frames as fast as possible. Every frame simulates exactly one fixed step, so
+runs are deterministic and comparable between machines and commits. Key
+presses come from a scripted timeline and go through the normal event path
+(Game.handle_controls). Prints a JSON report with frame-time percentiles and
+the per-subsystem breakdown of the frame profiler.
+"""
+
+
+# (frame, "down" | "up", pygame key constant); repeats every TIMELINE_PERIOD frames
+DEFAULT_TIMELINE = [
+    (10, "down", "K_d"),
+    (40, "down", "K_LCTRL"),
+    (41, "up", "K_LCTRL"),
+    (80, "down", "K_SPACE"),
+    (81, "up", "K_SPACE"),
+    (95, "down", "K_SPACE"),
+    (96, "up", "K_SPACE"),
+    (150, "up", "K_d"),
+    (170, "down", "K_q"),
+    (171, "up", "K_q"),
+    (230, "down", "K_a"),
+    (260, "down", "K_LCTRL"),
+    (261, "up", "K_LCTRL"),
+    (330, "down", "K_SPACE"),
+    (331, "up", "K_SPACE"),
+    (400, "up", "K_a"),
+    (420, "down", "K_LCTRL"),
+    (421, "up", "K_LCTRL"),
+]
+TIMELINE_PERIOD = 480
+
+
+def load_timeline(path):
+    """Read a timeline JSON file: {"period": frames, "events": [[frame, "down"|"up", "K_..."], ...]}."""
+    with open(path) as f:
+        data = json.load(f)
+    return [tuple(event) for event in data["events"]], data.get("period", TIMELINE_PERIOD)
+
+
+def build_event_table(timeline):
+    """frame -> list of pygame events."""
+    table = {}
+    for frame, kind, key_name in timeline:
+        event_type = pygame.KEYDOWN if kind == "down" else pygame.KEYUP
+        table.setdefault(frame, []).append(pygame.event.Event(event_type, key=getattr(pygame, key_name), mod=0, unicode="", scancode=0))
+    return table
+
+
+def spawn_extra_mobs(game, count):
+    """Copies of the map's own mob definitions, spread over the map width."""
+    game_map = game.map
+    if not game_map.mobs_list:
+        return
+    map_min_x, map_max_x, _, _ = game_map.get_map_bounds()
+    for i in range(count):
+        definition = dict(game_map.mobs_list[i % len(game_map.mobs_list)])
+        definition["x"] = random.randint(int(map_min_x) + 50, int(map_max_x) - 50)
+        game.mobs.add(Mob(game_map.screen, game_map.players, game_map.tiles, game_map.slope_tiles,
+                          lines=game_map.lines, map_bounds=game_map.get_map_bounds(), mob_id=f"bench_mob{i}",
+                          line_index=game_map.line_index, has_lines=game_map.has_lines, **definition))
+
+
+def top_up_projectiles(player, extra, count):
+    """Keep `count` extra spinning stars in flight around the player. They never hit anything."""
+    extra[:] = [projectile for projectile in extra if projectile.alive()]
+    while len(extra) < count:
+        direction = random.choice((-1, 1))
+        projectile = Projectile(player.rect.centerx, player.rect.centery + random.randint(-60, 60), direction, 15, True, "throwing_star", 0, 0)
+        player.projectiles_group.add(projectile)
+        extra.append(projectile)
+
+
+def summarize(values):
+    return {
+        "mean": round(sum(values) / len(values), 3) if values else 0.0,
+        "p50": round(FrameProfiler.percentile(values, 0.5), 3),
+        "p90": round(FrameProfiler.percentile(values, 0.9), 3),
+        "p99": round(FrameProfiler.percentile(values, 0.99), 3),
+        "max": round(max(values), 3) if values else 0.0,
+    }
+
+
+def run(args):
+    random.seed(args.seed)
+    game = Game(map_id=args.map, headless=True, start_loop=False)
+    game.pipelined = args.pipelined
+    # Fixed quality level, so results don't depend on how fast the machine is
+    game.quality.enabled = False
+    game.quality.set_level(args.quality_level)
+    game.state = GameState.GAME
+    spawn_extra_mobs(game, args.extra_mobs)
+    player = next(iter(game.players))
+
+    if args.timeline:
+        timeline, period = load_timeline(args.timeline)
+    else:
+        timeline, period = DEFAULT_TIMELINE, TIMELINE_PERIOD
+    events_by_frame = build_event_table(timeline)
+    extra_projectiles = []
+
+    frame_times = []
+    drawn = culled = 0
+    start = None
+    for frame in range(args.warmup + args.frames):
+        if frame == args.warmup:
+            # Only measured frames end up in the profiler and the report
+            frame_profiler.enable(history=args.frames, show_overlay=False)
+            start = time.perf_counter()
+        if args.extra_projectiles:
+            top_up_projectiles(player, extra_projectiles, args.extra_projectiles)
+        pygame.event.clear()  # nothing real to handle without a window
+        events = events_by_frame.get(frame % period, [])
+        frame_start = time.perf_counter()
+        game.run_frame(game.step_ms, events)
+        if frame >= args.warmup:
+            frame_times.append((time.perf_counter() - frame_start) * 1000)
+            drawn += game.culler.drawn
+            culled += game.culler.culled
+    total_seconds = time.perf_counter() - start
+    # Closes the profiler's last frame
+    frame_profiler.begin_frame()
+
+    if game.sim_thread is not None:
+        game.sim_thread.stop()
+    pygame.quit()
+
+    return {
+        "map": args.map,
+        "frames": args.frames,
+        "warmup": args.warmup,
+        "seed": args.seed,
+        "pipelined": args.pipelined,
+        "quality_level": game.quality.level,
+        "extra_mobs": args.extra_mobs,
+        "extra_projectiles": args.extra_projectiles,
+        "total_seconds": round(total_seconds, 3),
+        "fps": round(args.frames / total_seconds, 1),
+        "frame_ms": summarize(frame_times),
+        "sections_ms": {
+            name: summarize([sections.get(name, 0.0) for _, sections in frame_profiler.frames])
+            for name in SECTIONS
+        },
+        "entities": {
+            "mobs": len(game.mobs),
+            "avg_drawn": round(drawn / args.frames, 1),
+            "avg_culled": round(culled / args.frames, 1),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the game headless and report frame timings as JSON.")
+    parser.add_argument("--map", type=int, default=1, help="map id to load")
+    parser.add_argument("--frames", type=int, default=1200, help="measured frames")
+    parser.add_argument("--warmup", type=int, default=60, help="frames run before measuring")
+    parser.add_argument("--timeline", help="input timeline JSON (default: built-in walk/attack/jump loop)")
+    parser.add_argument("--extra-mobs", type=int, default=0, help="additional mobs spawned on the map")
+    parser.add_argument("--extra-projectiles", type=int, default=0, help="additional projectiles kept in flight")
+    parser.add_argument("--pipelined", action="store_true", help="simulate on a second thread")
+    parser.add_argument("--quality-level", type=int, default=0, help="background quality level (0 = full, see utils/QualityController.py)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for mob AI and synthetic load")
+    parser.add_argument("--output", help="also write the report to this file")
+    args = parser.parse_args()
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    os.chdir(base_dir)
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
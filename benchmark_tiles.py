@@ -0,0 +1,67 @@
+import argparse
+import os
+import sys
+import time
+
+import pygame
+
+from maps.Map import Map, numpy
+
+
+"""
+Tile analysis benchmark.
+
+Usage (from project root):
+    python benchmark_tiles.py --repeat 5
+
+Runs the collision/alignment analysis of every tile in maps/tile_manifest.json
+with pygame masks and with NumPy (what a cold start does before the results
+are cached in cache/), checks that both give the same result for every tile
+and prints the time each took.
+"""
+
+
+def time_analysis(images, use_numpy, repeat):
+    """Best total time over `repeat` runs, and the results of the last run."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = {tile_id: Map.analyze_tile_image(img, use_numpy) for tile_id, img in images.items()}
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare mask and NumPy tile analysis on the shipped tile set.")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per variant (the best one is reported)")
+    args = parser.parse_args()
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    os.chdir(base_dir)
+    if numpy is None:
+        print("NumPy is not installed, nothing to compare.")
+        return 1
+
+    images = {}
+    for tile_id, sprite_path in Map.tile_sprite_paths(Map.load_tile_manifest()).items():
+        img = pygame.image.load(sprite_path)
+        if img.get_width() and img.get_height():
+            images[tile_id] = img
+
+    mask_seconds, mask_results = time_analysis(images, False, args.repeat)
+    numpy_seconds, numpy_results = time_analysis(images, True, args.repeat)
+
+    mismatches = [tile_id for tile_id in images if mask_results[tile_id] != numpy_results[tile_id]]
+    print(f"tiles:  {len(images)}")
+    print(f"masks:  {mask_seconds * 1000:8.2f} ms")
+    print(f"numpy:  {numpy_seconds * 1000:8.2f} ms  ({mask_seconds / numpy_seconds:.1f}x)")
+    if mismatches:
+        print(f"MISMATCH for tile ids {mismatches}")
+        return 1
+    print("results identical for every tile")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+import json
+import os
+import sys
+
+import pygame
+
+from utils.SpriteAtlas import ATLAS_DIR, ATLAS_VERSION
+
+
+"""
+Sprite atlas builder.
+
+Usage (from project root):
+    python build_atlases.py
+
+Packs every character, mob, skill and projectile folder under sprites/ into a
+single sheet (sprites/atlases/<category>_<name>.png) with a JSON frame index
+next to it. At runtime the asset registry hands out subsurfaces of these
+sheets instead of opening and decoding one PNG per frame. Atlases whose source
+PNGs changed, or whose folders gained or lost a PNG, are ignored, so re-run
+this after editing sprites.
+"""
+
+
+ATLAS_CATEGORIES = ["player", "mobs", "skills", "projectiles"]
+MAX_SHEET_WIDTH = 2048
+PADDING = 1
+
+
+def collect_frames(group_dir: str):
+    """Return every PNG below group_dir as sorted 'sprites/...' paths."""
+    frames = []
+    for root, dirs, files in os.walk(group_dir):
+        dirs.sort()
+        for file_name in sorted(files):
+            if file_name.endswith(".png"):
+                frames.append(os.path.join(root, file_name).replace(os.sep, "/"))
+    return frames
+
+
+def pack(sizes, max_width: int):
+    """
+    Simple shelf packer: place rects tallest first, left to right, starting a
+    new shelf when the row is full. Returns (positions, sheet_width, sheet_height).
+    """
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0]))
+    widest = max(w for w, h in sizes)
+    sheet_width = max(widest + PADDING, min(max_width, sum(w + PADDING for w, h in sizes)))
+    positions = [None] * len(sizes)
+    x = y = shelf_height = 0
+    for i in order:
+        w, h = sizes[i]
+        if x + w > sheet_width:
+            x = 0
+            y += shelf_height + PADDING
+            shelf_height = 0
+        positions[i] = (x, y)
+        x += w + PADDING
+        shelf_height = max(shelf_height, h)
+    return positions, sheet_width, y + shelf_height
+
+
+def build_atlas(category: str, name: str, group_dir: str):
+    frame_paths = collect_frames(group_dir)
+    if not frame_paths:
+        return None
+    images = [pygame.image.load(path).convert_alpha() for path in frame_paths]
+    positions, sheet_width, sheet_height = pack([img.get_size() for img in images], MAX_SHEET_WIDTH)
+
+    sheet = pygame.Surface((sheet_width, sheet_height), pygame.SRCALPHA)
+    frames = {}
+    sources = {}
+    frame_counts = {}
+    for path, img, (x, y) in zip(frame_paths, images, positions):
+        sheet.blit(img, (x, y))
+        frames[path] = [x, y, img.get_width(), img.get_height()]
+        stat = os.stat(path)
+        sources[path] = [stat.st_mtime_ns, stat.st_size]
+        directory = path.rsplit("/", 1)[0]
+        frame_counts[directory] = frame_counts.get(directory, 0) + 1
+
+    image_name = f"{category}_{name}.png"
+    pygame.image.save(sheet, os.path.join(ATLAS_DIR, image_name))
+    with open(os.path.join(ATLAS_DIR, f"{category}_{name}.json"), "w") as f:
+        json.dump(
+            {
+                "version": ATLAS_VERSION,
+                "image": image_name,
+                "frames": frames,
+                "frame_counts": frame_counts,
+                "sources": sources,
+            },
+            f,
+            indent=1,
+        )
+    return len(frame_paths), sheet.get_size()
+
+
+def main():
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    os.chdir(base_dir)
+    pygame.init()
+    # convert_alpha() needs a display mode, even a tiny hidden one
+    pygame.display.set_mode((1, 1), pygame.HIDDEN)
+    os.makedirs(ATLAS_DIR, exist_ok=True)
+
+    for category in ATLAS_CATEGORIES:
+        category_dir = f"sprites/{category}"
+        if not os.path.isdir(category_dir):
+            continue
+        for name in sorted(os.listdir(category_dir)):
+            group_dir = f"{category_dir}/{name}"
+            if not os.path.isdir(group_dir):
+                continue
+            result = build_atlas(category, name, group_dir)
+            if result:
+                count, (w, h) = result
+                print(f"[build_atlases] {category}/{name}: {count} frames -> {w}x{h}")
+
+    pygame.quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
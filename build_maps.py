@@ -0,0 +1,90 @@
+import os
+import re
+import struct
+import sys
+
+import pygame
+
+from maps.Map import Map
+from maps.MapFile import MapData, map_file_path, map_source_paths, write_map_file
+from utils.DerivedCache import derived_cache
+
+
+"""
+Map compiler.
+
+Usage (from project root):
+    python build_maps.py [map_id ...]
+
+Compiles the editable map files (maps/map{id}_tiles.csv, _lines.json,
+_mobs.csv, _backgrounds.json, _spawn.json) into one binary maps/map{id}.bin
+that the game memory-maps instead of parsing text. Without ids every map
+found in maps/ is compiled. A compiled map whose sources (or the tile sprites
+its bounds were computed from) changed is ignored, so re-run this after
+editing a map.
+"""
+
+
+def find_map_ids():
+    ids = set()
+    for file_name in os.listdir("maps"):
+        match = re.fullmatch(r"map(\d+)_(tiles|lines|mobs|backgrounds|spawn)\.(csv|json)", file_name)
+        if match:
+            ids.add(int(match.group(1)))
+    return sorted(ids)
+
+
+def build_map(map_id):
+    tile_grid = Map.read_tile_grid(map_id)
+    tile_paths = Map.tile_sprite_paths(Map.load_tile_manifest())
+    used_ids = {tile_id for row in tile_grid for tile_id in row if tile_id in tile_paths}
+    tile_images = {tile_id: Map.decode_tile_image(tile_paths[tile_id]) for tile_id in used_ids}
+    tile_images = {tile_id: img_data for tile_id, img_data in tile_images.items() if img_data is not None}
+    backgrounds = Map.read_backgrounds(map_id) or ([], None, None)
+
+    map_data = MapData(
+        tile_grid=tile_grid,
+        bounds=Map.compute_tile_bounds(tile_grid, tile_images) if tile_grid else None,
+        lines=Map.read_lines(map_id),
+        mobs=Map.load_mobs_from_csv(map_id),
+        background_layers=backgrounds[0],
+        global_bg_start_y=backgrounds[1],
+        global_bg_end_y=backgrounds[2],
+        spawn=Map.read_spawn(map_id),
+    )
+    # The bounds depend on the tile sprites too
+    sources = map_source_paths(map_id) + ["maps/tile_manifest.json"] + sorted(
+        os.path.relpath(tile_paths[tile_id], os.getcwd()).replace(os.sep, "/") for tile_id in used_ids
+    )
+    path = map_file_path(map_id)
+    write_map_file(path, map_data, sources)
+    return path, map_data
+
+
+def main():
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    os.chdir(base_dir)
+    pygame.init()
+
+    map_ids = [int(arg) for arg in sys.argv[1:]] or find_map_ids()
+    failed = False
+    for map_id in map_ids:
+        try:
+            path, map_data = build_map(map_id)
+        except (ValueError, struct.error) as e:
+            # Out-of-range fields only fail in struct.pack; report them and go on with the other maps
+            print(f"[build_maps] map {map_id}: {e}")
+            failed = True
+            continue
+        print(f"[build_maps] map {map_id}: {len(map_data.tile_grid)} rows, {len(map_data.lines)} lines, "
+              f"{len(map_data.mobs)} mobs, {len(map_data.background_layers)} layers -> {os.path.relpath(path)} "
+              f"({os.path.getsize(path)} bytes)")
+
+    # Keep the tile metadata computed above for the next compile and the game
+    derived_cache.flush()
+    pygame.quit()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
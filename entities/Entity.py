@@ -0,0 +1,28 @@
+class Entity:
+    """
+    Mixin for sprites moved by the fixed-step simulation.
+
+    The game loop calls store_position() before every simulation step and draws
+    the sprite at get_render_pos(alpha), between the previous and the current
+    step, so motion stays smooth when the render rate differs from the step rate.
+    """
+
+    # Moves longer than this within one step (spawns, portals, network corrections) are not smoothed
+    SNAP_DISTANCE = 100
+
+    prev_center = None
+
+    def store_position(self):
+        self.prev_center = self.rect.center
+
+    def get_render_pos(self, alpha=1.0):
+        """Top-left corner to draw the sprite at, alpha being the fraction of the next step already elapsed."""
+        if self.prev_center is None or alpha >= 1.0:
+            return self.rect.topleft
+        prev_x, prev_y = self.prev_center
+        x, y = self.rect.center
+        if abs(x - prev_x) > self.SNAP_DISTANCE or abs(y - prev_y) > self.SNAP_DISTANCE:
+            return self.rect.topleft
+        center_x = round(prev_x + (x - prev_x) * alpha)
+        center_y = round(prev_y + (y - prev_y) * alpha)
+        return (self.rect.x + center_x - x, self.rect.y + center_y - y)
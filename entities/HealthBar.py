@@ -1,4 +1,5 @@
 import pygame
+from utils.RenderQueue import LAYER_HEALTH_BARS
 
 class HealthBar(pygame.sprite.Sprite):
     def __init__(self, object, screen, color):
@@ -14,16 +15,17 @@ class HealthBar(pygame.sprite.Sprite):
             self.bar_color = (204, 0, 0)
         elif color == "green":
             self.bar_color = (0, 204, 0)
-        
 
-    def update(self, camera_x=0, camera_y=0):
+
+    def update(self, camera_x=0, camera_y=0, alpha=1.0):
+        """Recompute position and fill. Drawing is left to HealthBarRenderer."""
+        x, y = self.object.get_render_pos(alpha)
         sum = (self.object.rect.center[0] - self.object.rect.x)
-        world_x = self.object.rect.x - sum/2
-        world_y = self.object.rect.top - 20
+        world_x = x - sum/2
+        world_y = y - 20
         # Convert to screen coordinates
         self.bar_pos = (world_x - camera_x, world_y - camera_y)
         self.progress = self.object.health / self.object.max_health
-        self.draw()
 
 
     def draw(self):
@@ -32,4 +34,47 @@ class HealthBar(pygame.sprite.Sprite):
         innerPos  = (self.bar_pos[0]+3, self.bar_pos[1]+3)
         innerSize = ((self.bar_size[0]-6) * self.progress, self.bar_size[1]-6)
         pygame.draw.rect(self.screen, self.bar_color, (*innerPos, *innerSize))
-        
+
+
+class HealthBarRenderer:
+    """
+    Draws every health bar of a frame in one pass.
+
+    Bars are pre-rendered once per (color, size, filled pixels) and reused, so a
+    frame costs one blits() call no matter how many mobs are alive. Bars
+    outside the screen are skipped. Given a render queue, the bars are pushed
+    onto its health-bar layer instead.
+    """
+
+    def __init__(self, screen):
+        self.screen = screen
+        self.sprites = {}  # (bar_color, bar_size, fill_width) -> Surface
+
+    def get_sprite(self, bar):
+        inner_width = bar.bar_size[0] - 6
+        # Quantized to whole pixels, which is all pygame.draw.rect could show anyway
+        fill_width = int(inner_width * max(0, min(1, bar.progress)))
+        key = (bar.bar_color, bar.bar_size, fill_width)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = pygame.Surface(bar.bar_size).convert()
+            sprite.fill(bar.background_color)
+            if fill_width > 0:
+                sprite.fill(bar.bar_color, (3, 3, fill_width, bar.bar_size[1] - 6))
+            self.sprites[key] = sprite
+        return sprite
+
+    def draw(self, bars, camera_x=0, camera_y=0, render_queue=None, alpha=1.0):
+        screen_rect = self.screen.get_rect()
+        blit_list = []
+        for bar in bars:
+            bar.update(camera_x, camera_y, alpha)
+            pos = (int(bar.bar_pos[0]), int(bar.bar_pos[1]))
+            if not screen_rect.colliderect((pos, bar.bar_size)):
+                continue
+            blit_list.append((self.get_sprite(bar), pos))
+        if render_queue is not None:
+            for sprite, pos in blit_list:
+                render_queue.push(sprite, pos, LAYER_HEALTH_BARS)
+        elif blit_list:
+            self.screen.blits(blit_list, doreturn=False)
@@ -5,6 +5,9 @@ import sys
 import csv
 import pygame
 
+from maps.Map import Map, TILE_METADATA_KIND
+from utils.DerivedCache import derived_cache
+
 
 """
 Scrollable tile + mob editor.
@@ -112,29 +115,11 @@ def load_tile_images(base_dir: str, tile_entries):
         if ow == 0 or oh == 0:
             continue
 
-        # Compute dynamic vertical alignment based on opacity distribution
-        mask = pygame.mask.from_surface(img_orig)
-        half_h = oh // 2
-        top_surf = pygame.Surface((ow, half_h), pygame.SRCALPHA)
-        top_surf.blit(img_orig, (0, 0), (0, 0, ow, half_h))
-        top_mask = pygame.mask.from_surface(top_surf)
-        top_count = top_mask.count()
-
-        bottom_h = oh - half_h
-        bottom_surf = pygame.Surface((ow, bottom_h), pygame.SRCALPHA)
-        bottom_surf.blit(img_orig, (0, 0), (0, half_h, ow, bottom_h))
-        bottom_mask = pygame.mask.from_surface(bottom_surf)
-        bottom_count = bottom_mask.count()
-
-        if top_count > bottom_count:
-            grid_oy = 0  # Top-align (e.g., for top-heavy grass/upper cliffs)
-        elif bottom_count > top_count:
-            grid_oy = TILE_HEIGHT - oh  # Bottom-align (e.g., for ground/dirt bases)
-        else:
-            grid_oy = (TILE_HEIGHT - oh) // 2  # Center-align for balanced
-
-        # Horizontal always center
-        grid_ox = (TILE_WIDTH - ow) // 2
+        # Same dynamic alignment as the game (top-heavy -> top, bottom-heavy -> bottom,
+        # balanced -> center), read from the on-disk cache after the first run
+        metadata = derived_cache.get_json(TILE_METADATA_KIND, full_path, Map.analyze_tile_image, img_orig)
+        grid_oy = metadata['grid_oy']
+        grid_ox = metadata['grid_ox']
 
         # For PALETTE PREVIEW: Proportional CONTAIN scale (min ratio), center
         scale_prev = min(PREVIEW_WIDTH / ow, PREVIEW_HEIGHT / oh)
@@ -285,11 +270,11 @@ def load_background_images(base_dir: str, bg_entries):
             print(f"[map_editor] Missing background sprite for id={bg_id}: {full_path}")
             continue
         try:
-            img = pygame.image.load(full_path).convert_alpha()
-            # Scale background by 1.2x as requested
-            new_width = int(img.get_width() * 1.2)
-            new_height = int(img.get_height() * 1.2)
-            img = pygame.transform.scale(img, (new_width, new_height))
+            # Scaled by 1.2x like in game, cached on disk
+            img = Map.load_background_image(full_path)
+            if img is None:
+                continue
+            img = img.convert_alpha()
             
             # Create preview for palette (keep it small)
             ow, oh = img.get_size() # Get size of the now scaled image
@@ -470,6 +455,7 @@ def main():
     tile_images = load_tile_images(base_dir, tile_entries)
     mob_images = load_mob_images(base_dir, mob_types, TILE_HEIGHT)
     bg_images = load_background_images(base_dir, bg_entries)
+    derived_cache.flush()
 
     # Load grid - it will preserve actual dimensions from CSV
     grid = load_or_create_grid(tiles_csv_path, GRID_COLS, GRID_ROWS)
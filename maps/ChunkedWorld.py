@@ -0,0 +1,128 @@
+# Chunk size in tiles. With a radius of at least 1 the chunks around the camera
+# cover the whole 1366x768 view.
+CHUNK_COLS = 8
+CHUNK_ROWS = 8
+
+
+class ChunkedWorld:
+    """
+    Streams a map's collision data (tile rects, slopes, lines) in chunks around focus points.
+
+    The tile grid itself stays loaded (a few bytes per cell); what's built per
+    chunk and dropped again is the derived data entities iterate every step.
+    The resident tiles/slope_tiles/lines lists are shared with every Player and
+    Mob and refilled in place, so entities keep the same list objects.
+    update() is given the focus points (players, camera) each simulation step:
+
+    - chunks within `radius` of a focus are active: mobs there are simulated
+    - one more ring is loaded, so anything in an active chunk collides with
+      tiles overhanging from its neighbours
+    - `prefetch` chunks beyond that are loaded ahead of a focus that moves
+    - loaded chunks more than one ring outside all of that are unloaded, so
+      walking along a chunk border doesn't load and unload the same chunks
+    """
+
+    def __init__(self, game_map, tile_size, line_index, radius=1, prefetch=1, chunk_cols=CHUNK_COLS, chunk_rows=CHUNK_ROWS):
+        """line_index: LineIndex over game_map.lines built with indexed=False, kept to the loaded chunks' lines."""
+        self.map = game_map
+        self.line_index = line_index
+        self.radius = max(1, radius)
+        self.prefetch = max(0, prefetch)
+        self.chunk_width = chunk_cols * tile_size[0]
+        self.chunk_height = chunk_rows * tile_size[1]
+        self.chunk_cols = chunk_cols
+        self.chunk_rows = chunk_rows
+        self.tiles = []
+        self.slope_tiles = []
+        self.lines = []
+        self.resident_line_ids = set()
+        self.all_lines = game_map.lines
+        self.chunks = {}  # (chunk_x, chunk_y) -> ([(cell index, rect)], [(cell index, slope entry)])
+        self.active = set()
+        self.last_focus = {}  # focus key -> last position, for the direction of travel
+        self.loads = 0
+        self.unloads = 0
+
+        # Which chunks each line's bounding box touches (a floor can span many)
+        self.chunk_lines = {}
+        for i, line in enumerate(self.all_lines):
+            (x1, y1), (x2, y2) = line['p1'], line['p2']
+            left, top = self.chunk_of(min(x1, x2), min(y1, y2))
+            right, bottom = self.chunk_of(max(x1, x2), max(y1, y2))
+            for chunk_x in range(left, right + 1):
+                for chunk_y in range(top, bottom + 1):
+                    self.chunk_lines.setdefault((chunk_x, chunk_y), []).append(i)
+
+    def chunk_of(self, x, y):
+        return int(x // self.chunk_width), int(y // self.chunk_height)
+
+    def is_active(self, x, y):
+        return self.chunk_of(x, y) in self.active
+
+    def update(self, focus_points):
+        """focus_points: {key: (x, y)} of everything the world must be loaded around."""
+        active = set()
+        wanted = set()
+        keep = set()
+        reach = self.radius + 1
+        keep_reach = reach + self.prefetch + 1
+        for key, (x, y) in focus_points.items():
+            chunk_x, chunk_y = self.chunk_of(x, y)
+            for dx in range(-keep_reach, keep_reach + 1):
+                for dy in range(-keep_reach, keep_reach + 1):
+                    chunk = (chunk_x + dx, chunk_y + dy)
+                    keep.add(chunk)
+                    if abs(dx) <= reach and abs(dy) <= reach:
+                        wanted.add(chunk)
+                        if abs(dx) <= self.radius and abs(dy) <= self.radius:
+                            active.add(chunk)
+            # Prefetch ahead of the direction of travel
+            last = self.last_focus.get(key)
+            self.last_focus[key] = (x, y)
+            if last is None or not self.prefetch:
+                continue
+            step_x = (x > last[0]) - (x < last[0])
+            step_y = (y > last[1]) - (y < last[1])
+            for ahead in range(reach + 1, reach + self.prefetch + 1):
+                for side in range(-reach, reach + 1):
+                    if step_x:
+                        wanted.add((chunk_x + step_x * ahead, chunk_y + side))
+                    if step_y:
+                        wanted.add((chunk_x + side, chunk_y + step_y * ahead))
+        for key in list(self.last_focus):
+            if key not in focus_points:
+                del self.last_focus[key]
+        self.active = active
+
+        changed = False
+        for chunk in wanted:
+            if chunk not in self.chunks:
+                self.chunks[chunk] = self.map.build_chunk(chunk[0] * self.chunk_cols, chunk[1] * self.chunk_rows,
+                                                          self.chunk_cols, self.chunk_rows)
+                self.loads += 1
+                changed = True
+        for chunk in list(self.chunks):
+            if chunk not in keep:
+                del self.chunks[chunk]
+                self.unloads += 1
+                changed = True
+        if changed:
+            self.rebuild_resident()
+
+    def rebuild_resident(self):
+        """Refill the shared lists in map order (row by row, lines as in the file), like a full load."""
+        tiles = []
+        slopes = []
+        line_ids = set()
+        for chunk, (chunk_tiles, chunk_slopes) in self.chunks.items():
+            tiles.extend(chunk_tiles)
+            slopes.extend(chunk_slopes)
+            line_ids.update(self.chunk_lines.get(chunk, ()))
+        tiles.sort(key=lambda entry: entry[0])
+        slopes.sort(key=lambda entry: entry[0])
+        self.tiles[:] = [rect for _, rect in tiles]
+        self.slope_tiles[:] = [slope for _, slope in slopes]
+        self.line_index.add(line_ids - self.resident_line_ids)
+        self.line_index.remove(self.resident_line_ids - line_ids)
+        self.resident_line_ids = line_ids
+        self.lines[:] = [self.all_lines[i] for i in sorted(line_ids)]
@@ -0,0 +1,123 @@
+# Side of the square buckets in pixels; a bit wider than a tile so most walls fall in one or two
+CELL_SIZE = 128
+
+
+class LineIndex:
+    """
+    Uniform grid of buckets over the bounding boxes of a map's collision lines.
+
+    Walls and floors are indexed separately. Queries return only the lines
+    whose buckets touch the area asked about, in their order in the map file,
+    so movement resolves exactly as if it had looped over every line. Which
+    way the floor on top of each wall runs (cliff edges) is worked out here too.
+
+    With indexed=False no line is in the buckets until add() is called; a
+    ChunkedWorld adds and removes the lines of the chunks it loads and unloads.
+    """
+
+    def __init__(self, lines, cell_size=CELL_SIZE, indexed=True):
+        self.lines = list(lines)
+        self.cell_size = cell_size
+        self.wall_cells = {}  # (cell_x, cell_y) -> [line index]
+        self.floor_cells = {}
+        self.indexed = set()  # indices of the lines currently in the buckets
+        floor_ends = {}  # (x, y) -> first floor with an end there
+        for line in self.lines:
+            if line.get('type') == 'floor':
+                (x1, y1), (x2, y2) = line['p1'], line['p2']
+                floor_ends.setdefault((x1, y1), line)
+                floor_ends.setdefault((x2, y2), line)
+
+        # Which side of each wall's top the floor attached there extends to: -1 left, 1 right, 0 none
+        self.cliff_sides = {}  # id(wall) -> side
+        for line in self.lines:
+            if line.get('type') != 'wall':
+                continue
+            p1, p2 = line['p1'], line['p2']
+            # Y is down, so min Y is the top
+            top_point = p1 if p1[1] == min(p1[1], p2[1]) else p2
+            floor = floor_ends.get(tuple(top_point))
+            side = 0
+            if floor is not None:
+                # The floor's other end (not the shared top point)
+                other_point = floor['p1'] if floor['p2'] == top_point else floor['p2']
+                side = (other_point[0] > top_point[0]) - (other_point[0] < top_point[0])
+            self.cliff_sides[id(line)] = side
+
+        if indexed:
+            self.add(range(len(self.lines)))
+
+    def _line_cells(self, i):
+        """The bucket dict and cells of line i, or (None, ()) for a line that is neither wall nor floor."""
+        line = self.lines[i]
+        line_type = line.get('type')
+        if line_type == 'wall':
+            cells = self.wall_cells
+        elif line_type == 'floor':
+            cells = self.floor_cells
+        else:
+            return None, ()
+        (x1, y1), (x2, y2) = line['p1'], line['p2']
+        return cells, self._cells(min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+
+    def add(self, line_ids):
+        """Put the lines with these indices (into the list given at construction) in the buckets."""
+        for i in line_ids:
+            if i in self.indexed:
+                continue
+            self.indexed.add(i)
+            cells, line_cells = self._line_cells(i)
+            for cell in line_cells:
+                cells.setdefault(cell, []).append(i)
+
+    def remove(self, line_ids):
+        """Take the lines with these indices out of the buckets again."""
+        for i in line_ids:
+            if i not in self.indexed:
+                continue
+            self.indexed.discard(i)
+            cells, line_cells = self._line_cells(i)
+            for cell in line_cells:
+                bucket = cells[cell]
+                bucket.remove(i)
+                if not bucket:
+                    del cells[cell]
+
+    def _cells(self, left, top, right, bottom):
+        size = self.cell_size
+        for cell_x in range(int(left // size), int(right // size) + 1):
+            for cell_y in range(int(top // size), int(bottom // size) + 1):
+                yield cell_x, cell_y
+
+    def _query(self, cells, left, top, right, bottom):
+        found = set()
+        for cell in self._cells(left, top, right, bottom):
+            found.update(cells.get(cell, ()))
+        return sorted(found)
+
+    def walls_near(self, rect):
+        """
+        Walls that may overlap rect. The caller may move rect between walls (pushing
+        an entity out of one); the remaining walls are then looked up again around
+        its new position.
+        """
+        last = -1
+        while True:
+            state = tuple(rect)
+            for i in self._query(self.wall_cells, rect.left, rect.top, rect.right, rect.bottom):
+                if i <= last:
+                    continue
+                last = i
+                yield self.lines[i]
+                if tuple(rect) != state:
+                    break
+            else:
+                return
+
+    def cliff_side(self, wall):
+        """-1/1 if a floor attached to the top of wall extends left/right of it, else 0."""
+        return self.cliff_sides.get(id(wall), 0)
+
+    def floors_at(self, x, top, bottom):
+        """Floors that may pass through x somewhere between the heights top and bottom."""
+        return [self.lines[i] for i in self._query(self.floor_cells, x, top, x, bottom)]
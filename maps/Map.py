@@ -2,15 +2,37 @@ import json
 import os
 import csv
 import pygame
-from mobs.Mob import Mob
+try:
+    import numpy
+except ImportError:  # optional: tile analysis falls back to pygame masks
+    numpy = None
+from mobs.Mob import Mob, MOB_ANIMATIONS
+from utils.AssetRegistry import asset_registry
+from utils.DerivedCache import derived_cache
+from maps.MapFile import read_map_file
+from maps.ChunkedWorld import ChunkedWorld
+from maps.LineIndex import LineIndex
 from maps import map0
 
 TILE_WIDTH = 90
 TILE_HEIGHT = 60
 
+MAPS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(MAPS_DIR)
+TILE_MANIFEST_PATH = os.path.join(MAPS_DIR, "tile_manifest.json")
+BACKGROUND_MANIFEST_PATH = os.path.join(MAPS_DIR, "background_manifest.json")
+# Names of the on-disk cache entries, with everything the results depend on
+TILE_METADATA_KIND = f"tile_{TILE_WIDTH}x{TILE_HEIGHT}"
+BACKGROUND_KIND = "background_1.2x"
+
 
 class Map:
-    def __init__(self, screen, players, map_id=0):
+    def __init__(self, screen, players, map_id=0, tile_images=None, background_images=None,
+                 streaming=False, chunk_radius=1, chunk_prefetch=1):
+        """
+        tile_images/background_images: already loaded images (see MapLoader), read from disk if None.
+        streaming: keep only the collision data of the chunks around the players loaded (see ChunkedWorld).
+        """
         self.screen = screen
         self.players = players
         self.mobs = pygame.sprite.Group()
@@ -18,38 +40,80 @@ class Map:
         self.tile_grid = []
         self.slope_tiles = []
         self.lines = []
+        self.has_lines = False  # whether the map has collision lines, loaded or not
+        self.streaming = streaming
+        self.chunk_radius = chunk_radius
+        self.chunk_prefetch = chunk_prefetch
+        self.world = None  # ChunkedWorld when streaming
+        self.line_index = None  # LineIndex over the lines (the loaded ones when streaming), shared by the entities
         self.animation_time = 0.0  # Track time for background animations
-
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        self.project_root = os.path.dirname(base_dir)
-        self.tile_manifest_path = os.path.join(base_dir, "tile_manifest.json")
+        # Background quality, lowered by the QualityController when frames run long
+        self.background_scale = 1.0  # internal resolution of the background layers
+        self.skip_animated_backgrounds = False
+        self.skip_parallax_backgrounds = False
+        self.scaled_background_images = {}  # (bg_id, scale) -> Surface
+        self.background_buffer = None
+
+        self.project_root = PROJECT_ROOT
+        self.tile_manifest_path = TILE_MANIFEST_PATH
         self.tile_defs = self.load_tile_manifest()
         self.solid_tile_ids = {
             tile_id for tile_id, data in self.tile_defs.items()
             if data.get("solid", True) and tile_id != 0
         }
-        self.tile_images = self.load_tile_images()
-        self.background_manifest_path = os.path.join(base_dir, "background_manifest.json")
+        self.tile_images = tile_images if tile_images is not None else self.load_tile_images()
+        # How many cells a tile sprite can reach past its own, so draw() only visits cells near the view
+        self.tile_draw_margin = (
+            max([abs(d['grid_ox']) + d['img'].get_width() for d in self.tile_images.values()], default=0) // TILE_WIDTH + 1,
+            max([abs(d['grid_oy']) + d['img'].get_height() for d in self.tile_images.values()], default=0) // TILE_HEIGHT + 1,
+        )
+        self.background_manifest_path = BACKGROUND_MANIFEST_PATH
         self.background_defs = self.load_background_manifest()
-        self.background_images = self.load_background_images()
+        self.background_images = background_images if background_images is not None else self.load_background_images()
+        derived_cache.flush()
         self.background_layers = []
         self.global_bg_start_y = None  # Global top boundary for all backgrounds
         self.global_bg_end_y = None  # Global bottom boundary for all backgrounds
         self.spawn_point = {"x": 400, "y": 200}  # Default spawn
+        self.mobs_list = []  # mob definitions of the current map
         self.set_map(map_id)
 
     def set_map(self, map_id):
         """Sets the map to the requested map."""
         self.map_id = map_id
-        # load collision / platform tiles for this map from CSV
-        self.load_tiles_from_csv(map_id)
-        self.load_lines_from_json(map_id)
-        # load background layers
-        self.load_backgrounds_from_json(map_id)
-        # load spawn point
-        self.load_spawn_from_json(map_id)
-
-        mobs_from_csv = self.load_mobs_from_csv(map_id)
+        # Compiled map{id}.bin (build_maps.py) if it is up to date, else the editable CSV/JSON files
+        map_data = read_map_file(map_id)
+        if map_data is not None:
+            self.build_tiles(map_data.tile_grid, map_data.bounds)
+            self.lines = map_data.lines
+            self.background_layers = map_data.background_layers
+            self.global_bg_start_y = map_data.global_bg_start_y
+            self.global_bg_end_y = map_data.global_bg_end_y
+            if map_data.spawn is not None:
+                self.spawn_point = map_data.spawn
+            mobs_from_csv = map_data.mobs
+        else:
+            # load collision / platform tiles for this map from CSV
+            self.load_tiles_from_csv(map_id)
+            self.load_lines_from_json(map_id)
+            # load background layers
+            self.load_backgrounds_from_json(map_id)
+            # load spawn point
+            self.load_spawn_from_json(map_id)
+            mobs_from_csv = self.load_mobs_from_csv(map_id)
+
+        self.has_lines = bool(self.lines)
+        # When streaming, lines enter and leave the index with the chunks that hold them
+        self.line_index = LineIndex(self.lines, indexed=not self.streaming)
+        if self.streaming:
+            # Entities get the world's resident lists, filled as chunks load
+            self.world = ChunkedWorld(self, (TILE_WIDTH, TILE_HEIGHT), self.line_index,
+                                      self.chunk_radius, self.chunk_prefetch)
+            self.tiles = self.world.tiles
+            self.slope_tiles = self.world.slope_tiles
+            self.lines = self.world.lines
+            self.world.update({"spawn": self.get_spawn_point()})
+
         if mobs_from_csv:
             self.set_mobs(mobs_from_csv)
         elif map_id == 0:
@@ -67,10 +131,11 @@ class Map:
         Tiles are automatically scaled to the current screen size based on
         the CSV's rows/columns.
         """
-        self.tiles = []
-        self.tile_grid = []
-        self.slope_tiles = []
+        self.build_tiles(self.read_tile_grid(map_id))
 
+    @staticmethod
+    def read_tile_grid(map_id: int):
+        """Rows of tile ids from map{map_id}_tiles.csv ([] if there is none)."""
         csv_path = os.path.join(
             os.path.dirname(__file__),
             f"map{map_id}_tiles.csv"
@@ -78,7 +143,7 @@ class Map:
 
         if not os.path.exists(csv_path):
             # No tilemap for this map – just leave tiles empty.
-            return
+            return []
 
         grid: list[list[int]] = []
         with open(csv_path, newline="") as csvfile:
@@ -88,59 +153,86 @@ class Map:
                 if not row:
                     continue
                 grid.append([int(cell) if cell else 0 for cell in row])
+        return grid
 
+    def build_tiles(self, grid, bounds=None):
+        """Collision rects and slopes for a tile grid. bounds: precomputed calculate_map_bounds() result."""
+        self.tiles = []
         self.tile_grid = grid
+        self.slope_tiles = []
         if not grid:
             return
 
         # Calculate map boundaries (find the actual content bounds)
-        self.map_min_x, self.map_max_x, self.map_min_y, self.map_max_y = self.calculate_map_bounds()
+        self.map_min_x, self.map_max_x, self.map_min_y, self.map_max_y = bounds or self.calculate_map_bounds()
+
+        if self.streaming:
+            # Built per chunk by build_chunk()
+            return
 
         for y, row in enumerate(grid):
             for x, cell in enumerate(row):
                 if cell in self.solid_tile_ids:
-                    tile_def = self.tile_defs.get(cell, {})
-                    img_data = self.tile_images.get(cell)
-                    label = (tile_def.get("label") or "").lower()
+                    is_slope, entry = self.build_cell(cell, x, y)
+                    if entry:
+                        (self.slope_tiles if is_slope else self.tiles).append(entry)
+
+    def build_cell(self, cell, x, y):
+        """(is_slope, collision rect or slope entry) of a solid grid cell; the entry is None for a slope without a profile."""
+        tile_def = self.tile_defs.get(cell, {})
+        img_data = self.tile_images.get(cell)
+        label = (tile_def.get("label") or "").lower()
+
+        if label.startswith("sl") and img_data:
+            return True, self._build_slope_entry(cell, x, y, img_data)
+
+        if img_data:
+            ox = img_data['grid_ox']
+            oy = img_data['grid_oy']
+            ow = img_data['img'].get_width()
+            oh = img_data['img'].get_height()
+            solid_top_rel = img_data.get('solid_top_rel', 0)
+            collision_y = y * TILE_HEIGHT + oy + solid_top_rel
+            collision_h = max(1, oh - solid_top_rel)
+            return False, pygame.Rect(
+                x * TILE_WIDTH + ox,
+                collision_y,
+                ow,
+                collision_h,
+            )
+        # Fallback to full cell if no image data
+        return False, pygame.Rect(
+            x * TILE_WIDTH,
+            y * TILE_HEIGHT,
+            TILE_WIDTH,
+            TILE_HEIGHT,
+        )
 
-                    if label.startswith("sl") and img_data:
-                        slope_entry = self._build_slope_entry(cell, x, y, img_data)
-                        if slope_entry:
-                            self.slope_tiles.append(slope_entry)
-                        continue
+    def build_chunk(self, first_col, first_row, cols, rows):
+        """
+        Collision data of the cells in a block of the grid, for ChunkedWorld:
+        ([((y, x), rect)], [((y, x), slope entry)]), keyed for sorting into grid order.
+        """
+        tiles = []
+        slopes = []
+        for y in range(max(0, first_row), min(len(self.tile_grid), first_row + rows)):
+            row = self.tile_grid[y]
+            for x in range(max(0, first_col), min(len(row), first_col + cols)):
+                cell = row[x]
+                if cell in self.solid_tile_ids:
+                    is_slope, entry = self.build_cell(cell, x, y)
+                    if entry:
+                        (slopes if is_slope else tiles).append(((y, x), entry))
+        return tiles, slopes
 
-                    if img_data:
-                        ox = img_data['grid_ox']
-                        oy = img_data['grid_oy']
-                        ow = img_data['img'].get_width()
-                        oh = img_data['img'].get_height()
-                        solid_top_rel = img_data.get('solid_top_rel', 0)
-                        collision_y = y * TILE_HEIGHT + oy + solid_top_rel
-                        collision_h = max(1, oh - solid_top_rel)
-                        rect = pygame.Rect(
-                            x * TILE_WIDTH + ox,
-                            collision_y,
-                            ow,
-                            collision_h,
-                        )
-                        self.tiles.append(rect)
-                    else:
-                        # Fallback to full cell if no image data
-                        rect = pygame.Rect(
-                            x * TILE_WIDTH,
-                            y * TILE_HEIGHT,
-                            TILE_WIDTH,
-                            TILE_HEIGHT,
-                        )
-                        self.tiles.append(rect)
-
-    def load_tile_manifest(self):
+    @staticmethod
+    def load_tile_manifest():
         """Load tile definitions (id -> path/solid)."""
         tile_defs = {
             0: {"id": 0, "label": "Empty", "path": None, "solid": False}
         }
-        if os.path.exists(self.tile_manifest_path):
-            with open(self.tile_manifest_path) as f:
+        if os.path.exists(TILE_MANIFEST_PATH):
+            with open(TILE_MANIFEST_PATH) as f:
                 data = json.load(f)
                 for entry in data.get("tiles", []):
                     tile_defs[entry["id"]] = entry
@@ -148,11 +240,12 @@ class Map:
             print("[Map] WARNING: tile_manifest.json missing; using default empty tiles only.")
         return tile_defs
 
-    def load_tile_images(self):
-        """Load pygame surfaces for every tile that has a sprite path."""
-        cache = {}
-        tiles_root = os.path.join(self.project_root, "sprites", "maps", "tile")
-        for tile_id, entry in self.tile_defs.items():
+    @staticmethod
+    def tile_sprite_paths(tile_defs):
+        """tile id -> sprite file for every tile whose sprite exists."""
+        paths = {}
+        tiles_root = os.path.join(PROJECT_ROOT, "sprites", "maps", "tile")
+        for tile_id, entry in tile_defs.items():
             path = entry.get("path")
             if tile_id == 0 or not path:
                 continue
@@ -160,71 +253,152 @@ class Map:
             if not os.path.exists(sprite_path):
                 print(f"[Map] WARNING: missing sprite for tile id {tile_id}: {sprite_path}")
                 continue
-            img_orig = pygame.image.load(sprite_path).convert_alpha()
+            paths[tile_id] = sprite_path
+        return paths
 
-            ow, oh = img_orig.get_size()
-            if ow == 0 or oh == 0:
-                continue
+    @staticmethod
+    def decode_tile_image(sprite_path):
+        """
+        Read a tile sprite and work out its grid alignment and collision profile.
+
+        Doesn't touch the display, so it can run on a loader thread; 'img' still
+        has to be converted (convert_tile_image) before drawing. The profile is
+        cached on disk (utils/DerivedCache.py), so it's only computed once per sprite.
+        """
+        img_orig = pygame.image.load(sprite_path)
+
+        ow, oh = img_orig.get_size()
+        if ow == 0 or oh == 0:
+            return None
+
+        img_data = derived_cache.get_json(TILE_METADATA_KIND, sprite_path, Map.analyze_tile_image, img_orig)
+        img_data['img'] = img_orig
+        return img_data
+
+    @staticmethod
+    def analyze_tile_image(img_orig, use_numpy=True):
+        """Grid offsets, solid top and per-column opaque extent of a tile sprite."""
+        ow, oh = img_orig.get_size()
+
+        # Compute dynamic vertical alignment based on opacity distribution
+        if use_numpy and numpy is not None:
+            top_count, bottom_count, dense_top, column_profiles = Map.scan_tile_opacity_numpy(img_orig)
+        else:
+            top_count, bottom_count, dense_top, column_profiles = Map.scan_tile_opacity(img_orig)
+
+        if top_count > bottom_count:
+            grid_oy = 0  # Top-align (e.g., for top-heavy grass/upper cliffs)
+            solid_top_rel = 0  # Full for top-heavy
+        elif bottom_count > top_count:
+            grid_oy = TILE_HEIGHT - oh  # Bottom-align (e.g., for ground/dirt bases)
+            solid_top_rel = dense_top
+        else:
+            grid_oy = (TILE_HEIGHT - oh) // 2  # Center-align for balanced
+            solid_top_rel = 0  # Full for balanced
+
+        # Horizontal always center
+        grid_ox = (TILE_WIDTH - ow) // 2
+
+        return {
+            'grid_ox': grid_ox,
+            'grid_oy': grid_oy,
+            'solid_top_rel': solid_top_rel,
+            'column_profiles': column_profiles,
+        }
 
-            # Compute dynamic vertical alignment based on opacity distribution
-            mask = pygame.mask.from_surface(img_orig)
-            half_h = oh // 2
-            top_surf = pygame.Surface((ow, half_h), pygame.SRCALPHA)
-            top_surf.blit(img_orig, (0, 0), (0, 0, ow, half_h))
-            top_mask = pygame.mask.from_surface(top_surf)
-            top_count = top_mask.count()
-
-            bottom_h = oh - half_h
-            bottom_surf = pygame.Surface((ow, bottom_h), pygame.SRCALPHA)
-            bottom_surf.blit(img_orig, (0, 0), (0, half_h, ow, bottom_h))
-            bottom_mask = pygame.mask.from_surface(bottom_surf)
-            bottom_count = bottom_mask.count()
-
-            if top_count > bottom_count:
-                grid_oy = 0  # Top-align (e.g., for top-heavy grass/upper cliffs)
-                solid_top_rel = 0  # Full for top-heavy
-            elif bottom_count > top_count:
-                grid_oy = TILE_HEIGHT - oh  # Bottom-align (e.g., for ground/dirt bases)
-                # Find solid top: first row from top with >10% opaque (lower threshold to close small gaps)
-                solid_top_rel = oh  # Default to bottom if no dense row
-                for rel_y in range(oh):
-                    row_count = 0
-                    for rel_x in range(ow):
-                        if mask.get_at((rel_x, rel_y)):
-                            row_count += 1
-                    if row_count > ow // 10:  # 10% threshold for even fainter edges
-                        solid_top_rel = rel_y
-                        break
-            else:
-                grid_oy = (TILE_HEIGHT - oh) // 2  # Center-align for balanced
-                solid_top_rel = 0  # Full for balanced
-
-            # Horizontal always center
-            grid_ox = (TILE_WIDTH - ow) // 2
-
-            column_profiles = []
-            for rel_x in range(ow):
-                top = None
-                bottom = None
-                for rel_y in range(oh):
+    @staticmethod
+    def scan_tile_opacity(img_orig):
+        """
+        (opaque pixels in the top half, in the bottom half, first dense row, column profiles)
+        using pygame masks. The dense row is only searched for bottom-heavy tiles, the only
+        ones that use it.
+        """
+        ow, oh = img_orig.get_size()
+        mask = pygame.mask.from_surface(img_orig)
+        half_h = oh // 2
+        top_surf = pygame.Surface((ow, half_h), pygame.SRCALPHA)
+        top_surf.blit(img_orig, (0, 0), (0, 0, ow, half_h))
+        top_mask = pygame.mask.from_surface(top_surf)
+        top_count = top_mask.count()
+
+        bottom_h = oh - half_h
+        bottom_surf = pygame.Surface((ow, bottom_h), pygame.SRCALPHA)
+        bottom_surf.blit(img_orig, (0, 0), (0, half_h, ow, bottom_h))
+        bottom_mask = pygame.mask.from_surface(bottom_surf)
+        bottom_count = bottom_mask.count()
+
+        # Find solid top: first row from top with >10% opaque (lower threshold to close small gaps)
+        dense_top = oh  # Default to bottom if no dense row
+        if bottom_count > top_count:
+            for rel_y in range(oh):
+                row_count = 0
+                for rel_x in range(ow):
                     if mask.get_at((rel_x, rel_y)):
-                        if top is None:
-                            top = rel_y
-                        bottom = rel_y
-                column_profiles.append(
-                    {
-                        'top': top,
-                        'bottom': bottom,
-                    }
-                )
+                        row_count += 1
+                if row_count > ow // 10:  # 10% threshold for even fainter edges
+                    dense_top = rel_y
+                    break
+
+        column_profiles = []
+        for rel_x in range(ow):
+            top = None
+            bottom = None
+            for rel_y in range(oh):
+                if mask.get_at((rel_x, rel_y)):
+                    if top is None:
+                        top = rel_y
+                    bottom = rel_y
+            column_profiles.append(
+                {
+                    'top': top,
+                    'bottom': bottom,
+                }
+            )
+        return top_count, bottom_count, dense_top, column_profiles
+
+    @staticmethod
+    def scan_tile_opacity_numpy(img_orig):
+        """Same result as scan_tile_opacity, computed on the alpha channel with NumPy."""
+        ow, oh = img_orig.get_size()
+        # Opaque means what pygame.mask.from_surface counts: alpha above 127, or any
+        # pixel but the colorkey (every pixel of a surface with neither)
+        if img_orig.get_colorkey() is not None:
+            opaque = pygame.surfarray.array_colorkey(img_orig) > 127
+        elif img_orig.get_flags() & pygame.SRCALPHA:
+            alpha = pygame.surfarray.pixels_alpha(img_orig)
+            opaque = alpha > 127
+            del alpha  # unlocks the surface
+        else:
+            opaque = numpy.ones(img_orig.get_size(), dtype=bool)
+        # Arrays are indexed [x, y]
+        half_h = oh // 2
+        top_count = int(numpy.count_nonzero(opaque[:, :half_h]))
+        bottom_count = int(numpy.count_nonzero(opaque[:, half_h:]))
+
+        dense_rows = numpy.flatnonzero(numpy.count_nonzero(opaque, axis=0) > ow // 10)
+        dense_top = int(dense_rows[0]) if dense_rows.size else oh
+
+        filled = opaque.any(axis=1)
+        tops = numpy.argmax(opaque, axis=1)
+        bottoms = oh - 1 - numpy.argmax(opaque[:, ::-1], axis=1)
+        column_profiles = [
+            {'top': int(top), 'bottom': int(bottom)} if has_pixels else {'top': None, 'bottom': None}
+            for has_pixels, top, bottom in zip(filled.tolist(), tops.tolist(), bottoms.tolist())
+        ]
+        return top_count, bottom_count, dense_top, column_profiles
+
+    @staticmethod
+    def convert_tile_image(img_data):
+        img_data['img'] = img_data['img'].convert_alpha()
+        return img_data
 
-            cache[tile_id] = {
-                'img': img_orig,
-                'grid_ox': grid_ox,
-                'grid_oy': grid_oy,
-                'solid_top_rel': solid_top_rel,
-                'column_profiles': column_profiles,
-            }
+    def load_tile_images(self):
+        """Load pygame surfaces for every tile that has a sprite path."""
+        cache = {}
+        for tile_id, sprite_path in self.tile_sprite_paths(self.tile_defs).items():
+            img_data = self.decode_tile_image(sprite_path)
+            if img_data is not None:
+                cache[tile_id] = self.convert_tile_image(img_data)
         return cache
 
     def _build_slope_entry(self, tile_id, grid_x, grid_y, img_data):
@@ -262,15 +436,24 @@ class Map:
         if not self.tile_grid:
             return 0, 0, 0, 0
 
+        bounds = self.compute_tile_bounds(self.tile_grid, self.tile_images)
+        # Default to screen size if no tiles found
+        if bounds is None:
+            return 0, self.screen.get_width(), 0, self.screen.get_height()
+        return bounds
+
+    @staticmethod
+    def compute_tile_bounds(tile_grid, tile_images):
+        """(min_x, max_x, min_y, max_y) covered by the grid's tile sprites, None if there are none."""
         min_x = None
         max_x = None
         min_y = None
         max_y = None
 
-        for y, row in enumerate(self.tile_grid):
+        for y, row in enumerate(tile_grid):
             for x, tile_id in enumerate(row):
                 if tile_id != 0:  # Non-empty tile
-                    img_data = self.tile_images.get(tile_id)
+                    img_data = tile_images.get(tile_id)
                     if img_data:
                         world_x = x * TILE_WIDTH + img_data['grid_ox']
                         world_y = y * TILE_HEIGHT + img_data['grid_oy']
@@ -287,10 +470,8 @@ class Map:
                         if max_y is None or tile_bottom > max_y:
                             max_y = tile_bottom
 
-        # Default to screen size if no tiles found
         if min_x is None:
-            return 0, self.screen.get_width(), 0, self.screen.get_height()
-
+            return None
         return min_x, max_x, min_y, max_y
 
     def get_map_bounds(self):
@@ -299,16 +480,29 @@ class Map:
             return self.map_min_x, self.map_max_x, self.map_min_y, self.map_max_y
         return 0, self.screen.get_width(), 0, self.screen.get_height()
 
-    def draw(self, surface, camera_x=0, camera_y=0):
-        """Render backgrounds first, then the tile grid onto the provided surface with camera offset."""
+    def draw(self, surface, camera_x=0, camera_y=0, animation_time=None):
+        """
+        Render backgrounds first, then the tile grid onto the provided surface with camera offset.
+        animation_time: background animation clock to draw at (self.animation_time if None).
+        """
         # Draw background layers (back to front, sorted by layer index)
-        self.draw_backgrounds(surface, camera_x, camera_y)
+        if self.background_scale < 1.0:
+            self.draw_scaled_backgrounds(surface, camera_x, camera_y, animation_time)
+        else:
+            self.draw_backgrounds(surface, camera_x, camera_y, animation_time=animation_time)
         
         # Draw tiles
         if not self.tile_grid:
             return
-        for y, row in enumerate(self.tile_grid):
-            for x, tile_id in enumerate(row):
+        margin_x, margin_y = self.tile_draw_margin
+        first_row = max(0, int(camera_y // TILE_HEIGHT) - margin_y)
+        last_row = min(len(self.tile_grid), int((camera_y + surface.get_height()) // TILE_HEIGHT) + margin_y + 1)
+        first_col = max(0, int(camera_x // TILE_WIDTH) - margin_x)
+        last_col = int((camera_x + surface.get_width()) // TILE_WIDTH) + margin_x + 1
+        for y in range(first_row, last_row):
+            row = self.tile_grid[y]
+            for x in range(first_col, min(len(row), last_col)):
+                tile_id = row[x]
                 img_data = self.tile_images.get(tile_id)
                 if img_data:
                     world_x = x * TILE_WIDTH + img_data['grid_ox']
@@ -322,7 +516,8 @@ class Map:
                         screen_y + img.get_height() >= 0 and screen_y < surface.get_height()):
                         surface.blit(img, (screen_x, screen_y))
 
-    def load_mobs_from_csv(self, map_id: int):
+    @staticmethod
+    def load_mobs_from_csv(map_id: int):
         """
         Load mobs for this map from `map{map_id}_mobs.csv`.
 
@@ -369,12 +564,18 @@ class Map:
     def set_mobs(self, mobs_list):
         """Spawn the mobs on map."""
         map_bounds = self.get_map_bounds()
+        self.mobs_list = mobs_list
+        # Load every mob type's frames once up front; spawning then only shares them
+        for mob_name in {mob.get('mob_name') for mob in mobs_list}:
+            for animation in MOB_ANIMATIONS:
+                asset_registry.preload_animation(f'sprites/mobs/{mob_name}/{animation}')
         for i, mob in enumerate(mobs_list):
             # Generate deterministic ID based on map_id and index
             # This ensures all clients have the same IDs for the same mobs
             mob_id = f"map{self.map_id}_mob{i}"
             print(f"[Map] Spawning mob -> name={mob.get('mob_name')} x={mob.get('x')} y={mob.get('y')} health={mob.get('health')} id={mob_id}")
-            self.mobs.add(Mob(self.screen, self.players, self.tiles, self.slope_tiles, lines=self.lines, map_bounds=map_bounds, mob_id=mob_id, **mob))
+            self.mobs.add(Mob(self.screen, self.players, self.tiles, self.slope_tiles, lines=self.lines, map_bounds=map_bounds, mob_id=mob_id,
+                              line_index=self.line_index, has_lines=self.has_lines, **mob))
 
     def get_mobs(self):
         """Returns mobs list."""
@@ -382,28 +583,33 @@ class Map:
 
     def load_lines_from_json(self, map_id: int):
         """Load collision lines from map{id}_lines.json."""
-        self.lines = []
+        self.lines = self.read_lines(map_id)
+
+    @staticmethod
+    def read_lines(map_id: int):
         json_path = os.path.join(
             os.path.dirname(__file__),
             f"map{map_id}_lines.json"
         )
         
         if not os.path.exists(json_path):
-            return
+            return []
 
         try:
             with open(json_path, "r") as f:
-                self.lines = json.load(f)
+                return json.load(f)
         except Exception as e:
             print(f"[Map] Error loading lines: {e}")
+            return []
 
-    def load_background_manifest(self):
+    @staticmethod
+    def load_background_manifest():
         """Load background definitions (id -> path)."""
         bg_defs = {
             0: {"id": 0, "label": "Empty", "path": None}
         }
-        if os.path.exists(self.background_manifest_path):
-            with open(self.background_manifest_path) as f:
+        if os.path.exists(BACKGROUND_MANIFEST_PATH):
+            with open(BACKGROUND_MANIFEST_PATH) as f:
                 data = json.load(f)
                 for entry in data.get("backgrounds", []):
                     bg_defs[entry["id"]] = entry
@@ -411,11 +617,12 @@ class Map:
             print("[Map] WARNING: background_manifest.json missing; using default empty backgrounds only.")
         return bg_defs
 
-    def load_background_images(self):
-        """Load pygame surfaces for every background that has a sprite path."""
-        cache = {}
-        backgrounds_root = os.path.join(self.project_root, "sprites", "maps", "back")
-        for bg_id, entry in self.background_defs.items():
+    @staticmethod
+    def background_sprite_paths(background_defs):
+        """background id -> sprite file for every background whose sprite exists."""
+        paths = {}
+        backgrounds_root = os.path.join(PROJECT_ROOT, "sprites", "maps", "back")
+        for bg_id, entry in background_defs.items():
             path = entry.get("path")
             if bg_id == 0 or not path:
                 continue
@@ -423,27 +630,53 @@ class Map:
             if not os.path.exists(sprite_path):
                 print(f"[Map] WARNING: missing background sprite for id {bg_id}: {sprite_path}")
                 continue
-            try:
-                img = pygame.image.load(sprite_path).convert_alpha()
-                # Scale background by 2x as requested
-                new_width = int(img.get_width() * 1.2)
-                new_height = int(img.get_height() * 1.2)
-                img = pygame.transform.scale(img, (new_width, new_height))
-                cache[bg_id] = img
-            except pygame.error as e:
-                print(f"[Map] Error loading background {bg_id}: {e}")
+            paths[bg_id] = sprite_path
+        return paths
+
+    @staticmethod
+    def decode_background_image(sprite_path):
+        """Read and scale a background without converting it (safe on a loader thread). None on error."""
+        try:
+            img = pygame.image.load(sprite_path)
+        except pygame.error as e:
+            print(f"[Map] Error loading background {sprite_path}: {e}")
+            return None
+        # Scale background by 2x as requested
+        new_width = int(img.get_width() * 1.2)
+        new_height = int(img.get_height() * 1.2)
+        return pygame.transform.scale(img, (new_width, new_height))
+
+    @staticmethod
+    def load_background_image(sprite_path):
+        """decode_background_image through the on-disk cache."""
+        return derived_cache.get_image(BACKGROUND_KIND, sprite_path, Map.decode_background_image, sprite_path)
+
+    def load_background_images(self):
+        """Load pygame surfaces for every background that has a sprite path."""
+        cache = {}
+        for bg_id, sprite_path in self.background_sprite_paths(self.background_defs).items():
+            img = self.load_background_image(sprite_path)
+            if img is not None:
+                cache[bg_id] = img.convert_alpha()
         return cache
 
     def load_backgrounds_from_json(self, map_id: int):
         """Load background layers from map{id}_backgrounds.json."""
         self.background_layers = []
+        backgrounds = self.read_backgrounds(map_id)
+        if backgrounds is not None:
+            self.background_layers, self.global_bg_start_y, self.global_bg_end_y = backgrounds
+
+    @staticmethod
+    def read_backgrounds(map_id: int):
+        """(layers sorted by layer_index, global_start_y, global_end_y), None if missing or unreadable."""
         json_path = os.path.join(
             os.path.dirname(__file__),
             f"map{map_id}_backgrounds.json"
         )
         
         if not os.path.exists(json_path):
-            return
+            return None
 
         try:
             with open(json_path, "r") as f:
@@ -459,17 +692,46 @@ class Map:
                         layer["animated"] = False
                     if "animation_speed" not in layer:
                         layer["animation_speed"] = 20.0
-                self.background_layers = layers
-                # Load global bounds
-                self.global_bg_start_y = data.get("global_start_y", None)
-                self.global_bg_end_y = data.get("global_end_y", None)
                 # Sort layers by layer_index (lower = drawn first/behind)
-                self.background_layers.sort(key=lambda l: l.get("layer_index", 0))
+                layers.sort(key=lambda l: l.get("layer_index", 0))
+                # Global bounds
+                return layers, data.get("global_start_y", None), data.get("global_end_y", None)
         except Exception as e:
             print(f"[Map] Error loading backgrounds: {e}")
+            return None
+
+    def get_background_image(self, bg_id, scale=1.0):
+        """Background image shrunk by scale (cached), for the reduced resolution buffer."""
+        bg_img = self.background_images.get(bg_id)
+        if not bg_img or scale == 1.0:
+            return bg_img
+        key = (bg_id, scale)
+        scaled = self.scaled_background_images.get(key)
+        if scaled is None:
+            size = (max(1, int(bg_img.get_width() * scale)), max(1, int(bg_img.get_height() * scale)))
+            scaled = self.scaled_background_images[key] = pygame.transform.smoothscale(bg_img, size)
+        return scaled
+
+    def draw_scaled_backgrounds(self, surface, camera_x=0, camera_y=0, animation_time=None):
+        """Draw the background layers into a smaller buffer and stretch it over the surface."""
+        scale = self.background_scale
+        size = (int(surface.get_width() * scale), int(surface.get_height() * scale))
+        if self.background_buffer is None or self.background_buffer.get_size() != size:
+            self.background_buffer = pygame.Surface(size).convert()
+        # The buffer replaces the whole surface, so it starts from the same clear color (Game.draw_bg)
+        self.background_buffer.fill((255, 255, 255))
+        self.draw_backgrounds(self.background_buffer, int(camera_x * scale), int(camera_y * scale), scale, animation_time)
+        pygame.transform.scale(self.background_buffer, surface.get_size(), surface)
+
+    def draw_backgrounds(self, surface, camera_x=0, camera_y=0, scale=1.0, animation_time=None):
+        """
+        Draw all background layers with optional horizontal repeating.
 
-    def draw_backgrounds(self, surface, camera_x=0, camera_y=0):
-        """Draw all background layers with optional horizontal repeating."""
+        With scale < 1 everything is drawn shrunk (camera_x/camera_y already scaled),
+        for the reduced resolution background buffer.
+        """
+        if animation_time is None:
+            animation_time = self.animation_time
         screen_width = surface.get_width()
         screen_height = surface.get_height()
         
@@ -478,16 +740,20 @@ class Map:
             if bg_id == 0:
                 continue
                 
-            bg_img = self.background_images.get(bg_id)
+            bg_img = self.get_background_image(bg_id, scale)
             if not bg_img:
                 continue
             
             # Get layer properties
-            y_pos = layer.get("y", 0)
+            y_pos = int(round(layer.get("y", 0) * scale))
             scroll_speed = layer.get("scroll_speed", 1.0)  # Parallax effect (1.0 = normal, <1.0 = slower)
             repeat = layer.get("repeat", False)  # Default to False (non-repeating)
             animated = layer.get("animated", False)
-            animation_speed = layer.get("animation_speed", 20.0)
+            animation_speed = layer.get("animation_speed", 20.0) * scale
+            if animated and self.skip_animated_backgrounds:
+                continue
+            if scroll_speed != 1.0 and self.skip_parallax_backgrounds:
+                continue
             
             # Calculate scroll offset with parallax
             scroll_x = int(camera_x * scroll_speed)
@@ -503,13 +769,15 @@ class Map:
             
             if self.global_bg_start_y is not None:
                 # Clip top if background starts above the boundary
-                if y_pos < self.global_bg_start_y:
-                    clip_top = self.global_bg_start_y - y_pos
+                bg_start_y = int(round(self.global_bg_start_y * scale))
+                if y_pos < bg_start_y:
+                    clip_top = bg_start_y - y_pos
             
             if self.global_bg_end_y is not None:
                 # Clip bottom if background extends below the boundary
-                if y_pos + img_height > self.global_bg_end_y:
-                    clip_bottom = self.global_bg_end_y - y_pos
+                bg_end_y = int(round(self.global_bg_end_y * scale))
+                if y_pos + img_height > bg_end_y:
+                    clip_bottom = bg_end_y - y_pos
             
             # Only draw if layer is visible on screen vertically and within bounds
             # Also check if the clipped portion is valid (clip_bottom > clip_top)
@@ -519,7 +787,7 @@ class Map:
                     # Calculate animation offset (moves right to left, so negative)
                     anim_offset = 0
                     if animated:
-                        anim_offset = int(self.animation_time * animation_speed) % img_width
+                        anim_offset = int(animation_time * animation_speed) % img_width
                     
                     # Calculate how many times to repeat horizontally
                     # Start from leftmost visible position
@@ -540,7 +808,7 @@ class Map:
                             surface.blit(bg_img, (x, screen_y))
                 else:
                     # Draw single instance (no repeating) with vertical clipping
-                    x_pos = layer.get("x", 0)  # X position for non-repeating backgrounds
+                    x_pos = int(round(layer.get("x", 0) * scale))  # X position for non-repeating backgrounds
                     screen_x = x_pos - scroll_x
                     # Only draw if visible on screen
                     if screen_x + img_width >= 0 and screen_x < screen_width:
@@ -556,20 +824,27 @@ class Map:
 
     def load_spawn_from_json(self, map_id: int):
         """Load spawn point from map{id}_spawn.json."""
+        spawn_point = self.read_spawn(map_id)
+        if spawn_point is not None:
+            self.spawn_point = spawn_point
+
+    @staticmethod
+    def read_spawn(map_id: int):
         json_path = os.path.join(
             os.path.dirname(__file__),
             f"map{map_id}_spawn.json"
         )
         
         if not os.path.exists(json_path):
-            return
+            return None
 
         try:
             with open(json_path, "r") as f:
                 data = json.load(f)
-                self.spawn_point = {"x": data.get("x", 400), "y": data.get("y", 200)}
+                return {"x": data.get("x", 400), "y": data.get("y", 200)}
         except Exception as e:
             print(f"[Map] Error loading spawn point: {e}")
+            return None
 
     def get_spawn_point(self):
         """Get the spawn point coordinates. Returns (x, y) tuple."""
@@ -0,0 +1,248 @@
+import mmap
+import os
+import struct
+from collections import namedtuple
+
+MAP_FILE_MAGIC = b"MSMP"
+# Bump when the layout below changes; older files are then ignored
+MAP_FILE_VERSION = 1
+
+MAPS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(MAPS_DIR)
+
+# Everything Map.set_map needs, as it would have read it from the CSV/JSON files
+MapData = namedtuple("MapData", [
+    "tile_grid",  # rows of tile ids
+    "bounds",  # (min_x, max_x, min_y, max_y) of the tile sprites, None to compute at load
+    "lines",  # [{"p1": [x, y], "p2": [x, y], "type": str}]
+    "mobs",  # [{"mob_name", "x", "y", "health"}]
+    "background_layers",
+    "global_bg_start_y",
+    "global_bg_end_y",
+    "spawn",  # {"x", "y"} or None
+])
+
+# Layout, little endian. Strings are u16 length + UTF-8; "opt" values are a u8 flag + the value.
+#   header      magic, u16 version
+#   sources     u16 count, (string path relative to the project, i64 mtime_ns, i64 size or -1)
+#   tiles       u16 rows, u16 row lengths..., u16 tile ids... (row after row)
+#   bounds      opt i32 x4
+#   lines       u32 count, (i32 x1, y1, x2, y2, string type)
+#   mobs        u32 count, (string name, i32 x, y, health)
+#   layers      u32 count, (i32 background_id, layer_index, x, y, f64 scroll_speed, animation_speed, u8 repeat, animated)
+#   globals     opt i32 global_start_y, opt i32 global_end_y
+#   spawn       opt i32 x, y
+HEADER = struct.Struct("<4sH")
+SOURCE = struct.Struct("<qq")
+U8 = struct.Struct("<B")
+U16 = struct.Struct("<H")
+U32 = struct.Struct("<I")
+I32 = struct.Struct("<i")
+BOUNDS = struct.Struct("<iiii")
+LINE = struct.Struct("<iiii")
+MOB = struct.Struct("<iii")
+LAYER = struct.Struct("<iiiiddBB")
+POINT = struct.Struct("<ii")
+
+
+def map_file_path(map_id):
+    return os.path.join(MAPS_DIR, f"map{map_id}.bin")
+
+
+def map_source_paths(map_id):
+    """The editable files a compiled map is built from (relative to the project root)."""
+    return [f"maps/map{map_id}_{name}" for name in ("tiles.csv", "lines.json", "mobs.csv", "backgrounds.json", "spawn.json")]
+
+
+def source_stamp(path):
+    """(mtime_ns, size) of a project file, (0, -1) if it does not exist."""
+    try:
+        stat = os.stat(os.path.join(PROJECT_ROOT, path))
+    except OSError:
+        return 0, -1
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _integer(value, what):
+    if value != int(value):
+        raise ValueError(f"{what} must be a whole number, got {value!r}")
+    return int(value)
+
+
+class _Writer:
+    def __init__(self):
+        self.parts = []
+
+    def pack(self, fmt, *values):
+        self.parts.append(fmt.pack(*values))
+
+    def string(self, text):
+        data = text.encode("utf-8")
+        self.pack(U16, len(data))
+        self.parts.append(data)
+
+    def optional(self, fmt, values):
+        self.pack(U8, values is not None)
+        if values is not None:
+            self.pack(fmt, *values)
+
+
+def write_map_file(path, map_data, sources):
+    """Write map_data (a MapData) to path. sources: project-relative files whose stamps are stored."""
+    out = _Writer()
+    out.pack(HEADER, MAP_FILE_MAGIC, MAP_FILE_VERSION)
+
+    out.pack(U16, len(sources))
+    for source in sources:
+        out.string(source)
+        out.pack(SOURCE, *source_stamp(source))
+
+    out.pack(U16, len(map_data.tile_grid))
+    for row in map_data.tile_grid:
+        out.pack(U16, len(row))
+    for row in map_data.tile_grid:
+        out.parts.append(struct.pack(f"<{len(row)}H", *row))
+
+    out.optional(BOUNDS, map_data.bounds)
+
+    out.pack(U32, len(map_data.lines))
+    for i, line in enumerate(map_data.lines):
+        x1, y1 = line["p1"]
+        x2, y2 = line["p2"]
+        out.pack(LINE, *(_integer(v, f"line {i} coordinate") for v in (x1, y1, x2, y2)))
+        out.string(line.get("type", ""))
+
+    out.pack(U32, len(map_data.mobs))
+    for i, mob in enumerate(map_data.mobs):
+        out.string(mob["mob_name"])
+        out.pack(MOB, *(_integer(mob[key], f"mob {i} {key}") for key in ("x", "y", "health")))
+
+    out.pack(U32, len(map_data.background_layers))
+    for i, layer in enumerate(map_data.background_layers):
+        what = f"background layer {i}"
+        out.pack(LAYER,
+                 layer.get("background_id", 0), layer.get("layer_index", 0),
+                 _integer(layer.get("x", 0), what + " x"), _integer(layer.get("y", 0), what + " y"),
+                 layer.get("scroll_speed", 1.0), layer.get("animation_speed", 20.0),
+                 layer.get("repeat", False), layer.get("animated", False))
+
+    for value in (map_data.global_bg_start_y, map_data.global_bg_end_y):
+        out.optional(I32, None if value is None else (_integer(value, "global background bound"),))
+    spawn = map_data.spawn
+    out.optional(POINT, None if spawn is None else (_integer(spawn["x"], "spawn x"), _integer(spawn["y"], "spawn y")))
+
+    with open(path, "wb") as f:
+        f.write(b"".join(out.parts))
+
+
+class _Reader:
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.offset = 0
+
+    def unpack(self, fmt):
+        values = fmt.unpack_from(self.buffer, self.offset)
+        self.offset += fmt.size
+        return values
+
+    def value(self, fmt):
+        return self.unpack(fmt)[0]
+
+    def string(self):
+        length = self.value(U16)
+        if self.offset + length > len(self.buffer):
+            raise ValueError("file is truncated inside a string")
+        text = bytes(self.buffer[self.offset:self.offset + length]).decode("utf-8")
+        self.offset += length
+        return text
+
+    def optional(self, fmt):
+        if not self.value(U8):
+            return None
+        return self.unpack(fmt)
+
+
+def read_map_file(map_id):
+    """
+    MapData from map{map_id}.bin, or None if there is no compiled file, it was
+    written by another version, or any of its sources changed since (then the
+    CSV/JSON files are read instead, so edits show up without recompiling).
+    """
+    path = map_file_path(map_id)
+    try:
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                return _parse(buffer, path)
+    except (OSError, ValueError, struct.error) as e:
+        if os.path.exists(path):
+            print(f"[MapFile] Could not read {path}: {e}")
+        return None
+
+
+def _parse(buffer, path):
+    data = _Reader(buffer)
+    magic, version = data.unpack(HEADER)
+    if magic != MAP_FILE_MAGIC or version != MAP_FILE_VERSION:
+        return None
+
+    for _ in range(data.value(U16)):
+        source = data.string()
+        if tuple(data.unpack(SOURCE)) != source_stamp(source):
+            print(f"[MapFile] {path} is out of date ({source} changed), reading the map sources instead. Run build_maps.py to rebuild it.")
+            return None
+
+    row_lengths = [data.value(U16) for _ in range(data.value(U16))]
+    grid_end = data.offset + sum(row_lengths) * 2
+    if grid_end > len(buffer):
+        raise ValueError("file is truncated inside the tile grid")
+    # One cast view over the whole grid instead of a parse per cell. Every view is
+    # released before returning, or closing the mmap raises BufferError.
+    tile_grid = []
+    with memoryview(buffer) as view, view[data.offset:grid_end] as grid_bytes, grid_bytes.cast("H") as cells:
+        start = 0
+        for length in row_lengths:
+            tile_grid.append(cells[start:start + length].tolist())
+            start += length
+    data.offset = grid_end
+
+    bounds = data.optional(BOUNDS)
+
+    lines = []
+    for _ in range(data.value(U32)):
+        x1, y1, x2, y2 = data.unpack(LINE)
+        lines.append({"p1": [x1, y1], "p2": [x2, y2], "type": data.string()})
+
+    mobs = []
+    for _ in range(data.value(U32)):
+        name = data.string()
+        x, y, health = data.unpack(MOB)
+        mobs.append({"mob_name": name, "x": x, "y": y, "health": health})
+
+    layers = []
+    for _ in range(data.value(U32)):
+        background_id, layer_index, x, y, scroll_speed, animation_speed, repeat, animated = data.unpack(LAYER)
+        layers.append({
+            "background_id": background_id,
+            "layer_index": layer_index,
+            "x": x,
+            "y": y,
+            "scroll_speed": scroll_speed,
+            "animation_speed": animation_speed,
+            "repeat": bool(repeat),
+            "animated": bool(animated),
+        })
+
+    global_start = data.optional(I32)
+    global_end = data.optional(I32)
+    spawn = data.optional(POINT)
+
+    return MapData(
+        tile_grid=tile_grid,
+        bounds=bounds,
+        lines=lines,
+        mobs=mobs,
+        background_layers=layers,
+        global_bg_start_y=None if global_start is None else global_start[0],
+        global_bg_end_y=None if global_end is None else global_end[0],
+        spawn=None if spawn is None else {"x": spawn[0], "y": spawn[1]},
+    )
@@ -0,0 +1,109 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from maps.Map import Map
+from maps.MapFile import read_map_file
+from maps import map0
+from mobs.Mob import MOB_ANIMATIONS
+from utils.AssetRegistry import asset_registry
+
+
+class MapLoader:
+    """
+    Loads a map in the background while the game keeps presenting frames.
+
+    Reading files, decoding images and the tile collision analysis run on a
+    pool of worker threads. Converting surfaces to the display format needs the
+    display, so that and building the Map (which spawns the mobs) are left to
+    the main thread: update() does that work for at most budget_ms per call, as
+    results come in. `progress` goes from 0 to 1 and `map` is set when done.
+    map_options are passed on to Map (streaming, chunk_radius, chunk_prefetch).
+    """
+
+    def __init__(self, screen, players, map_id, animations=(), workers=4, map_options=None):
+        self.screen = screen
+        self.players = players
+        self.map_id = map_id
+        self.animations = list(animations)  # extra animation directories to decode (player, skills)
+        self.workers = workers
+        self.map_options = map_options or {}
+        self.executor = None
+        self.tile_jobs = {}
+        self.background_jobs = {}
+        self.animation_jobs = []
+        self.tile_images = {}
+        self.background_images = {}
+        self.total_jobs = 0
+        self.finished_jobs = 0
+        self.map = None
+
+    @property
+    def done(self):
+        return self.map is not None
+
+    @property
+    def progress(self):
+        if self.done:
+            return 1.0
+        # The last step, building the map, counts as one more job
+        return self.finished_jobs / (self.total_jobs + 1)
+
+    def start(self):
+        # Read on the main thread so the workers never race to create the index
+        asset_registry.get_atlases()
+        map_data = read_map_file(self.map_id)
+        mobs_list = map_data.mobs if map_data is not None else Map.load_mobs_from_csv(self.map_id)
+        if not mobs_list and self.map_id == 0:
+            mobs_list = map0.mobs_list
+        animations = self.animations + [
+            f'sprites/mobs/{mob_name}/{animation}'
+            for mob_name in sorted({mob.get('mob_name') for mob in mobs_list})
+            for animation in MOB_ANIMATIONS
+        ]
+
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="map-loader")
+        for tile_id, sprite_path in Map.tile_sprite_paths(Map.load_tile_manifest()).items():
+            self.tile_jobs[tile_id] = self.executor.submit(Map.decode_tile_image, sprite_path)
+        for bg_id, sprite_path in Map.background_sprite_paths(Map.load_background_manifest()).items():
+            self.background_jobs[bg_id] = self.executor.submit(Map.load_background_image, sprite_path)
+        self.animation_jobs = [self.executor.submit(asset_registry.decode_animation, directory) for directory in animations]
+        self.total_jobs = len(self.tile_jobs) + len(self.background_jobs) + len(self.animation_jobs)
+        return self
+
+    def update(self, budget_ms=8):
+        """Do main-thread work for up to budget_ms. Returns True once the map is built."""
+        if self.done:
+            return True
+        deadline = time.perf_counter() + budget_ms / 1000
+        for tile_id, job in list(self.tile_jobs.items()):
+            if time.perf_counter() > deadline:
+                return False
+            if job.done():
+                img_data = job.result()
+                if img_data is not None:
+                    self.tile_images[tile_id] = Map.convert_tile_image(img_data)
+                del self.tile_jobs[tile_id]
+                self.finished_jobs += 1
+        for bg_id, job in list(self.background_jobs.items()):
+            if time.perf_counter() > deadline:
+                return False
+            if job.done():
+                img = job.result()
+                if img is not None:
+                    self.background_images[bg_id] = img.convert_alpha()
+                del self.background_jobs[bg_id]
+                self.finished_jobs += 1
+        for job in list(self.animation_jobs):
+            if time.perf_counter() > deadline:
+                return False
+            if job.done():
+                asset_registry.store_decoded(job.result())
+                self.animation_jobs.remove(job)
+                self.finished_jobs += 1
+        if self.tile_jobs or self.background_jobs or self.animation_jobs:
+            return False
+
+        self.executor.shutdown()
+        self.map = Map(self.screen, self.players, self.map_id,
+                       tile_images=self.tile_images, background_images=self.background_images, **self.map_options)
+        return True
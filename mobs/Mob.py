@@ -1,14 +1,29 @@
 import pygame
-import os
 import random
 import uuid
+from entities.Entity import Entity
 from entities.HealthBar import HealthBar
+from maps.LineIndex import LineIndex
+from utils.AssetRegistry import asset_registry
+from utils.SimClock import sim_clock
+from utils.SoundBank import sound_bank
+from utils.RenderQueue import LAYER_MOBS
 
 FLOOR = 465
+MOB_ANIMATIONS = ['stand', 'walk', 'jump', 'hit', 'die']
+# Opacity steps of the death fade; faded frames are shared between all mobs
+FADE_LEVELS = 32
 
 
-class Mob(pygame.sprite.Sprite):
-    def __init__(self, screen, players, tiles, slope_tiles=None, lines=None, mob_name=None, x=0, y=0, scale=1, speed=1, health=150, map_bounds=None, mob_id=None, exp_reward=15):
+def build_fade_frame(frame, level):
+    """Copy of a frame with its alpha multiplied by level / FADE_LEVELS."""
+    faded = frame.copy()
+    faded.fill((255, 255, 255, 255 * level // FADE_LEVELS), special_flags=pygame.BLEND_RGBA_MULT)
+    return faded
+
+
+class Mob(pygame.sprite.Sprite, Entity):
+    def __init__(self, screen, players, tiles, slope_tiles=None, lines=None, mob_name=None, x=0, y=0, scale=1, speed=1, health=150, map_bounds=None, mob_id=None, exp_reward=15, line_index=None, has_lines=None):
         pygame.sprite.Sprite.__init__(self)
         self.screen = screen
         self.alive = True
@@ -18,8 +33,12 @@ class Mob(pygame.sprite.Sprite):
         self.players = players
         # list of pygame.Rect for solid tiles / platforms
         self.tiles = tiles
-        self.slope_tiles = slope_tiles or []
-        self.lines = lines or []
+        self.slope_tiles = slope_tiles if slope_tiles is not None else []
+        self.lines = lines if lines is not None else []
+        # Whether the map has collision lines at all (else tiles are collided with)
+        self.has_lines = bool(self.lines) if has_lines is None else has_lines
+        # Walls/floors by area; the map's shared one, or built from lines
+        self.line_index = line_index or LineIndex(self.lines)
         self.current_floor = None
         self.max_slope_step_up = 60
         self.max_slope_step_down = 25
@@ -35,6 +54,7 @@ class Mob(pygame.sprite.Sprite):
         self.attacker = ""
         self.exp_reward = exp_reward
         self.alpha = 255
+        self.fade_opacity = 1.0  # product of every fade step so far
         # Booleans
         self.is_idle = False
         self.has_attacker = False
@@ -55,31 +75,32 @@ class Mob(pygame.sprite.Sprite):
         self.idle_cooldown = 0
         # Animation
         self.animation_list = []
+        # frame -> mirrored frame, built once so drawing never has to flip
+        self.flipped_frames = {}
         self.next_attack = 3
         self.frame_index = 0
         self.action = 0
-        self.update_time = pygame.time.get_ticks()
+        self.update_time = sim_clock.get_ticks()
         
         #load all images for the players
-        animation_types = ['stand', 'walk', 'jump', 'hit', 'die']
+        animation_types = MOB_ANIMATIONS
+        # (path, scale) of every animation held in the shared asset registry
+        self.acquired_animations = []
 
         for animation in animation_types:
-            temp_list = []
             anim_path = f'sprites/mobs/{self.mob_name}/{animation}'
+            temp_list = asset_registry.acquire_animation(anim_path, scale)
 
             # If the folder doesn't exist, use the first animation (stand) as fallback
-            if not os.path.exists(anim_path):
+            if temp_list is None:
                 print(f"[WARNING] Missing animation '{animation}' for mob '{self.mob_name}'. Using fallback.")
                 temp_list = self.animation_list[0] if self.animation_list else []
                 self.animation_list.append(temp_list)
                 continue
 
-            num_of_frames = len(os.listdir(anim_path))
-            for i in range(num_of_frames):
-                img = pygame.image.load(f'{anim_path}/{i}.png').convert_alpha()
-                img = pygame.transform.scale(img, (int(img.get_width() * scale), int(img.get_height() * scale)))
-                temp_list.append(img)
-
+            flipped_list = asset_registry.acquire_animation(anim_path, scale, flip=True)
+            self.flipped_frames.update(zip(temp_list, flipped_list))
+            self.acquired_animations.append((anim_path, scale))
             self.animation_list.append(temp_list)
 
         self.image = self.animation_list[self.action][self.frame_index]
@@ -90,14 +111,12 @@ class Mob(pygame.sprite.Sprite):
 
 
     def update(self, camera_x=0, camera_y=0):
-        self.health_bar.update(camera_x, camera_y)
         self.update_animation()
         self.check_alive()
         self.handle_movement()
 
     def client_update(self, camera_x=0, camera_y=0):
         """Update method for clients (non-host). Updates visuals but not physics."""
-        self.health_bar.update(camera_x, camera_y)
         self.update_animation()
         self.check_alive()
         # Do NOT call handle_movement()
@@ -210,32 +229,31 @@ class Mob(pygame.sprite.Sprite):
         self.rect.x += dx
         
         # Check wall collisions
-        for line in self.lines:
-            if line.get('type') == 'wall':
-                # Check if this wall is a "cliff" connected to a floor at our height
-                if self._should_ignore_wall(line, dx):
-                    continue
+        for line in self.line_index.walls_near(self.rect):
+            # Check if this wall is a "cliff" connected to a floor at our height
+            if self._should_ignore_wall(line, dx):
+                continue
 
-                p1 = line['p1']
-                p2 = line['p2']
-                # Simple AABB check first
-                line_min_x = min(p1[0], p2[0])
-                line_max_x = max(p1[0], p2[0])
-                line_min_y = min(p1[1], p2[1])
-                line_max_y = max(p1[1], p2[1])
+            p1 = line['p1']
+            p2 = line['p2']
+            # Simple AABB check first
+            line_min_x = min(p1[0], p2[0])
+            line_max_x = max(p1[0], p2[0])
+            line_min_y = min(p1[1], p2[1])
+            line_max_y = max(p1[1], p2[1])
+            
+            if self.rect.right > line_min_x and self.rect.left < line_max_x and \
+               self.rect.bottom > line_min_y and self.rect.top < line_max_y:
                 
-                if self.rect.right > line_min_x and self.rect.left < line_max_x and \
-                   self.rect.bottom > line_min_y and self.rect.top < line_max_y:
-                    
-                    # Determine side
-                    if dx > 0: # Moving right
-                        self.rect.right = line_min_x
-                        self.moving_right = False
-                        self.moving_left = True
-                    elif dx < 0: # Moving left
-                        self.rect.left = line_max_x
-                        self.moving_left = False
-                        self.moving_right = True
+                # Determine side
+                if dx > 0: # Moving right
+                    self.rect.right = line_min_x
+                    self.moving_right = False
+                    self.moving_left = True
+                elif dx < 0: # Moving left
+                    self.rect.left = line_max_x
+                    self.moving_left = False
+                    self.moving_right = True
 
         # Clamp horizontal position within patrol radius
         min_x = self.spawn_x - self.patrol_radius
@@ -263,26 +281,25 @@ class Mob(pygame.sprite.Sprite):
             foot_y = self.rect.bottom
             
             # Find the highest floor line that we are currently above or crossing
-            for line in self.lines:
-                if line.get('type') == 'floor':
-                    p1 = line['p1']
-                    p2 = line['p2']
-                    
-                    # Check if x is within line segment
-                    if min(p1[0], p2[0]) <= foot_x <= max(p1[0], p2[0]):
-                        # Calculate line y at foot_x
-                        if p2[0] != p1[0]:
-                            slope = (p2[1] - p1[1]) / (p2[0] - p1[0])
-                            line_y = p1[1] + slope * (foot_x - p1[0])
-                        else:
-                            line_y = min(p1[1], p2[1]) 
-                            
-                        # Check if we crossed it or are near it
-                        # Tolerance for snapping
-                        if foot_y >= line_y - 5 and foot_y <= line_y + max(10, self.vel_y + 5):
-                            if ground_y is None or line_y < ground_y:
-                                ground_y = line_y
-                                self.current_floor = line
+            for line in self.line_index.floors_at(foot_x, foot_y - max(10, self.vel_y + 5) - 1, foot_y + 6):
+                p1 = line['p1']
+                p2 = line['p2']
+                
+                # Check if x is within line segment
+                if min(p1[0], p2[0]) <= foot_x <= max(p1[0], p2[0]):
+                    # Calculate line y at foot_x
+                    if p2[0] != p1[0]:
+                        slope = (p2[1] - p1[1]) / (p2[0] - p1[0])
+                        line_y = p1[1] + slope * (foot_x - p1[0])
+                    else:
+                        line_y = min(p1[1], p2[1]) 
+                        
+                    # Check if we crossed it or are near it
+                    # Tolerance for snapping
+                    if foot_y >= line_y - 5 and foot_y <= line_y + max(10, self.vel_y + 5):
+                        if ground_y is None or line_y < ground_y:
+                            ground_y = line_y
+                            self.current_floor = line
 
         if ground_y is not None:
             self.rect.bottom = ground_y
@@ -290,7 +307,7 @@ class Mob(pygame.sprite.Sprite):
             self.in_air = False
             
         # Fallback to old tile collision if no lines
-        if not self.lines:
+        if not self.has_lines:
             for tile in self.tiles:
                 if self.rect.colliderect(tile):
                     if self.vel_y > 0:  # falling
@@ -331,48 +348,17 @@ class Mob(pygame.sprite.Sprite):
         - If we are moving LEFT (dx < 0), we ignore the wall if there is a floor connected to its top extending to the RIGHT.
           (This means we are walking off a cliff edge to the left)
         """
-        # 1. Find top of wall
-        p1 = wall['p1']
-        p2 = wall['p2']
-        # Y is down, so min Y is the top
-        top_y = min(p1[1], p2[1])
-        top_point = p1 if p1[1] == top_y else p2
-        
-        # 2. Find connected floor
-        connected_floor = None
-        for line in self.lines:
-            if line.get('type') == 'floor':
-                fp1 = line['p1']
-                fp2 = line['p2']
-                if fp1 == top_point or fp2 == top_point:
-                    connected_floor = line
-                    break
-        
-        if not connected_floor:
-            return False
+        # Side of the floor attached to the wall's top, worked out once at map load (LineIndex)
+        floor_side = self.line_index.cliff_side(wall)
 
-        # 3. Check direction of floor relative to wall top
-        fp1 = connected_floor['p1']
-        fp2 = connected_floor['p2']
-        
-        # Find the "other" point of the floor (not the shared top_point)
-        other_point = fp1 if fp2 == top_point else fp2
-        
-        # Check relative X position
-        # If other_point.x < top_point.x, floor is to the LEFT
-        # If other_point.x > top_point.x, floor is to the RIGHT
-        
-        is_floor_left = other_point[0] < top_point[0]
-        is_floor_right = other_point[0] > top_point[0]
-        
         # If moving RIGHT (dx > 0), we want the floor to be on the LEFT (behind us/under us)
-        if dx > 0 and is_floor_left:
+        if dx > 0 and floor_side < 0:
             return True
-            
+
         # If moving LEFT (dx < 0), we want the floor to be on the RIGHT (behind us/under us)
-        if dx < 0 and is_floor_right:
+        if dx < 0 and floor_side > 0:
             return True
-            
+
         return False
 
     def _handle_slope_collision(self):
@@ -462,8 +448,8 @@ class Mob(pygame.sprite.Sprite):
         # case of attacking while on ground
         self.image = self.animation_list[self.action][self.frame_index]
         #check if enough time has passed since the last update
-        if pygame.time.get_ticks() - self.update_time > animation_cooldown:
-            self.update_time = pygame.time.get_ticks()
+        if sim_clock.get_ticks() - self.update_time > animation_cooldown:
+            self.update_time = sim_clock.get_ticks()
             self.frame_index += 1
         #if the animation has run out the reset back to the start
         if self.frame_index >= len(self.animation_list[self.action]):
@@ -473,7 +459,8 @@ class Mob(pygame.sprite.Sprite):
                 self.fade = True
                 self.frame_index = (int)(len(self.animation_list[self.action])) - 1
                 self.alpha = max(0, self.alpha-5)  # alpha should never be < 0.
-                self.image.fill((255, 255, 255, self.alpha), special_flags=pygame.BLEND_RGBA_MULT)
+                # Each step multiplies the opacity again, so the fade speeds up
+                self.fade_opacity *= self.alpha / 255
                 if self.alpha <= 0:  # Kill the sprite when the alpha is <= 0.
                     self.kill()
             else:
@@ -501,8 +488,11 @@ class Mob(pygame.sprite.Sprite):
 
     
     def attack(self):
+        # Same test as pygame.sprite.collide_mask, with the masks built once per frame and shared
+        mask = asset_registry.get_variant(self.image, "mask", pygame.mask.from_surface)
         for player in self.players:  
-            if pygame.sprite.collide_mask(self, player):
+            player_mask = asset_registry.get_variant(player.image, "mask", pygame.mask.from_surface)
+            if mask.overlap(player_mask, (player.rect.x - self.rect.x, player.rect.y - self.rect.y)):
                     player.hit(5)
                     
 
@@ -513,16 +503,45 @@ class Mob(pygame.sprite.Sprite):
             self.action = new_action
             #update the animation settings
             self.frame_index = 0
-            self.update_time = pygame.time.get_ticks()
+            self.update_time = sim_clock.get_ticks()
 
 
-    def draw(self, camera_x=0, camera_y=0):
+    def draw(self, camera_x=0, camera_y=0, render_queue=None, alpha=1.0):
         # Calculate screen position relative to camera
-        screen_x = self.rect.x - camera_x
-        screen_y = self.rect.y - camera_y
-        self.screen.blit(pygame.transform.flip(self.image, self.flip, False), (screen_x, screen_y))
-
+        x, y = self.get_render_pos(alpha)
+        screen_x = x - camera_x
+        screen_y = y - camera_y
+        if render_queue is not None:
+            render_queue.push(self.get_draw_image(), (screen_x, screen_y), LAYER_MOBS)
+        else:
+            self.screen.blit(self.get_draw_image(), (screen_x, screen_y))
+
+    def get_draw_image(self):
+        """Return the current frame facing the right way (mirrored frames are built at load time)."""
+        if not self.flip:
+            frame = self.image
+        else:
+            frame = self.flipped_frames.get(self.image)
+            if frame is None:
+                with asset_registry.lock:
+                    frame = pygame.transform.flip(self.image, True, False)
+        if self.fade:
+            # Shared frames are never modified; dying mobs draw a pre-faded variant
+            level = round(self.fade_opacity * FADE_LEVELS)
+            return asset_registry.get_variant(frame, ("fade", level), build_fade_frame, level)
+        return frame
+
+
+    def kill(self):
+        self.release_assets()
+        pygame.sprite.Sprite.kill(self)
+
+    def release_assets(self):
+        """Give back the shared animation frames held by this mob."""
+        for anim_path, scale in self.acquired_animations:
+            asset_registry.release_animation(anim_path, scale)
+            asset_registry.release_animation(anim_path, scale, flip=True)
+        self.acquired_animations = []
 
     def play_sound(self, dir_name, sound):
-        soundObj = pygame.mixer.Sound(f'sprites/sounds/{dir_name}/{sound}.mp3')
-        soundObj.play()
+        sound_bank.play(dir_name, sound)
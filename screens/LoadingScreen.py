@@ -0,0 +1,23 @@
+from UI.UIElements import ProgressBar
+from screens.Menu import Menu
+from UI.FontRegistry import font_registry, text_cache
+
+class LoadingScreen(Menu):
+    def __init__(self, screen_width, screen_height):
+        super().__init__(screen_width, screen_height)
+        self.title_font = font_registry.get("Arial", 40, bold=True)
+
+        bar_width = 500
+        bar_height = 30
+        self.progress_bar = ProgressBar(self.width // 2 - bar_width // 2, self.height // 2 + 20, bar_width, bar_height)
+        self.ui_elements.append(self.progress_bar)
+
+    def set_progress(self, fraction):
+        self.progress_bar.set_progress(fraction)
+
+    def draw_background(self, screen):
+        screen.fill((230, 240, 255))
+
+        title_surf = text_cache.render(self.title_font, "Loading...", (0, 0, 0))
+        title_rect = title_surf.get_rect(center=(self.width // 2, self.height // 2 - 40))
+        screen.blit(title_surf, title_rect)
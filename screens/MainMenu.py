@@ -1,19 +1,20 @@
 import pygame
 from UI.UIElements import Button, Label
+from screens.Menu import Menu
+from UI.FontRegistry import font_registry
 
-class MainMenu:
+class MainMenu(Menu):
     def __init__(self, screen_width, screen_height, on_singleplayer, on_multiplayer, on_settings, on_quit):
-        self.width = screen_width
-        self.height = screen_height
+        super().__init__(screen_width, screen_height)
         self.on_singleplayer = on_singleplayer
         self.on_multiplayer = on_multiplayer
         self.on_settings = on_settings
         self.on_quit = on_quit
         
-        self.font = pygame.font.SysFont("Arial", 30, bold=True)
-        self.title_font = pygame.font.SysFont("Arial", 60, bold=True)
+        self.font = font_registry.get("Arial", 30, bold=True)
+        self.title_font = font_registry.get("Arial", 60, bold=True)
         
-        self.buttons = []
+        self.buttons = self.ui_elements
         self.setup_ui()
 
     def setup_ui(self):
@@ -34,11 +35,7 @@ class MainMenu:
         self.buttons.append(Button(center_x, start_y + (btn_height + spacing) * 2, btn_width, btn_height, "Settings", self.font, action=self.on_settings, bg_color=btn_bg, hover_color=btn_hover, border_color=btn_border))
         self.buttons.append(Button(center_x, start_y + (btn_height + spacing) * 3, btn_width, btn_height, "Quit Game", self.font, action=self.on_quit, bg_color=(200, 50, 50), hover_color=(230, 70, 70), border_color=(150, 30, 30)))
 
-    def update(self, virtual_mouse_pos, events):
-        for btn in self.buttons:
-            btn.update_with_mouse(virtual_mouse_pos, events)
-
-    def draw(self, screen):
+    def draw_background(self, screen):
         # Draw background
         try:
             bg_img = pygame.image.load('sprites/backgrounds/menu_bg.png').convert()
@@ -56,7 +53,3 @@ class MainMenu:
         title_rect = title_surf.get_rect(center=(self.width // 2, self.height // 4))
         screen.blit(title_shadow, (title_rect.x + 4, title_rect.y + 4))
         screen.blit(title_surf, title_rect)
-        
-        # Draw Buttons
-        for btn in self.buttons:
-            btn.draw(screen)
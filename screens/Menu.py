@@ -0,0 +1,61 @@
+import pygame
+
+
+class Menu:
+    """
+    Base class for menu screens.
+
+    Subclasses paint their static art (background image, panels, titles) in
+    draw_background() and keep their widgets in self.ui_elements. The static
+    layer is rendered once and cached, so after the first full draw only the
+    widgets that changed need to be repainted (see get_dirty_rects/redraw).
+    """
+
+    def __init__(self, screen_width, screen_height):
+        self.width = screen_width
+        self.height = screen_height
+        self.ui_elements = []
+        self.background = None
+
+    def draw_background(self, screen):
+        """Draw everything that never changes while the menu is shown."""
+        pass
+
+    def get_background(self, screen):
+        if self.background is None:
+            self.background = pygame.Surface((self.width, self.height), 0, screen)
+            self.background.fill((0, 0, 0))
+            self.draw_background(self.background)
+        return self.background
+
+    def update(self, virtual_mouse_pos, events):
+        for element in self.ui_elements:
+            if hasattr(element, 'update_with_mouse'):
+                element.update_with_mouse(virtual_mouse_pos, events)
+
+    def draw(self, screen):
+        """Full redraw of the menu."""
+        screen.blit(self.get_background(screen), (0, 0))
+        for element in self.ui_elements:
+            element.draw(screen)
+            element.dirty = False
+
+    def get_dirty_rects(self):
+        """Return the areas of widgets that changed since the last draw and clear their flags."""
+        rects = []
+        for element in self.ui_elements:
+            if element.dirty:
+                rects.append(element.get_dirty_rect())
+                element.dirty = False
+        return rects
+
+    def redraw(self, screen, rects):
+        """Repaint only the given areas: the cached background plus any widget overlapping them."""
+        background = self.get_background(screen)
+        for rect in rects:
+            screen.set_clip(rect)
+            screen.blit(background, rect, rect)
+            for element in self.ui_elements:
+                if element.get_dirty_rect().colliderect(rect):
+                    element.draw(screen)
+        screen.set_clip(None)
@@ -1,19 +1,19 @@
 import pygame
 from UI.UIElements import Button, TextInput, Label
+from screens.Menu import Menu
+from UI.FontRegistry import font_registry
 
-class MultiplayerMenu:
+class MultiplayerMenu(Menu):
     def __init__(self, screen_width, screen_height, on_connect, on_back, default_username="", default_ip=""):
-        self.width = screen_width
-        self.height = screen_height
+        super().__init__(screen_width, screen_height)
         self.on_connect = on_connect
         self.on_back = on_back
         self.default_username = default_username
         self.default_ip = default_ip
         
-        self.font = pygame.font.SysFont("Arial", 24)
-        self.title_font = pygame.font.SysFont("Arial", 40, bold=True)
+        self.font = font_registry.get("Arial", 24)
+        self.title_font = font_registry.get("Arial", 40, bold=True)
         
-        self.ui_elements = []
         self.username_input = None
         self.ip_input = None
         
@@ -50,12 +50,7 @@ class MultiplayerMenu:
         if username and ip:
             self.on_connect(username, ip)
 
-    def update(self, virtual_mouse_pos, events):
-        for element in self.ui_elements:
-            if hasattr(element, 'update_with_mouse'):
-                element.update_with_mouse(virtual_mouse_pos, events)
-
-    def draw(self, screen):
+    def draw_background(self, screen):
         # Draw background
         try:
             bg_img = pygame.image.load('sprites/backgrounds/menu_bg.png').convert()
@@ -78,6 +73,3 @@ class MultiplayerMenu:
         title_rect = title_surf.get_rect(center=(self.width // 2, self.height // 6))
         screen.blit(title_shadow, (title_rect.x + 3, title_rect.y + 3))
         screen.blit(title_surf, title_rect)
-        
-        for element in self.ui_elements:
-            element.draw(screen)
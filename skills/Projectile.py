@@ -1,7 +1,53 @@
-
 import pygame
+from entities.Entity import Entity
+from utils.AssetRegistry import asset_registry
+
+# Rotating projectiles spin this many degrees per update, so every angle they
+# reach is a multiple of it.
+ROTATION_STEP = 10
+
+
+class RotationTable:
+    """
+    Shared rotated frames for one projectile image.
+
+    Each of the 360 / ROTATION_STEP angles is kept in both facings together with
+    the offset from the sprite's center to the frame's top-left corner. Frames
+    are rotated the first time they are asked for and reused by every projectile
+    of that type afterwards, so spinning becomes a table lookup.
+    """
+    tables = {}
 
-class Projectile(pygame.sprite.Sprite):
+    def __init__(self, image):
+        self.image = image
+        self.steps = 360 // ROTATION_STEP
+        self.frames = {False: [None] * self.steps, True: [None] * self.steps}
+        self.offsets = {False: [None] * self.steps, True: [None] * self.steps}
+        self.bases = {False: image, True: pygame.transform.flip(image, True, False)}
+
+    @classmethod
+    def get(cls, projectile_name):
+        table = cls.tables.get(projectile_name)
+        if table is None:
+            # Tables live for the whole process, so they hold on to their image
+            image = asset_registry.acquire_image(f'sprites/projectiles/{projectile_name}/0.png')
+            table = cls(image)
+            cls.tables[projectile_name] = table
+        return table
+
+    def lookup(self, angle, flip=False):
+        """Return (frame, offset) for the given angle in degrees."""
+        step = int(round(angle / ROTATION_STEP)) % self.steps
+        frame = self.frames[flip][step]
+        if frame is None:
+            with asset_registry.lock:
+                frame = pygame.transform.rotate(self.bases[flip], step * ROTATION_STEP)
+            self.frames[flip][step] = frame
+            self.offsets[flip][step] = (frame.get_width() // 2, frame.get_height() // 2)
+        return frame, self.offsets[flip][step]
+
+
+class Projectile(pygame.sprite.Sprite, Entity):
     def __init__(self, x, y, direction, speed, isRotate, projectile_name, damage, hit_count):
         pygame.sprite.Sprite.__init__(self)
         if direction == 1:
@@ -9,10 +55,9 @@ class Projectile(pygame.sprite.Sprite):
         else:
             self.flip = False
         self.projectile_name = projectile_name
-        self.original_image = pygame.image.load(f'sprites/projectiles/{self.projectile_name}/0.png').convert_alpha()
-        self.image = self.original_image  # This will reference our rotated image.
-        self.image = pygame.transform.flip(self.image, self.flip, False)
-        self.rect = self.image.get_rect()
+        self.rotation_table = RotationTable.get(self.projectile_name)
+        self.original_image = self.rotation_table.image
+        self.image, _ = self.rotation_table.lookup(0, self.flip)  # This will reference our rotated image.
         self.rect = self.image.get_rect()
         self.rect.center = (x,y)
         self.angle = 0 # Always initialize angle
@@ -49,10 +94,10 @@ class Projectile(pygame.sprite.Sprite):
             self.kill()
 
     def rotate(self):
-        self.image = pygame.transform.rotate(self.original_image, self.angle)
-        self.angle += 10 % 360  # Value will reapeat after 359. This prevents angle to overflow.
+        self.image, (offset_x, offset_y) = self.rotation_table.lookup(self.angle)
+        self.angle += ROTATION_STEP % 360  # Value will reapeat after 359. This prevents angle to overflow.
         x, y = self.rect.center  # Save its current center.
-        self.rect = self.image.get_rect()  # Replace old rect with new rect.
-        self.rect.center = (x, y)  # Put the new rect's center at old center.
+        self.rect.size = self.image.get_size()  # Resize the rect to the new frame.
+        self.rect.topleft = (x - offset_x, y - offset_y)  # Put the new rect's center at old center.
 
  
\ No newline at end of file
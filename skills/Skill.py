@@ -1,5 +1,6 @@
 import pygame
-import os
+from utils.AssetRegistry import asset_registry
+from utils.SimClock import sim_clock
 
 class Skill(pygame.sprite.Sprite):
     def __init__(self, x, y, direction, skill):
@@ -8,7 +9,6 @@ class Skill(pygame.sprite.Sprite):
         self.skill_name = skill
         self.frame_index = 0
         self.x = x
-        self.animation_list = []
         # Used to flip the sprites by direction
         if direction == 1:
             self.flip = True
@@ -16,19 +16,32 @@ class Skill(pygame.sprite.Sprite):
             self.flip = False
 
 
-        num_of_frames = len(os.listdir(f'sprites/skills/{skill}'))
-        for i in range(num_of_frames):
-                img = pygame.image.load(f'sprites/skills/{skill}/{i}.png').convert_alpha()
-                img = pygame.transform.scale(img, (int(img.get_width()), int(img.get_height())))
-                img = pygame.transform.flip(img, self.flip, False)
-                self.animation_list.append(img)
+        self.animation_list = Skill.load_frames(skill)[self.flip]
+        asset_registry.acquire_animation(f'sprites/skills/{skill}', flip=self.flip)
         self.image = self.animation_list[self.frame_index]
         self.rect = self.image.get_rect()
         self.rect.center = (x, y)
         self.direction = direction
-        self.update_time = pygame.time.get_ticks()
+        self.update_time = sim_clock.get_ticks()
 
 
+    @staticmethod
+    def load_frames(skill):
+        """Return a skill's shared frames in both facings: {False: frames, True: mirrored frames}."""
+        path = f'sprites/skills/{skill}'
+        frames = {
+            False: asset_registry.get_animation(path),
+            True: asset_registry.get_animation(path, flip=True),
+        }
+        if frames[False] is None:
+            raise FileNotFoundError(f"Skill animation not found: {path}")
+        return frames
+
+    def kill(self):
+        if self.alive():
+            asset_registry.release_animation(f'sprites/skills/{self.skill}', flip=self.flip)
+        pygame.sprite.Sprite.kill(self)
+
     def update(self, player):
         # self.rect.x = player.rect.x + (self.direction * -25)
         self.update_animation()
@@ -39,8 +52,8 @@ class Skill(pygame.sprite.Sprite):
         #update image depending on current frame
         self.image = self.animation_list[self.frame_index]
         #check if enough time has passed since the last update
-        if pygame.time.get_ticks() - self.update_time > animation_cooldown:
-            self.update_time = pygame.time.get_ticks()
+        if sim_clock.get_ticks() - self.update_time > animation_cooldown:
+            self.update_time = sim_clock.get_ticks()
             self.frame_index += 1
         #if the animation has run out the reset back to the start
         if self.frame_index >= len(self.animation_list):
@@ -0,0 +1,246 @@
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+import pygame
+
+from utils.SpriteAtlas import AtlasIndex
+
+
+def surface_bytes(surface):
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+
+class AssetEntry:
+    def __init__(self, surface, atlas=None):
+        self.surface = surface
+        self.refcount = 0
+        # Frames of an atlas share its sheet's pixels: the sheet is charged once, while any
+        # of its frames is cached (see AssetRegistry.sheet_users)
+        self.atlas = atlas
+        self.size = 0 if atlas is not None else surface_bytes(surface)
+
+
+class AssetRegistry:
+    """
+    Process-wide cache of sprite surfaces shared by every entity.
+
+    Images are keyed by (path, scale, flip) and loaded from disk only the first
+    time they are requested; every entity that asks for the same key receives
+    the same surface, so the surfaces must be treated as read-only (copy before
+    drawing onto one). Directory listings used to count animation frames are
+    cached too, so once an animation has been loaded (or preloaded at map load)
+    spawning another entity with it never touches the filesystem. Frames packed
+    by build_atlases.py are served as subsurfaces of their atlas sheet instead
+    of being decoded one file at a time.
+
+    Entities acquire what they keep and release it when they die. If a
+    memory limit is set, entries nobody holds are evicted least recently used
+    first once the cached surfaces exceed it. An atlas sheet counts towards the
+    limit while any of its frames is cached and is unloaded with the last one.
+    """
+
+    def __init__(self, memory_limit=None):
+        self.entries = OrderedDict()  # (path, scale, flip) -> AssetEntry
+        self.frame_counts = {}  # animation directory -> number of frames (None if missing)
+        self.memory_limit = memory_limit  # bytes, None means unlimited
+        self.memory_used = 0
+        self.pinned = []  # (directory, scale, flip) held by preload_animation until released
+        self.sheet_users = {}  # SpriteAtlas -> number of cached entries that are frames of its sheet
+        self.atlases = None  # AtlasIndex, read on first use
+        self.variants = weakref.WeakKeyDictionary()  # frame -> {variant key: derived surface}
+        # Held while deriving surfaces from shared frames. Atlas frames are subsurfaces, and
+        # pygame locks the whole sheet to read one, so a thread blitting shared frames
+        # (pipelined rendering) must not overlap with a derivation.
+        self.lock = threading.RLock()
+
+    def set_memory_limit(self, memory_limit):
+        self.memory_limit = memory_limit
+        self.evict()
+
+    def get_image(self, path, scale=1, flip=False):
+        """Return the shared surface for path without taking a reference."""
+        surface = self._get_entry(path, scale, flip).surface
+        self.evict()
+        return surface
+
+    def acquire_image(self, path, scale=1, flip=False):
+        """Return the shared surface for path and hold a reference to it."""
+        entry = self._get_entry(path, scale, flip)
+        entry.refcount += 1
+        self.evict()
+        return entry.surface
+
+    def release_image(self, path, scale=1, flip=False):
+        entry = self.entries.get((path, scale, flip))
+        if entry is not None and entry.refcount > 0:
+            entry.refcount -= 1
+        self.evict()
+
+    def _get_entry(self, path, scale, flip):
+        key = (path, scale, flip)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            return entry
+
+        atlas = None
+        with self.lock:
+            if scale == 1 and not flip:
+                atlas = self.get_atlases().get_atlas(path)
+                surface = atlas.get_frame(path) if atlas is not None else None
+                if surface is None:
+                    atlas = None
+                    surface = pygame.image.load(path).convert_alpha()
+            else:
+                surface = self._get_entry(path, 1, False).surface
+                if scale != 1:
+                    surface = pygame.transform.scale(surface, (int(surface.get_width() * scale), int(surface.get_height() * scale)))
+                if flip:
+                    surface = pygame.transform.flip(surface, True, False)
+
+        entry = AssetEntry(surface, atlas)
+        self.entries[key] = entry
+        self.memory_used += entry.size
+        if atlas is not None:
+            users = self.sheet_users.get(atlas, 0)
+            if users == 0:
+                self.memory_used += surface_bytes(atlas.sheet)
+            self.sheet_users[atlas] = users + 1
+        return entry
+
+    def get_variant(self, surface, key, build, *args):
+        """
+        Return a surface derived from a shared frame (e.g. a tinted copy), calling
+        build(surface, *args) only the first time the (surface, key) pair is asked for.
+        Variants live as long as the frame they were derived from.
+        """
+        variants = self.variants.get(surface)
+        if variants is None:
+            variants = self.variants[surface] = {}
+        variant = variants.get(key)
+        if variant is None:
+            with self.lock:
+                variant = variants[key] = build(surface, *args)
+        return variant
+
+    def get_atlases(self):
+        if self.atlases is None:
+            self.atlases = AtlasIndex()
+        return self.atlases
+
+    def count_frames(self, directory):
+        """Number of frames in an animation folder, or None if it does not exist."""
+        if directory not in self.frame_counts:
+            packed_count = self.get_atlases().count_frames(directory)
+            if packed_count is not None:
+                self.frame_counts[directory] = packed_count
+            elif os.path.isdir(directory):
+                self.frame_counts[directory] = len([f for f in os.listdir(directory) if f.endswith('.png')])
+            else:
+                self.frame_counts[directory] = None
+        return self.frame_counts[directory]
+
+    def get_animation(self, directory, scale=1, flip=False):
+        """Return the frames 0.png..N.png of an animation folder (None if missing) without taking references."""
+        num_of_frames = self.count_frames(directory)
+        if num_of_frames is None:
+            return None
+        return [self.get_image(f'{directory}/{i}.png', scale, flip) for i in range(num_of_frames)]
+
+    def acquire_animation(self, directory, scale=1, flip=False):
+        """Like get_animation, but holds a reference to every frame."""
+        num_of_frames = self.count_frames(directory)
+        if num_of_frames is None:
+            return None
+        return [self.acquire_image(f'{directory}/{i}.png', scale, flip) for i in range(num_of_frames)]
+
+    def release_animation(self, directory, scale=1, flip=False):
+        num_of_frames = self.count_frames(directory)
+        if num_of_frames is None:
+            return
+        for i in range(num_of_frames):
+            self.release_image(f'{directory}/{i}.png', scale, flip)
+
+    def decode_animation(self, directory):
+        """
+        Read an animation's frames from disk without converting them, for a loader thread.
+
+        Atlas sheets are decoded in place; loose frames that aren't cached yet are
+        returned as {path: surface} to be handed to store_decoded() on the main thread.
+        """
+        decoded = {}
+        num_of_frames = self.count_frames(directory)
+        if num_of_frames is None:
+            return decoded
+        atlases = self.get_atlases()
+        for i in range(num_of_frames):
+            path = f'{directory}/{i}.png'
+            atlas = atlases.get_atlas(path)
+            if atlas is not None:
+                atlas.decode()
+            elif (path, 1, False) not in self.entries:
+                decoded[path] = pygame.image.load(path)
+        return decoded
+
+    def store_decoded(self, decoded):
+        """Convert frames returned by decode_animation and cache them (main thread only)."""
+        for path, surface in decoded.items():
+            key = (path, 1, False)
+            if key not in self.entries:
+                entry = AssetEntry(surface.convert_alpha())
+                self.entries[key] = entry
+                self.memory_used += entry.size
+        self.evict()
+
+    def preload_animation(self, directory, scale=1, flip_variants=(False, True)):
+        """
+        Load an animation ahead of time (e.g. at map load) so spawning is free later.
+
+        The frames are held (so the memory limit never evicts them) until the
+        pins are handed back with release_pinned().
+        """
+        for flip in flip_variants:
+            if self.acquire_animation(directory, scale, flip) is not None:
+                self.pinned.append((directory, scale, flip))
+
+    def take_pinned(self):
+        """The pins taken by preload_animation so far; later preloads start a new list."""
+        pinned = self.pinned
+        self.pinned = []
+        return pinned
+
+    def release_pinned(self, pinned):
+        """Release pins returned by take_pinned() (e.g. the previous map's, once the next one is loaded)."""
+        for directory, scale, flip in pinned:
+            self.release_animation(directory, scale, flip)
+
+    def evict(self):
+        """Drop unreferenced entries, least recently used first, until under the memory limit."""
+        if self.memory_limit is None or self.memory_used <= self.memory_limit:
+            return
+        for key in list(self.entries):
+            if self.memory_used <= self.memory_limit:
+                break
+            entry = self.entries[key]
+            if entry.refcount == 0:
+                del self.entries[key]
+                self.memory_used -= entry.size
+                if entry.atlas is not None:
+                    self._release_sheet(entry.atlas)
+
+    def _release_sheet(self, atlas):
+        """One cached frame of atlas fewer; the sheet goes with the last one."""
+        users = self.sheet_users[atlas] - 1
+        if users:
+            self.sheet_users[atlas] = users
+            return
+        del self.sheet_users[atlas]
+        self.memory_used -= surface_bytes(atlas.sheet)
+        with self.lock:
+            atlas.unload()
+
+
+# Shared by every entity in the process
+asset_registry = AssetRegistry()
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import threading
+
+import pygame
+
+CACHE_DIR = "cache"
+# Bump when the format of anything stored here changes
+CACHE_VERSION = 1
+
+
+class DerivedCache:
+    """
+    Results computed from asset files (tile collision metadata, scaled
+    backgrounds), kept on disk between launches.
+
+    Entries are named after the SHA-1 of the source file, so an edited sprite
+    simply misses. Hashes are remembered per path together with the file's
+    mtime and size; while those match the file isn't even read. Callers put
+    whatever parameters the result depends on (scale, tile size) into `kind`.
+    Safe to use from loader threads. Files are written in place: a truncated
+    one (crash mid-write) fails to parse or has the wrong size and is rebuilt.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.index = None  # source path -> [mtime_ns, size, sha1]
+        self.index_changed = False
+        self.lock = threading.Lock()
+
+    def source_hash(self, path):
+        stat = os.stat(path)
+        with self.lock:
+            if self.index is None:
+                self.index = self.load_index()
+            known = self.index.get(path)
+            if known is not None and known[0] == stat.st_mtime_ns and known[1] == stat.st_size:
+                return known[2]
+        with open(path, "rb") as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+        with self.lock:
+            self.index[path] = [stat.st_mtime_ns, stat.st_size, digest]
+            self.index_changed = True
+        return digest
+
+    def load_index(self):
+        try:
+            with open(self.index_path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != CACHE_VERSION:
+            return {}
+        return data.get("sources", {})
+
+    def flush(self):
+        """Write the hashes learned since the last flush; call after loading a batch of assets."""
+        with self.lock:
+            if self.index_changed:
+                self.save_index()
+                self.index_changed = False
+
+    def save_index(self):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(self.index_path, "w") as f:
+                json.dump({"version": CACHE_VERSION, "sources": self.index}, f)
+        except OSError as e:
+            print(f"[DerivedCache] Could not write {self.index_path}: {e}")
+
+    def entry_path(self, kind, source_path, extension):
+        return os.path.join(self.cache_dir, kind, f"{self.source_hash(source_path)}.{extension}")
+
+    def write(self, path, data, mode):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, mode) as f:
+                if mode == "w":
+                    json.dump(data, f)
+                else:
+                    f.write(data)
+        except OSError as e:
+            print(f"[DerivedCache] Could not write {path}: {e}")
+
+    def get_json(self, kind, source_path, build, *args):
+        """build(*args) the first time, the stored result (as loaded by json) afterwards."""
+        path = self.entry_path(kind, source_path, "json")
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+        data = build(*args)
+        self.write(path, data, "w")
+        # Hand out what a warm start would get (e.g. tuples become lists)
+        return json.loads(json.dumps(data))
+
+    def get_image(self, kind, source_path, build, *args):
+        """
+        Surface returned by build(*args), stored as raw RGBA pixels: reading
+        those back is several times faster than decoding and scaling the PNG.
+        The surface isn't converted, so it can be made on a loader thread.
+        """
+        path = self.entry_path(kind, source_path, "rgba")
+        try:
+            with open(path, "rb") as f:
+                width = int.from_bytes(f.read(4), "little")
+                height = int.from_bytes(f.read(4), "little")
+                pixels = f.read()
+            if len(pixels) == width * height * 4:
+                return pygame.image.frombytes(pixels, (width, height), "RGBA")
+        except OSError:
+            pass
+        surface = build(*args)
+        if surface is not None:
+            if surface.get_colorkey() is not None:
+                # Bake the colorkey into the alpha channel like convert_alpha would
+                keyed = surface
+                surface = pygame.Surface(keyed.get_size(), pygame.SRCALPHA)
+                surface.blit(keyed, (0, 0))
+            header = surface.get_width().to_bytes(4, "little") + surface.get_height().to_bytes(4, "little")
+            self.write(path, header + pygame.image.tobytes(surface, "RGBA"), "wb")
+        return surface
+
+
+# Shared by the game, the map loader and the map editor
+derived_cache = DerivedCache()
@@ -0,0 +1,199 @@
+import csv
+import threading
+import time
+from collections import deque
+
+import pygame
+
+from UI.FontRegistry import font_registry
+
+# Display order of the overlay and column order of the CSV
+SECTIONS = [
+    "draw_bg",
+    "mob_update",
+    "mob_draw",
+    "player_update",
+    "projectiles",
+    "network",
+    "sprites",
+    "hud",
+    "cursor",
+    "scale",
+    "present",
+]
+
+
+class _NullSection:
+    """Shared no-op context manager handed out while the profiler is off."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SECTION = _NullSection()
+
+
+class _Section:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        # Sections of a thread that is capturing go to its own dict (see begin_capture)
+        current = getattr(self.profiler.capture, "sections", None)
+        if current is None:
+            current = self.profiler.current
+        current[self.name] = current.get(self.name, 0.0) + time.perf_counter() - self.start
+        return False
+
+
+class FrameProfiler:
+    """
+    Rolling per-frame timings of the game loop's subsystems.
+
+    Wrap work in `with profiler.section("name"):`; a section entered several
+    times in one frame (e.g. once per simulation step) is summed. While disabled
+    section() returns a shared no-op object and nothing is recorded. F3 in game
+    toggles the overlay (p50/p99 per section plus a frame-time graph), F4 writes
+    the recorded frames to a CSV file.
+
+    Only the main thread records into the current frame. Another thread (the
+    pipelined simulation) wraps its work in begin_capture()/end_capture() and
+    the main thread adds the result to the frame that presents it (merge()).
+    """
+
+    def __init__(self, history=300, overlay_refresh=15):
+        self.enabled = False
+        self.show_overlay = False
+        self.history = history
+        self.frames = deque(maxlen=history)  # (frame_ms, {section: ms})
+        self.current = {}
+        self.capture = threading.local()
+        self.frame_start = None
+        self.overlay_refresh = overlay_refresh  # frames between overlay text updates
+        self.overlay = None
+        self.frames_since_overlay = 0
+        self.font = None
+
+    def toggle(self):
+        if self.enabled:
+            self.enabled = False
+        else:
+            self.enable()
+
+    def enable(self, history=None, show_overlay=True):
+        """Start recording from scratch, optionally keeping a different number of frames."""
+        if history is not None:
+            self.history = history
+        self.enabled = True
+        self.show_overlay = show_overlay
+        self.frames = deque(maxlen=self.history)
+        self.current = {}
+        self.frame_start = None
+        self.overlay = None
+
+    def section(self, name):
+        if not self.enabled:
+            return NULL_SECTION
+        return _Section(self, name)
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            sections = {name: seconds * 1000 for name, seconds in self.current.items()}
+            self.frames.append(((now - self.frame_start) * 1000, sections))
+        self.frame_start = now
+        self.current = {}
+
+    def begin_capture(self):
+        """Record this thread's sections into a dict of their own until end_capture()."""
+        self.capture.sections = {}
+
+    def end_capture(self):
+        """Stop capturing on this thread and return {section: seconds}."""
+        sections = self.capture.sections
+        self.capture.sections = None
+        return sections
+
+    def merge(self, sections):
+        """Add sections captured on another thread to the current frame (main thread only)."""
+        if not self.enabled or not sections:
+            return
+        for name, seconds in sections.items():
+            self.current[name] = self.current.get(name, 0.0) + seconds
+
+    @staticmethod
+    def percentile(values, fraction):
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def get_stats(self):
+        """[(name, p50_ms, p99_ms)] for the whole frame followed by every section."""
+        stats = [("frame",
+                  self.percentile([frame_ms for frame_ms, _ in self.frames], 0.5),
+                  self.percentile([frame_ms for frame_ms, _ in self.frames], 0.99))]
+        for name in SECTIONS:
+            values = [sections.get(name, 0.0) for _, sections in self.frames]
+            stats.append((name, self.percentile(values, 0.5), self.percentile(values, 0.99)))
+        return stats
+
+    def draw(self, surface):
+        if not (self.enabled and self.show_overlay):
+            return
+        # The text only changes a few times a second; the graph is cheap enough to redraw
+        self.frames_since_overlay += 1
+        if self.overlay is None or self.frames_since_overlay >= self.overlay_refresh:
+            self.overlay = self.render_overlay()
+            self.frames_since_overlay = 0
+        surface.blit(self.overlay, (10, 10))
+        self.draw_graph(surface, pygame.Rect(10, 20 + self.overlay.get_height(), self.history, 60))
+
+    def render_overlay(self):
+        if self.font is None:
+            self.font = font_registry.get("Arial", 12)
+        lines = [f"{'section':<14}{'p50':>8}{'p99':>8}"]
+        for name, p50, p99 in self.get_stats():
+            lines.append(f"{name:<14}{p50:>8.2f}{p99:>8.2f}")
+        line_height = self.font.get_linesize()
+        overlay = pygame.Surface((230, line_height * len(lines) + 8), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 170))
+        for i, line in enumerate(lines):
+            # Numbers change every refresh, so they bypass the shared text cache
+            overlay.blit(self.font.render(line, True, (255, 255, 255)), (6, 4 + i * line_height))
+        return overlay
+
+    def draw_graph(self, surface, rect):
+        pygame.draw.rect(surface, (0, 0, 0), rect)
+        # 33.3ms (30 fps) is the top of the graph, the line marks 16.7ms (60 fps)
+        scale = rect.height / 33.3
+        target_y = rect.bottom - int(16.7 * scale)
+        pygame.draw.line(surface, (80, 80, 80), (rect.left, target_y), (rect.right - 1, target_y))
+        for i, (frame_ms, _) in enumerate(self.frames):
+            height = min(rect.height, int(frame_ms * scale))
+            color = (0, 200, 0) if frame_ms <= 16.7 else (220, 60, 60)
+            x = rect.left + i
+            pygame.draw.line(surface, color, (x, rect.bottom - 1), (x, rect.bottom - height))
+
+    def export_csv(self, path="frame_profile.csv"):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame_ms"] + SECTIONS)
+            for frame_ms, sections in self.frames:
+                writer.writerow([f"{frame_ms:.3f}"] + [f"{sections.get(name, 0.0):.3f}" for name in SECTIONS])
+        print(f"[FrameProfiler] Wrote {len(self.frames)} frames to {path}")
+        return path
+
+
+# Shared by the game loop and everything it calls
+frame_profiler = FrameProfiler()
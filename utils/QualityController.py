@@ -0,0 +1,66 @@
+# (background_scale, skip_animated_backgrounds, skip_parallax_backgrounds), best first
+QUALITY_LEVELS = [
+    (1.0, False, False),
+    (0.75, False, False),
+    (0.5, False, False),
+    (0.5, True, True),
+]
+
+
+class QualityController:
+    """
+    Lowers the background quality while frames take too long and raises it again once they are fast.
+
+    The game loop feeds it the busy part of every frame (Clock.get_rawtime, so
+    the time spent sleeping to cap the fps is not counted). Every sample_frames
+    frames the average is compared with the two thresholds; the gap between them
+    keeps it from flipping back and forth between two levels.
+    """
+
+    def __init__(self, enabled=True, downgrade_ms=16.7, upgrade_ms=10.0, sample_frames=60):
+        self.enabled = enabled
+        self.downgrade_ms = downgrade_ms
+        self.upgrade_ms = upgrade_ms
+        self.sample_frames = sample_frames
+        self.level = 0
+        self.total_ms = 0.0
+        self.samples = 0
+
+    @classmethod
+    def from_settings(cls, settings_manager):
+        return cls(
+            settings_manager.get_setting("adaptive_quality", True),
+            settings_manager.get_setting("quality_downgrade_ms", 16.7),
+            settings_manager.get_setting("quality_upgrade_ms", 10.0),
+            settings_manager.get_setting("quality_sample_frames", 60),
+        )
+
+    def set_level(self, level):
+        self.level = max(0, min(len(QUALITY_LEVELS) - 1, level))
+        self.total_ms = 0.0
+        self.samples = 0
+
+    def sample(self, frame_ms):
+        if not self.enabled:
+            return
+        self.total_ms += frame_ms
+        self.samples += 1
+        if self.samples < self.sample_frames:
+            return
+        average = self.total_ms / self.samples
+        if average > self.downgrade_ms and self.level < len(QUALITY_LEVELS) - 1:
+            self.set_level(self.level + 1)
+            print(f"[QualityController] {average:.1f}ms per frame, quality level {self.level}")
+        elif average < self.upgrade_ms and self.level > 0:
+            self.set_level(self.level - 1)
+            print(f"[QualityController] {average:.1f}ms per frame, quality level {self.level}")
+        else:
+            self.total_ms = 0.0
+            self.samples = 0
+
+    def apply(self, game_map):
+        """Set the map's background quality to the current level."""
+        scale, skip_animated, skip_parallax = QUALITY_LEVELS[self.level]
+        game_map.background_scale = scale
+        game_map.skip_animated_backgrounds = skip_animated
+        game_map.skip_parallax_backgrounds = skip_parallax
@@ -0,0 +1,38 @@
+from operator import itemgetter
+
+# Draw order of the world, lowest first. Sprites on the same layer keep the
+# order they were pushed in.
+LAYER_MOBS = 10
+LAYER_HEALTH_BARS = 20
+LAYER_PLAYERS = 30
+LAYER_PROJECTILES = 40
+LAYER_SKILLS = 50
+LAYER_NAMEPLATES = 60
+
+
+class RenderQueue:
+    """
+    Collects (surface, position, layer) for a frame and draws them all at once.
+
+    flush() sorts by layer (stable, so push order is kept within a layer) and
+    hands everything to a single Surface.blits call instead of one blit per
+    sprite.
+    """
+
+    def __init__(self, surface):
+        self.surface = surface
+        self.items = []
+
+    def push(self, image, pos, layer=0):
+        self.items.append((layer, image, pos))
+
+    def take(self):
+        """Return the queued (surface, position) pairs in draw order and empty the queue."""
+        self.items.sort(key=itemgetter(0))
+        sprites = [(image, pos) for _, image, pos in self.items]
+        self.items.clear()
+        return sprites
+
+    def flush(self):
+        if self.items:
+            self.surface.blits(self.take(), doreturn=False)
@@ -9,7 +9,20 @@ class SettingsManager:
             "last_ip": "127.0.0.1",
             "fullscreen": False,
             "window_width": 1024,
-            "window_height": 576
+            "window_height": 576,
+            # Cap for cached sprite surfaces in MB (None = unlimited)
+            "asset_memory_limit_mb": None,
+            # Simulate on a second thread while the previous frame is presented
+            "pipelined_rendering": False,
+            # Lower background resolution while frames take longer than quality_downgrade_ms
+            "adaptive_quality": True,
+            "quality_downgrade_ms": 16.7,
+            "quality_upgrade_ms": 10.0,
+            "quality_sample_frames": 60,
+            # Keep only the collision data around the players/camera loaded (for very large maps)
+            "map_streaming": False,
+            "map_chunk_radius": 1,
+            "map_chunk_prefetch": 1
         }
         self.settings = self.load_settings()
 
@@ -0,0 +1,22 @@
+class SimClock:
+    """
+    Simulation time in milliseconds.
+
+    The game loop advances it once per fixed simulation step, so animation
+    timers follow simulated time instead of the wall clock and behave the same
+    at any frame rate (or when the simulation runs faster than real time).
+    """
+
+    def __init__(self):
+        self.time = 0.0
+
+    def advance(self, ms):
+        self.time += ms
+
+    def get_ticks(self):
+        """Drop-in for pygame.time.get_ticks()."""
+        return int(self.time)
+
+
+# Shared by the game loop and every entity
+sim_clock = SimClock()
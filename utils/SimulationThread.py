@@ -0,0 +1,86 @@
+import threading
+from collections import namedtuple
+
+from utils.FrameProfiler import frame_profiler
+
+# Everything the main thread needs to present one simulated tick. Built on the
+# simulation thread and never modified afterwards.
+RenderSnapshot = namedtuple("RenderSnapshot", [
+    "camera",
+    "sprites",
+    "hud",
+    "game_map",  # the map the tick ran on, and its background animation clock at that tick
+    "animation_time",
+    "sections",  # profiler section times of the tick, merged into the frame that presents it
+])
+# The values GameUI shows, copied from the local player
+HudStats = namedtuple("HudStats", ["level", "health", "max_health", "mana", "max_mana", "exp", "max_exp"])
+
+
+class SimulationThread(threading.Thread):
+    """
+    Runs Game.advance (fixed simulation steps and networking) off the main thread.
+
+    Each frame the main thread calls exchange() with the frame time and input
+    events: it gets back the snapshot of the previous tick and the thread starts
+    on the next one, so simulating tick N+1 overlaps presenting tick N. The two
+    snapshot slots are swapped when a tick is done; the main thread only ever
+    reads the front one.
+    """
+
+    def __init__(self, game):
+        threading.Thread.__init__(self, name="simulation", daemon=True)
+        self.game = game
+        self.front = None  # last finished snapshot, owned by the main thread once handed out
+        self.back = None  # snapshot being built
+        self.request = None
+        self.error = None
+        self.has_request = threading.Event()
+        self.done = threading.Event()
+        self.stopping = False
+
+    def start(self):
+        threading.Thread.start(self)
+        # Prime the pipeline so the first exchange() has a tick to return
+        self.submit(0, [])
+
+    def submit(self, dt, events):
+        self.request = (dt, events)
+        self.done.clear()
+        self.has_request.set()
+
+    def exchange(self, dt, events):
+        """Return the snapshot of the last tick and start simulating the next one."""
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        snapshot = self.front
+        if snapshot is not None:
+            frame_profiler.merge(snapshot.sections)
+        self.submit(dt, events)
+        return snapshot
+
+    def stop(self):
+        self.done.wait()
+        self.stopping = True
+        self.has_request.set()
+        self.join()
+
+    def run(self):
+        while True:
+            self.has_request.wait()
+            self.has_request.clear()
+            if self.stopping:
+                return
+            dt, events = self.request
+            frame_profiler.begin_capture()
+            try:
+                self.game.advance(dt, events)
+                snapshot = self.game.capture_snapshot()
+                self.back = snapshot._replace(sections=frame_profiler.end_capture())
+            except Exception as e:
+                self.error = e
+                self.done.set()
+                return
+            self.front, self.back = self.back, None
+            self.done.set()
@@ -0,0 +1,101 @@
+import pygame
+
+from utils.SimClock import sim_clock
+
+# Every shipped sound the game plays, decoded at map load. ("player", "level_up") is played
+# too but has no file yet; it is looked up (once) on the first level up instead.
+GAME_SOUNDS = [
+    ("player", "jump"),
+    ("player", "attack"),
+    ("skills", "flash_jump"),
+    ("skills", "big_star"),
+    ("mob", "hit"),
+]
+
+# (dir, name) -> (max voices playing at once, ms before the sound may start again)
+SOUND_LIMITS = {
+    ("mob", "hit"): (3, 60),
+    ("skills", "big_star"): (2, 100),
+}
+DEFAULT_LIMIT = (2, 30)
+
+
+class SoundBank:
+    """
+    Decoded sound effects and the mixer channels they play on.
+
+    Sounds are decoded once (preload() at map load, or on first use) and shared.
+    play() applies per sound a voice limit and a cooldown, so a multi-hit skill
+    landing on a pack of mobs plays a few hit sounds instead of one per hit; when
+    every channel of the pool is busy the oldest voice is cut off.
+    """
+
+    def __init__(self, num_channels=16, sound_dir="sprites/sounds"):
+        self.num_channels = num_channels
+        self.sound_dir = sound_dir
+        self.sounds = {}  # (dir, name) -> pygame.mixer.Sound, None if missing
+        self.voices = {}  # (dir, name) -> channels last used by the sound
+        self.last_played = {}  # (dir, name) -> sim time in ms
+        self.muted = False
+        self.ready = False
+
+    def init_mixer(self):
+        if not self.ready and pygame.mixer.get_init():
+            pygame.mixer.set_num_channels(self.num_channels)
+            self.ready = True
+        return self.ready
+
+    def preload(self, sounds=GAME_SOUNDS):
+        for dir_name, sound in sounds:
+            self.get(dir_name, sound)
+
+    def get(self, dir_name, sound):
+        key = (dir_name, sound)
+        if key not in self.sounds:
+            if not self.init_mixer():
+                return None
+            path = f"{self.sound_dir}/{dir_name}/{sound}.mp3"
+            try:
+                self.sounds[key] = pygame.mixer.Sound(path)
+            except (FileNotFoundError, pygame.error) as e:
+                print(f"Warning: Could not load sound {path}: {e}")
+                self.sounds[key] = None
+        return self.sounds[key]
+
+    def play(self, dir_name, sound):
+        """Play a sound unless muted, over its voice limit or still cooling down. Returns the channel or None."""
+        if self.muted:
+            return None
+        sound_obj = self.get(dir_name, sound)
+        if sound_obj is None:
+            return None
+        key = (dir_name, sound)
+        max_voices, cooldown = SOUND_LIMITS.get(key, DEFAULT_LIMIT)
+        now = sim_clock.get_ticks()
+        last = self.last_played.get(key)
+        if last is not None and 0 <= now - last < cooldown:
+            return None
+        voices = [channel for channel in self.voices.get(key, []) if channel.get_sound() is sound_obj]
+        if len(voices) >= max_voices:
+            return None
+        channel = pygame.mixer.find_channel(True)
+        if channel is None:
+            return None
+        channel.play(sound_obj)
+        voices.append(channel)
+        self.voices[key] = voices
+        self.last_played[key] = now
+        return channel
+
+    def set_muted(self, muted):
+        self.muted = muted
+        if muted and self.ready:
+            pygame.mixer.stop()
+
+    def toggle_mute(self):
+        self.set_muted(not self.muted)
+        return self.muted
+
+
+# Shared by every entity that makes noise
+sound_bank = SoundBank()
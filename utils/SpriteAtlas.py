@@ -0,0 +1,126 @@
+import json
+import os
+import threading
+
+import pygame
+
+ATLAS_DIR = "sprites/atlases"
+ATLAS_VERSION = 2
+
+
+class SpriteAtlas:
+    """
+    One packed sheet built by build_atlases.py plus its frame index.
+
+    The sheet is decoded the first time a frame is requested and frames are
+    handed out as subsurfaces of it. Before that, the size and modification
+    time of every source PNG and the number of PNGs in every packed directory
+    are compared with the index; if any changed (a frame was edited, added or
+    removed) the atlas is considered stale and ignored so the change still
+    shows up.
+    """
+
+    def __init__(self, image_path, data):
+        self.image_path = image_path
+        self.frames = {path: pygame.Rect(rect) for path, rect in data.get("frames", {}).items()}
+        self.sources = data.get("sources", {})
+        self.frame_counts = data.get("frame_counts", {})  # packed directory -> PNGs it held at build time
+        self.sheet = None
+        self.raw_sheet = None  # decoded by a loader thread, not yet converted
+        self.decode_lock = threading.Lock()
+        self.valid = None
+
+    def is_current(self):
+        if self.valid is None:
+            self.valid = os.path.exists(self.image_path)
+            for path, (mtime, size) in self.sources.items():
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    self.valid = False
+                    break
+                if stat.st_mtime_ns != mtime or stat.st_size != size:
+                    self.valid = False
+                    break
+            if self.valid:
+                self.valid = all(self._count_pngs(directory) == count for directory, count in self.frame_counts.items())
+            if not self.valid:
+                print(f"[SpriteAtlas] {self.image_path} is out of date, loading its frames individually. Run build_atlases.py to rebuild it.")
+        return self.valid
+
+    @staticmethod
+    def _count_pngs(directory):
+        try:
+            return len([f for f in os.listdir(directory) if f.endswith(".png")])
+        except OSError:
+            return None
+
+    def get_frame(self, path):
+        rect = self.frames.get(path)
+        if rect is None or not self.is_current():
+            return None
+        if self.sheet is None:
+            with self.decode_lock:
+                sheet = self.raw_sheet if self.raw_sheet is not None else pygame.image.load(self.image_path)
+                self.sheet = sheet.convert_alpha()
+                self.raw_sheet = None
+        return self.sheet.subsurface(rect)
+
+    def unload(self):
+        """Drop the decoded sheet; the next get_frame() reads it again. Frames handed out keep it alive."""
+        with self.decode_lock:
+            self.sheet = None
+
+    def decode(self):
+        """Read the sheet from disk without converting it; safe to call from a loader thread."""
+        with self.decode_lock:
+            if self.sheet is None and self.raw_sheet is None:
+                self.raw_sheet = pygame.image.load(self.image_path)
+
+
+class AtlasIndex:
+    """Maps sprite paths (e.g. 'sprites/mobs/slime/walk/0.png') to the atlas that packs them."""
+
+    def __init__(self, atlas_dir=ATLAS_DIR):
+        self.atlas_by_frame = {}
+        self.frame_counts = {}  # animation directory -> number of frames
+        if not os.path.isdir(atlas_dir):
+            return
+        for file_name in sorted(os.listdir(atlas_dir)):
+            if not file_name.endswith(".json"):
+                continue
+            index_path = os.path.join(atlas_dir, file_name)
+            try:
+                with open(index_path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[SpriteAtlas] Error reading {index_path}: {e}")
+                continue
+            if data.get("version") != ATLAS_VERSION:
+                continue
+            atlas = SpriteAtlas(os.path.join(atlas_dir, data["image"]), data)
+            for path in atlas.frames:
+                self.atlas_by_frame[path] = atlas
+            for directory, count in data.get("frame_counts", {}).items():
+                self.frame_counts[directory] = (atlas, count)
+
+    def get_frame(self, path):
+        """Return the frame as a subsurface of its sheet, or None if no current atlas has it."""
+        atlas = self.atlas_by_frame.get(path)
+        if atlas is None:
+            return None
+        return atlas.get_frame(path)
+
+    def get_atlas(self, path):
+        """The current atlas packing path, or None."""
+        atlas = self.atlas_by_frame.get(path)
+        if atlas is None or not atlas.is_current():
+            return None
+        return atlas
+
+    def count_frames(self, directory):
+        """Number of frames packed for an animation directory, or None if unknown."""
+        entry = self.frame_counts.get(directory)
+        if entry is None or not entry[0].is_current():
+            return None
+        return entry[1]
@@ -0,0 +1,39 @@
+import pygame
+
+
+class ViewCuller:
+    """
+    Camera-rect visibility test shared by every entity draw.
+
+    Call begin_frame() once per frame (and set_camera() whenever the camera
+    moves mid-frame), then ask visible() with the world-space rect an entity
+    is about to blit. drawn/culled count the answers for the current frame.
+    """
+
+    def __init__(self, width, height, margin=0):
+        self.width = width
+        self.height = height
+        self.margin = margin  # extra pixels kept around the view
+        self.view = pygame.Rect(0, 0, width, height)
+        self.drawn = 0
+        self.culled = 0
+
+    def begin_frame(self, camera_x, camera_y):
+        self.drawn = 0
+        self.culled = 0
+        self.set_camera(camera_x, camera_y)
+
+    def set_camera(self, camera_x, camera_y):
+        self.view.update(int(camera_x) - self.margin, int(camera_y) - self.margin,
+                         self.width + self.margin * 2, self.height + self.margin * 2)
+
+    def visible(self, rect):
+        if self.view.colliderect(rect):
+            self.drawn += 1
+            return True
+        self.culled += 1
+        return False
+
+    def visible_image(self, image, x, y):
+        """visible() for an image blitted with its top-left at world (x, y)."""
+        return self.visible((x, y, image.get_width(), image.get_height()))
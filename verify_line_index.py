@@ -0,0 +1,141 @@
+import json
+import os
+import random
+import sys
+import unittest
+
+import pygame
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from maps.LineIndex import LineIndex
+
+MAPS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "maps")
+
+
+def load_lines(map_id):
+    with open(os.path.join(MAPS_DIR, f"map{map_id}_lines.json")) as f:
+        return json.load(f)
+
+
+def random_lines(rng, count=300, size=4000):
+    """Walls and floors on a coarse grid, so many share end points (cliff edges)."""
+    lines = []
+    for _ in range(count):
+        x = rng.randrange(0, size, 50)
+        y = rng.randrange(0, size, 50)
+        if rng.random() < 0.5:
+            lines.append({"p1": [x, y], "p2": [x + rng.randrange(-300, 301, 50), y + rng.randrange(-100, 101, 50)], "type": "floor"})
+        else:
+            lines.append({"p1": [x, y], "p2": [x, y + rng.randrange(50, 401, 50)], "type": "wall"})
+    return lines
+
+
+# The linear scans Player.move / Mob.move did before the index
+
+def linear_cliff_side(lines, wall):
+    p1, p2 = wall['p1'], wall['p2']
+    top_y = min(p1[1], p2[1])
+    top_point = p1 if p1[1] == top_y else p2
+    for line in lines:
+        if line.get('type') == 'floor' and (line['p1'] == top_point or line['p2'] == top_point):
+            other_point = line['p1'] if line['p2'] == top_point else line['p2']
+            return (other_point[0] > top_point[0]) - (other_point[0] < top_point[0])
+    return 0
+
+
+def push_out_of_walls(walls, rect, dx, cliff_side):
+    """The wall pass of move(): returns the final rect and the walls that pushed it."""
+    pushed_by = []
+    for line in walls:
+        side = cliff_side(line)
+        if (dx > 0 and side < 0) or (dx < 0 and side > 0):
+            continue
+        p1, p2 = line['p1'], line['p2']
+        if rect.right > min(p1[0], p2[0]) and rect.left < max(p1[0], p2[0]) and \
+           rect.bottom > min(p1[1], p2[1]) and rect.top < max(p1[1], p2[1]):
+            if dx > 0:
+                rect.right = min(p1[0], p2[0])
+            elif dx < 0:
+                rect.left = max(p1[0], p2[0])
+            pushed_by.append(id(line))
+    return tuple(rect), pushed_by
+
+
+def find_ground(floors, foot_x, foot_y, vel_y):
+    """The floor pass of move(): (ground_y, floor) of the highest floor to snap to."""
+    ground_y = None
+    current_floor = None
+    for line in floors:
+        p1, p2 = line['p1'], line['p2']
+        if min(p1[0], p2[0]) <= foot_x <= max(p1[0], p2[0]):
+            if p2[0] != p1[0]:
+                line_y = p1[1] + (p2[1] - p1[1]) / (p2[0] - p1[0]) * (foot_x - p1[0])
+            else:
+                line_y = min(p1[1], p2[1])
+            if foot_y >= line_y - 5 and foot_y <= line_y + max(10, vel_y + 5):
+                if ground_y is None or line_y < ground_y:
+                    ground_y = line_y
+                    current_floor = line
+    return ground_y, id(current_floor) if current_floor is not None else None
+
+
+class TestLineIndex(unittest.TestCase):
+    def line_sets(self):
+        rng = random.Random(7)
+        return [("map0", load_lines(0)), ("map1", load_lines(1)), ("random", random_lines(rng))]
+
+    def test_cliff_side_matches_linear_scan(self):
+        for name, lines in self.line_sets():
+            index = LineIndex(lines)
+            for wall in lines:
+                if wall.get('type') == 'wall':
+                    self.assertEqual(index.cliff_side(wall), linear_cliff_side(lines, wall), name)
+
+    def test_walls_near_matches_linear_scan(self):
+        rng = random.Random(1)
+        for name, lines in self.line_sets():
+            index = LineIndex(lines)
+            walls = [line for line in lines if line.get('type') == 'wall']
+            for _ in range(2000):
+                rect = pygame.Rect(rng.randrange(-200, 4200), rng.randrange(-200, 4200), rng.randrange(20, 120), rng.randrange(20, 120))
+                dx = rng.choice((-6, -3, 0, 3, 6))
+                expected = push_out_of_walls(walls, pygame.Rect(rect), dx, lambda wall: linear_cliff_side(lines, wall))
+                moved = pygame.Rect(rect)
+                result = push_out_of_walls(index.walls_near(moved), moved, dx, index.cliff_side)
+                self.assertEqual(result, expected, f"{name} {rect} dx={dx}")
+
+    def test_floors_at_matches_linear_scan(self):
+        rng = random.Random(2)
+        for name, lines in self.line_sets():
+            index = LineIndex(lines)
+            floors = [line for line in lines if line.get('type') == 'floor']
+            for _ in range(2000):
+                foot_x = rng.randrange(-200, 4200)
+                foot_y = rng.randrange(-200, 4200)
+                vel_y = rng.choice((0, 7.5, 15, 40))
+                expected = find_ground(floors, foot_x, foot_y, vel_y)
+                candidates = index.floors_at(foot_x, foot_y - max(10, vel_y + 5) - 1, foot_y + 6)
+                self.assertEqual(find_ground(candidates, foot_x, foot_y, vel_y), expected, f"{name} ({foot_x}, {foot_y})")
+
+    def test_add_and_remove_match_a_fresh_index(self):
+        rng = random.Random(3)
+        lines = random_lines(rng)
+        index = LineIndex(lines, indexed=False)
+        index.add(range(len(lines)))
+        removed = set(rng.sample(range(len(lines)), 150))
+        index.remove(removed)
+        kept = [i for i in range(len(lines)) if i not in removed]
+        fresh = LineIndex(lines, indexed=False)
+        fresh.add(kept)
+        self.assertEqual(index.indexed, set(kept))
+        for _ in range(500):
+            rect = pygame.Rect(rng.randrange(0, 4000), rng.randrange(0, 4000), 60, 80)
+            self.assertEqual([id(line) for line in index.walls_near(rect)], [id(line) for line in fresh.walls_near(rect)])
+            self.assertEqual([id(line) for line in index.floors_at(rect.centerx, rect.top, rect.bottom)],
+                             [id(line) for line in fresh.floors_at(rect.centerx, rect.top, rect.bottom)])
+
+
+if __name__ == '__main__':
+    unittest.main()